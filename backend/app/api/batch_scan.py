@@ -0,0 +1,140 @@
+"""
+Batch scan: many symbols and strategies in one request, streamed as NDJSON.
+
+Each symbol goes through the same path as a scheduled scan - gates, then one
+fetch_mtf_data() shared by every requested strategy - with up to
+API_BATCH_CONCURRENCY symbols in flight on the API's broker and CPU pools.
+Every symbol's result is written as one JSON line the moment it is ready
+(completion order, not request order), followed by a summary line:
+
+    {"symbol": "EURUSD", "signals": {"mtf_confluence": {...}, "trend": {...}}, "seconds": 0.41}
+    {"symbol": "XAUUSD", "rejected": {...}, "seconds": 0.02}
+    {"done": true, "symbols": 27, "errors": 0, "seconds": 3.8}
+
+analysis_only (the default) never alerts, persists or places orders. With
+analysis_only=false the mtf_confluence signal of each symbol is handled like
+/scan: sized, alerted, saved and executed after the risk gate is re-checked,
+one symbol at a time under the order lock /scan and the scheduler also take.
+A symbol that has started executing always finishes, even if the request
+times out or the client disconnects. In cluster mode only the leader accepts
+analysis_only=false.
+"""
+import asyncio
+import json
+import time
+from typing import AsyncIterator, Callable, Dict, List, Optional
+from fastapi.encoders import jsonable_encoder
+from app.api.concurrency import RouteLimiter, broker_call, cpu_call
+from app.core.config import settings
+from app.core.constants import PAIRS
+from app.core.logger import setup_logger
+from app.core.metrics import metrics
+
+logger = setup_logger("BatchScan")
+
+# The live strategy (what /scan and the scheduler run); the others come from the MTF router
+PRIMARY_STRATEGY = "mtf_confluence"
+
+batch_limiter = RouteLimiter("scan_batch", settings.API_SCAN_CONCURRENCY, settings.API_SCAN_TIMEOUT_SECONDS)
+
+
+def strategy_names() -> List[str]:
+    from app.strategies.rule_specs import RULE_SETS
+    return list(dict.fromkeys([PRIMARY_STRATEGY, "trend", "swing", "breakout", *RULE_SETS]))
+
+
+def parse_symbols(symbols: str) -> List[str]:
+    """Comma-separated symbols, or "all" for the scan universe"""
+    if symbols.strip().lower() == "all":
+        return list(dict.fromkeys(PAIRS))
+    return list(dict.fromkeys(s.strip().upper() for s in symbols.split(",") if s.strip()))
+
+
+def evaluate_strategies(mtf_data, symbol: str, strategies: List[str]) -> Dict[str, Optional[dict]]:
+    """CPU stage: every requested strategy on one symbol's fetched frames"""
+    from app.strategies.mtf_confluence_with_d1 import detect_mtf_confluence_signal
+    from app.strategies.mtf_router import run_mtf_strategy
+
+    signals = {}
+    for name in strategies:
+        with metrics.timer(f"scan_batch.strategy.{name}"):
+            if name == PRIMARY_STRATEGY:
+                signals[name] = detect_mtf_confluence_signal(mtf_data, symbol, gates_checked=True)
+            else:
+                signals[name] = run_mtf_strategy(name, mtf_data, symbol) or None
+    return signals
+
+
+def apply_signal(sig: dict, symbol: str) -> dict:
+    """Side-effect stage for a non-analysis batch: /scan's processing, after a fresh risk check"""
+    from app.signals.gates import evaluate_risk_gate
+    from app.signals.signal_engine import order_lock, process_signal
+
+    # Held by the worker thread itself, so a request timing out can't let the next symbol in early
+    with order_lock:
+        rejection = evaluate_risk_gate(symbol)
+        if rejection:
+            return {"processed": False, "reason": rejection["reason"]}
+        process_signal(sig, symbol)
+        return {"processed": True, "executed": bool(sig.get("executed"))}
+
+
+async def scan_symbol(symbol: str, strategies: List[str], analysis_only: bool) -> dict:
+    from app.data.data_utils import fetch_mtf_data
+    from app.signals.gates import evaluate_gates
+
+    start = time.perf_counter()
+    result = {"symbol": symbol}
+    try:
+        rejection = await broker_call(evaluate_gates, symbol)
+        if rejection:
+            result["rejected"] = rejection
+        else:
+            mtf_data = await broker_call(fetch_mtf_data, symbol)
+            result["signals"] = await cpu_call(evaluate_strategies, mtf_data, symbol, strategies)
+            primary = result["signals"].get(PRIMARY_STRATEGY)
+            if not analysis_only and primary and primary.get("direction") in ("BUY", "SELL"):
+                result["execution"] = await broker_call(apply_signal, primary, symbol)
+    except Exception as e:
+        metrics.incr("scan_batch.errors")
+        logger.error(f"❌ {symbol}: batch scan error - {e}")
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = round(time.perf_counter() - start, 4)
+    return result
+
+
+def _line(payload: dict) -> bytes:
+    return (json.dumps(jsonable_encoder(payload), default=str) + "\n").encode()
+
+
+async def stream_scan(symbols: List[str], strategies: List[str], analysis_only: bool,
+                      release: Optional[Callable[[], None]] = None) -> AsyncIterator[bytes]:
+    """NDJSON lines: one per symbol as it completes, then the summary. Calls release() once it ends."""
+    start = time.perf_counter()
+    slots = asyncio.Semaphore(settings.API_BATCH_CONCURRENCY)
+
+    async def bounded(symbol):
+        async with slots:
+            try:
+                return await asyncio.wait_for(scan_symbol(symbol, strategies, analysis_only),
+                                              settings.SCAN_PAIR_TIMEOUT)
+            except asyncio.TimeoutError:
+                metrics.incr("scan_batch.timeouts")
+                return {"symbol": symbol, "error": "timeout"}
+
+    tasks = [asyncio.ensure_future(bounded(symbol)) for symbol in symbols]
+    errors = 0
+    try:
+        for done in asyncio.as_completed(tasks):
+            result = await done
+            errors += "error" in result
+            yield _line(result)
+        metrics.incr("scan_batch.symbols", len(symbols))
+        yield _line({"done": True, "symbols": len(symbols), "errors": errors,
+                     "seconds": round(time.perf_counter() - start, 4)})
+    finally:
+        # Client went away: drop the symbols not yet finished
+        for task in tasks:
+            task.cancel()
+        if release:
+            release()
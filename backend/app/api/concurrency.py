@@ -0,0 +1,145 @@
+"""
+Offload and admission control for async API handlers.
+
+Handlers stay on the event loop and hand blocking work to two bounded thread
+pools, so a burst of heavy requests queues there instead of filling the
+server's shared threadpool (which also serves every sync route):
+
+- broker_call() for broker/market-store I/O (MT5 calls, market_data reads),
+  including whole scans that fetch and place orders
+- cpu_call() for DataFrame building, indicators and strategy scoring
+
+limited(name, concurrency, timeout) caps how many requests of one route run at
+once and how long they may take. A request that can't get a slot within the
+timeout gets 503; one that runs past it gets 504. Work already handed to a
+pool is not interrupted - a scan that may place orders always runs to
+completion - and keeps its slot until it finishes, so the cap holds even when
+clients give up. Streamed responses take a slot with `await limiter.acquire()`
+before the response is returned and release it when the stream ends.
+
+Metrics: api.<name> timer, api.<name>.rejected / .timeouts counters,
+api.<name>.in_flight gauge.
+"""
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+from fastapi import HTTPException
+from app.core.config import settings
+from app.core.metrics import metrics
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+
+
+def _executor(name: str, workers: int) -> ThreadPoolExecutor:
+    pool = _executors.get(name)
+    if pool is None:
+        pool = _executors[name] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"api-{name}")
+    return pool
+
+
+async def broker_call(fn: Callable, *args, **kwargs):
+    """Run blocking broker I/O on the broker pool"""
+    return await asyncio.get_running_loop().run_in_executor(
+        _executor("broker", settings.API_BROKER_WORKERS), functools.partial(fn, *args, **kwargs))
+
+
+async def cpu_call(fn: Callable, *args, **kwargs):
+    """Run CPU-bound work (DataFrames, indicators, strategies) on the CPU pool"""
+    return await asyncio.get_running_loop().run_in_executor(
+        _executor("cpu", settings.API_CPU_WORKERS), functools.partial(fn, *args, **kwargs))
+
+
+def shutdown_executors(wait: bool = True):
+    for pool in _executors.values():
+        pool.shutdown(wait=wait, cancel_futures=True)
+    _executors.clear()
+
+
+class RouteLimiter:
+    def __init__(self, name: str, concurrency: int, timeout: float):
+        self.name = name
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+
+    def _slots(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the server's event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    def full(self) -> bool:
+        return self._slots().locked()
+
+    async def acquire(self) -> Callable[[], None]:
+        """
+        Take a slot for a streamed response, before the handler returns it, so a
+        request over capacity still gets a 503. Returns the release callback; it
+        is safe to call more than once.
+        """
+        try:
+            await asyncio.wait_for(self._slots().acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            metrics.incr(f"api.{self.name}.rejected")
+            raise HTTPException(status_code=503, detail=f"{self.name} is at capacity, retry later")
+        self._in_flight += 1
+        metrics.gauge(f"api.{self.name}.in_flight", self._in_flight)
+        start = time.perf_counter()
+        released = False
+
+        def release():
+            nonlocal released
+            if released:
+                return
+            released = True
+            metrics.observe(f"api.{self.name}", time.perf_counter() - start)
+            self._in_flight -= 1
+            metrics.gauge(f"api.{self.name}.in_flight", self._in_flight)
+            self._semaphore.release()
+
+        return release
+
+    async def run(self, coro_fn: Callable, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        try:
+            await asyncio.wait_for(self._slots().acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            metrics.incr(f"api.{self.name}.rejected")
+            raise HTTPException(status_code=503, detail=f"{self.name} is at capacity, retry later")
+
+        self._in_flight += 1
+        metrics.gauge(f"api.{self.name}.in_flight", self._in_flight)
+        task = asyncio.ensure_future(coro_fn(*args, **kwargs))
+        task.add_done_callback(self._release)
+        try:
+            with metrics.timer(f"api.{self.name}"):
+                # shield: a timed-out request stops waiting, the work itself carries on
+                return await asyncio.wait_for(asyncio.shield(task), max(0.0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            metrics.incr(f"api.{self.name}.timeouts")
+            raise HTTPException(status_code=504, detail=f"{self.name} timed out after {self.timeout:g}s")
+
+    def _release(self, task: asyncio.Future):
+        self._in_flight -= 1
+        metrics.gauge(f"api.{self.name}.in_flight", self._in_flight)
+        self._semaphore.release()
+        if not task.cancelled() and task.exception() is not None:
+            # Already reported to the caller, unless it timed out first
+            metrics.incr(f"api.{self.name}.errors")
+
+
+def limited(name: str, concurrency: int, timeout: float):
+    """Decorator for async route handlers: at most `concurrency` at once, `timeout` seconds each"""
+    limiter = RouteLimiter(name, concurrency, timeout)
+
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(*args, **kwargs):
+            return await limiter.run(handler, *args, **kwargs)
+        wrapper.limiter = limiter
+        return wrapper
+    return decorator
@@ -0,0 +1,149 @@
+"""
+Bar-aware response cache for the per-symbol analysis endpoints.
+
+A /signal/trend answer can't change until the next candle of its timeframe
+closes, so it is cached under (route, symbol, timeframe) together with the
+open time of the last closed bar (counted from BAR_SETTLE_SECONDS after the
+close, when the broker has finalized it). The first request after a close
+recomputes; a request for an older bar's entry is a miss and replaces it.
+/scan is not cached: it alerts, saves and places orders, which a cached or
+shared answer would silently skip.
+
+- single-flight: concurrent identical requests wait on the one computation in
+  flight instead of each fetching bars and running indicators; the cache owns
+  that computation, so a client disconnecting doesn't cancel it for the others
+- bounded: least recently used entries are evicted past RESPONSE_CACHE_MB of
+  rendered JSON
+- revalidation: responses carry a content ETag and a Cache-Control max-age
+  running to the next bar close; If-None-Match gets 304
+
+Error answers are never cached. Unknown timeframes bypass the cache.
+
+Metrics: response_cache.hits / .misses / .coalesced / .not_modified /
+.evictions counters, response_cache.bytes gauge.
+"""
+import asyncio
+import calendar
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from app.core.clock import utcnow
+from app.core.config import settings
+from app.core.constants import TIMEFRAME_MINUTES
+from app.core.metrics import metrics
+
+Key = Tuple[str, str, str]  # (route, symbol, timeframe)
+
+
+class _Entry:
+    __slots__ = ("bar", "body", "etag", "expires")
+
+    def __init__(self, bar: int, body: bytes, expires: int):
+        self.bar = bar
+        self.body = body
+        self.etag = f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+        self.expires = expires
+
+
+def closed_bar(timeframe: str, now: Optional[int] = None) -> Optional[Tuple[int, int]]:
+    """(open time of the last settled closed bar, epoch when the next one settles); None if unknown"""
+    minutes = TIMEFRAME_MINUTES.get(timeframe)
+    if minutes is None:
+        return None
+    now = calendar.timegm(utcnow().timetuple()) if now is None else now
+    length = minutes * 60
+    forming = (now - settings.BAR_SETTLE_SECONDS) // length * length
+    return forming - length, forming + length + settings.BAR_SETTLE_SECONDS
+
+
+class ResponseCache:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Key, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._inflight: Dict[Tuple[Key, int], asyncio.Future] = {}
+
+    def _get(self, key: Key, bar: int) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.bar != bar:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _put(self, key: Key, entry: _Entry):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old.body)
+            self._entries[key] = entry
+            self._bytes += len(entry.body)
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.body)
+                metrics.incr("response_cache.evictions")
+            metrics.gauge("response_cache.bytes", self._bytes)
+
+    async def _render(self, key: Key, bar: int, expires: int, compute: Callable[..., Awaitable], args) -> _Entry:
+        result = await compute(*args)
+        entry = _Entry(bar, JSONResponse(jsonable_encoder(result)).body, expires)
+        if not (isinstance(result, dict) and "error" in result):
+            self._put(key, entry)
+        else:
+            entry.expires = 0  # Shared with the waiters, but never stored
+        return entry
+
+    async def _compute(self, key: Key, bar: int, expires: int, compute: Callable[..., Awaitable], args) -> _Entry:
+        """Run compute once per (key, bar); concurrent callers share the result"""
+        flight = (key, bar)
+        task = self._inflight.get(flight)
+        if task is not None:
+            metrics.incr("response_cache.coalesced")
+        else:
+            # The cache owns the computation: no single caller going away can cancel it for the others
+            task = self._inflight[flight] = asyncio.ensure_future(self._render(key, bar, expires, compute, args))
+            task.add_done_callback(lambda done: self._finished(flight, done))
+        return await asyncio.shield(task)
+
+    def _finished(self, flight, task: asyncio.Future):
+        self._inflight.pop(flight, None)
+        if not task.cancelled():
+            task.exception()  # Waiters re-raise it; don't warn when there are none
+
+    async def serve(self, request: Request, route: str, symbol: str, timeframe: str,
+                    compute: Callable[..., Awaitable], *args) -> Response:
+        """Cached, coalesced response for compute(*args), the handler for this bar"""
+        timeframe = timeframe.upper()
+        bar = closed_bar(timeframe)
+        if bar is None or self.max_bytes <= 0:
+            return await compute(*args)
+
+        key = (route, symbol.upper(), timeframe)
+        entry = self._get(key, bar[0])
+        if entry is not None:
+            metrics.incr("response_cache.hits")
+        else:
+            metrics.incr("response_cache.misses")
+            entry = await self._compute(key, bar[0], bar[1], compute, args)
+
+        if not entry.expires:
+            return Response(entry.body, media_type="application/json", headers={"Cache-Control": "no-store"})
+        max_age = max(0, entry.expires - calendar.timegm(utcnow().timetuple()))
+        headers = {"ETag": entry.etag, "Cache-Control": f"public, max-age={max_age}"}
+        if entry.etag in request.headers.get("if-none-match", ""):
+            metrics.incr("response_cache.not_modified")
+            return Response(status_code=304, headers=headers)
+        return Response(entry.body, media_type="application/json", headers=headers)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+response_cache = ResponseCache(int(settings.RESPONSE_CACHE_MB * 1024 * 1024))
@@ -1,13 +1,226 @@
-from fastapi import APIRouter
-from app.signals.signal_engine import SignalEngine
+from typing import Optional
+import asyncio
+import json
+import time
+import gzip
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from app.api.batch_scan import batch_limiter, parse_symbols, stream_scan, strategy_names
+from app.cluster.leader import is_leader
+from app.core.config import settings
+from app.core.constants import TIMEFRAMES
+from app.core.events import EVENT_TYPES, events
+from app.data.market_store import read_bars
+from app.database.history import query_history
+from app.database.analytics import DIMENSIONS, aggregates
+from app.signals.recent_signals import recent_signals
 
 router = APIRouter()
 
 @router.get("/health")
-def health():
+async def health():
+    # Async: answered on the event loop, never queued behind blocking handlers
     return {"status": "ok"}
 
+def _csv(value: Optional[str]):
+    return [v.strip() for v in value.split(",") if v.strip()] if value else None
+
+def _compressed(request: Request, payload, minimum_size: int = 1024) -> Response:
+    """JSON response, gzipped when the client accepts it and it is worth it"""
+    response = JSONResponse(jsonable_encoder(payload))
+    if len(response.body) < minimum_size or "gzip" not in request.headers.get("accept-encoding", ""):
+        return response
+    return Response(gzip.compress(response.body, compresslevel=6), media_type="application/json",
+                    headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"})
+
+def history_filters(symbol: Optional[str] = None, timeframe: Optional[str] = None, direction: Optional[str] = None,
+                    min_confidence: Optional[int] = Query(None, ge=0, le=100),
+                    max_confidence: Optional[int] = Query(None, ge=0, le=100),
+                    since: Optional[str] = None, until: Optional[str] = None, cursor: Optional[str] = None,
+                    limit: int = Query(100, ge=1, le=1000), fields: Optional[str] = None,
+                    order: str = Query("desc", pattern="^(asc|desc)$")) -> dict:
+    """Shared query parameters; since/until are epoch seconds or ISO 8601, fields comma-separated"""
+    return {"symbol": symbol, "timeframe": timeframe, "direction": direction, "min_confidence": min_confidence,
+            "max_confidence": max_confidence, "since": since, "until": until, "cursor": cursor,
+            "limit": limit, "fields": _csv(fields), "order": order}
+
+def _history(request: Request, kind: str, filters: dict) -> Response:
+    try:
+        return _compressed(request, query_history(kind, **filters))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/signals")
-def get_signals():
-    # Placeholder for signal fetching
-    return {"signals": []}
+def get_signals(request: Request, filters: dict = Depends(history_filters)):
+    """Saved signals, newest first, one keyset page at a time (pass next_cursor back as cursor)"""
+    return _history(request, "signals", filters)
+
+@router.get("/forecasts")
+def get_forecasts(request: Request, filters: dict = Depends(history_filters)):
+    """Forecast (pending-entry) signals, paginated like /signals"""
+    return _history(request, "forecasts", filters)
+
+@router.get("/trades")
+def get_trades(request: Request, filters: dict = Depends(history_filters)):
+    """Executed trades and their outcomes, paginated like /signals (no timeframe filter)"""
+    return _history(request, "trades", filters)
+
+@router.get("/signals/recent")
+def get_recent_signals(symbol: Optional[str] = None, limit: int = Query(100, ge=1, le=1000)):
+    """Signals saved within the dedup window, newest first (served from memory)"""
+    signals = recent_signals.recent(symbol.upper() if symbol else None, limit)
+    return {"signals": signals, "count": len(signals), "window_seconds": recent_signals.window_seconds}
+
+@router.get("/bars/{symbol}/{timeframe}")
+def get_bars(request: Request, symbol: str, timeframe: str, start: Optional[int] = None, end: Optional[int] = None,
+             limit: int = Query(500, ge=1, le=100000)):
+    """Stored OHLCV bars (epoch-second range, newest `limit` of it) as column arrays"""
+    timeframe = timeframe.upper()
+    if timeframe not in TIMEFRAMES:
+        raise HTTPException(status_code=400, detail=f"Unsupported timeframe {timeframe}")
+    bars = read_bars(symbol.upper(), timeframe, start, end, limit)
+    return _compressed(request, {"symbol": symbol.upper(), "timeframe": timeframe, "count": len(bars["timestamp"]),
+                                 **{name: column.tolist() for name, column in bars.items()}})
+
+@router.get("/analytics/performance")
+def get_performance(group_by: str = "strategy", since: Optional[str] = None, until: Optional[str] = None,
+                    symbol: Optional[str] = None, strategy: Optional[str] = None, tier: Optional[str] = None):
+    """
+    Win rate, R:R, signal frequency and SL/TP stats from the incrementally maintained
+    aggregates (never scans signals/trade_performance). group_by: comma-separated
+    day, symbol, strategy, tier; since/until: YYYY-MM-DD.
+    """
+    dimensions = [d.strip() for d in group_by.split(",") if d.strip()]
+    if not set(dimensions) <= set(DIMENSIONS):
+        raise HTTPException(status_code=400, detail=f"group_by must be drawn from {', '.join(DIMENSIONS)}")
+    rows = aggregates.summary(dimensions, since, until, symbol.upper() if symbol else None, strategy, tier)
+    return {"group_by": dimensions, "rows": rows, "count": len(rows)}
+
+@router.get("/scan/batch")
+async def scan_batch(symbols: str = "all", strategies: str = "mtf_confluence", analysis_only: bool = True):
+    """
+    Scan many symbols with one or more strategies, streaming one NDJSON line per symbol
+    as it completes. symbols: comma-separated or "all"; analysis_only=false also
+    processes each mtf_confluence signal like /scan (alert, save, order).
+    """
+    names = [s.strip() for s in strategies.split(",") if s.strip()]
+    unknown = set(names) - set(strategy_names())
+    if unknown or not names:
+        raise HTTPException(status_code=400, detail=f"strategies must be drawn from {', '.join(strategy_names())}")
+    pairs = parse_symbols(symbols)
+    if not pairs:
+        raise HTTPException(status_code=400, detail="No symbols given")
+    if not analysis_only and not is_leader():
+        raise HTTPException(status_code=503, detail="Not the cluster leader, retry on the leader")
+    release = await batch_limiter.acquire()
+    # The stream releases the slot when it ends; the background task covers a stream never started
+    return StreamingResponse(stream_scan(pairs, names, analysis_only, release),
+                             media_type="application/x-ndjson", background=BackgroundTask(release))
+
+
+def _check_types(types):
+    if types and not set(types) <= set(EVENT_TYPES):
+        raise HTTPException(status_code=400, detail=f"types must be drawn from {', '.join(EVENT_TYPES)}")
+    return types
+
+@router.get("/events")
+async def stream_events(symbols: Optional[str] = None, strategies: Optional[str] = None,
+                        types: Optional[str] = None):
+    """
+    Server-Sent Events: signals, rejections, forecasts, forecast triggers and order results
+    as they happen. Filters are comma-separated; a comment line is sent as heartbeat.
+    """
+    subscriber = events.subscribe(_csv(symbols), _csv(strategies), _check_types(_csv(types)))
+
+    async def stream():
+        try:
+            while True:
+                batch = await subscriber.next_batch(settings.EVENTS_HEARTBEAT_SECONDS)
+                if not batch:
+                    yield f": heartbeat {time.time():.0f}\n\n"
+                    continue
+                dropped = subscriber.take_dropped()
+                if dropped:
+                    yield f"event: dropped\ndata: {json.dumps({'count': dropped})}\n\n"
+                for event, encoded in batch:
+                    yield f"id: {event['id']}\nevent: {event['type']}\ndata: {encoded}\n\n"
+        finally:
+            events.unsubscribe(subscriber)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+FILTER_KEYS = ("symbols", "strategies", "types")
+
+
+def _filter_update(message) -> dict:
+    """Validate a WebSocket filter message; ValueError describes what is wrong"""
+    if not isinstance(message, dict):
+        raise ValueError("filter message must be a JSON object")
+    unknown = set(message) - set(FILTER_KEYS)
+    if unknown:
+        raise ValueError(f"unknown filter(s): {', '.join(sorted(unknown))}")
+    filters = {}
+    for key in FILTER_KEYS:
+        values = message.get(key)
+        if values is not None and not (isinstance(values, list) and all(isinstance(v, str) for v in values)):
+            raise ValueError(f"{key} must be a list of strings")
+        filters[key] = values
+    if filters["types"] and not set(filters["types"]) <= set(EVENT_TYPES):
+        raise ValueError(f"types must be drawn from {', '.join(EVENT_TYPES)}")
+    return filters
+
+@router.websocket("/ws/events")
+async def websocket_events(websocket: WebSocket, symbols: Optional[str] = None,
+                           strategies: Optional[str] = None, types: Optional[str] = None):
+    """
+    WebSocket push of the same events as /events. Clients may send
+    {"symbols": [...], "strategies": [...], "types": [...]} to change their filters;
+    invalid filters close the socket with code 1008 (policy violation).
+    """
+    await websocket.accept()
+    try:
+        filters = _filter_update({"symbols": _csv(symbols), "strategies": _csv(strategies), "types": _csv(types)})
+    except ValueError as e:
+        await websocket.close(code=1008, reason=str(e))
+        return
+    subscriber = events.subscribe(filters["symbols"], filters["strategies"], filters["types"])
+
+    async def receive_filters():
+        while True:
+            filters = _filter_update(await websocket.receive_json())
+            subscriber.set_filters(filters["symbols"], filters["strategies"], filters["types"])
+
+    receiver = asyncio.ensure_future(receive_filters())
+    batch_task = None
+    try:
+        while True:
+            # Wait on both, so a bad message or a disconnect is noticed at once, not at the next heartbeat
+            batch_task = asyncio.ensure_future(subscriber.next_batch(settings.EVENTS_HEARTBEAT_SECONDS))
+            await asyncio.wait({batch_task, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            if receiver.done():
+                error = receiver.exception()
+                if isinstance(error, ValueError):
+                    await websocket.close(code=1008, reason=str(error))
+                elif not isinstance(error, WebSocketDisconnect):
+                    await websocket.close(code=1011)
+                break
+            batch = batch_task.result()
+            if not batch:
+                await websocket.send_text(json.dumps({"type": "heartbeat", "time": time.time()}))
+                continue
+            dropped = subscriber.take_dropped()
+            if dropped:
+                await websocket.send_text(json.dumps({"type": "dropped", "count": dropped}))
+            for _, encoded in batch:
+                await websocket.send_text(encoded)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        if batch_task is not None:
+            batch_task.cancel()
+        events.unsubscribe(subscriber)
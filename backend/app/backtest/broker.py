@@ -0,0 +1,197 @@
+"""
+Simulated broker for backtests.
+
+Serves closed bars up to the simulated clock in the same list-of-dicts format
+as fetch_ohlcv, fills market orders at the simulated bid/ask with spread,
+slippage and commission, and closes positions when a later bar touches SL or
+TP. Exposes the subset of the MetaTrader5 API that MarketConditionFilter and
+ProfessionalRiskManager use (ticks, positions, deal history, account info).
+"""
+from types import SimpleNamespace
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+from app.core.clock import get_clock
+from app.core.constants import TIMEFRAME_MINUTES
+
+def pip_size(symbol: str) -> float:
+    if symbol.startswith("XAU"):
+        return 0.1
+    if "JPY" in symbol or symbol.startswith("XAG"):
+        return 0.01
+    return 0.0001
+
+class SimulatedBroker:
+    # History is already in memory; set True to exercise the market_data store
+    persist_bars = False
+
+    def __init__(self, history: Dict[str, Dict[str, pd.DataFrame]], clock=None,
+                 balance: float = 10000.0, spread_pips: float = 1.0, slippage_pips: float = 0.2,
+                 commission_per_lot: float = 7.0, pip_value_per_lot: float = 10.0):
+        """
+        Args:
+            history: {symbol: {timeframe: DataFrame with time, open, high, low, close}}
+            spread_pips: bid/ask spread applied to every fill
+            slippage_pips: adverse slippage on market entries and stop-loss exits
+            commission_per_lot: round-turn commission charged when a position closes
+        """
+        self.clock = clock or get_clock()
+        self.balance = balance
+        self.spread_pips = spread_pips
+        self.slippage_pips = slippage_pips
+        self.commission_per_lot = commission_per_lot
+        self.pip_value_per_lot = pip_value_per_lot
+        self.positions: List[SimpleNamespace] = []
+        self.deals: List[SimpleNamespace] = []
+        self._next_ticket = 1
+
+        # Column arrays per symbol/timeframe; close_time is when a bar becomes visible
+        self.bars = {}
+        for symbol, frames in history.items():
+            for tf, df in frames.items():
+                open_time = df['time'].to_numpy(dtype="datetime64[s]").astype(np.int64)
+                self.bars[(symbol, tf)] = {
+                    "time": open_time,
+                    "close_time": open_time + TIMEFRAME_MINUTES[tf] * 60,
+                    "open": df['open'].to_numpy(dtype=float),
+                    "high": df['high'].to_numpy(dtype=float),
+                    "low": df['low'].to_numpy(dtype=float),
+                    "close": df['close'].to_numpy(dtype=float),
+                    "tick_volume": (df['tick_volume'] if 'tick_volume' in df else pd.Series(0, index=df.index)).to_numpy(),
+                }
+
+    def _now_ts(self) -> int:
+        return int(pd.Timestamp(self.clock.now()).timestamp())
+
+    def _visible(self, symbol: str, timeframe: str) -> int:
+        """Number of bars of a series that have closed by the simulated time"""
+        series = self.bars[(symbol, timeframe)]
+        return int(np.searchsorted(series["close_time"], self._now_ts(), side="right"))
+
+    # --- market data -------------------------------------------------
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str, bars: int = 100):
+        return self.fetch_rates(symbol, timeframe, max(bars, 250))
+
+    def fetch_rates(self, symbol: str, timeframe: str, count: int):
+        series = self.bars[(symbol, timeframe)]
+        end = self._visible(symbol, timeframe)
+        start = max(0, end - count)
+        return [
+            {
+                'time': int(series["time"][i]),
+                'open': float(series["open"][i]),
+                'high': float(series["high"][i]),
+                'low': float(series["low"][i]),
+                'close': float(series["close"][i]),
+                'tick_volume': int(series["tick_volume"][i]),
+                'spread': self.spread_pips,
+                'real_volume': 0
+            }
+            for i in range(start, end)
+        ]
+
+    def latest_bar_time(self, symbol: str, timeframe: str = "M15"):
+        end = self._visible(symbol, timeframe)
+        return int(self.bars[(symbol, timeframe)]["time"][end - 1]) if end else None
+
+    def symbol_info_tick(self, symbol: str):
+        end = self._visible(symbol, "M15")
+        if end == 0:
+            return None
+        bid = float(self.bars[(symbol, "M15")]["close"][end - 1])
+        return SimpleNamespace(bid=bid, ask=bid + self.spread_pips * pip_size(symbol), time=self._now_ts())
+
+    def symbol_info(self, symbol: str):
+        return SimpleNamespace(
+            name=symbol, visible=True, trade_contract_size=100000,
+            volume_min=0.01, volume_max=100.0, volume_step=0.01
+        )
+
+    def is_market_open(self, symbol: str) -> bool:
+        # Open while the latest M15 bar closed within the last bar interval
+        end = self._visible(symbol, "M15")
+        if end == 0:
+            return False
+        return self._now_ts() - self.bars[(symbol, "M15")]["close_time"][end - 1] <= TIMEFRAME_MINUTES["M15"] * 60
+
+    # --- account -----------------------------------------------------
+
+    def account_info(self):
+        return SimpleNamespace(balance=self.balance, equity=self.balance)
+
+    def account_balance(self) -> float:
+        return self.balance
+
+    def positions_get(self, symbol: str = None):
+        if symbol is None:
+            return tuple(self.positions)
+        return tuple(p for p in self.positions if p.symbol == symbol)
+
+    def history_deals_get(self, start, end):
+        start_ts, end_ts = pd.Timestamp(start).timestamp(), pd.Timestamp(end).timestamp()
+        return tuple(d for d in self.deals if start_ts <= d.time <= end_ts)
+
+    # --- execution ---------------------------------------------------
+
+    def place_order(self, symbol, direction, entry, sl, tp, lot=0.1, magic=123456):
+        tick = self.symbol_info_tick(symbol)
+        if tick is None:
+            return False
+        slip = self.slippage_pips * pip_size(symbol)
+        price = tick.ask + slip if direction == "BUY" else tick.bid - slip
+        self.positions.append(SimpleNamespace(
+            ticket=self._next_ticket, symbol=symbol, type=0 if direction == "BUY" else 1,
+            direction=direction, volume=lot, price_open=price, sl=sl, tp=tp,
+            time=self._now_ts(), magic=magic, profit=0.0
+        ))
+        self._next_ticket += 1
+        return True
+
+    def _close(self, position, price: float, time: int, reason: str):
+        sign = 1 if position.direction == "BUY" else -1
+        pips = sign * (price - position.price_open) / pip_size(position.symbol)
+        profit = pips * self.pip_value_per_lot * position.volume
+        commission = -self.commission_per_lot * position.volume
+        self.balance += profit + commission
+        self.positions.remove(position)
+        risk = abs(position.price_open - position.sl) if position.sl else 0
+        self.deals.append(SimpleNamespace(
+            ticket=position.ticket, symbol=position.symbol, direction=position.direction,
+            volume=position.volume, entry_time=position.time, time=time,
+            price_open=position.price_open, price_close=price, sl=position.sl, tp=position.tp,
+            profit=profit, commission=commission, swap=0.0, reason=reason,
+            r_multiple=sign * (price - position.price_open) / risk if risk else 0.0
+        ))
+
+    def on_bar(self, symbol: str, index: int):
+        """Check open positions of a symbol against M15 bar `index`; SL wins if both levels are touched"""
+        open_positions = [p for p in self.positions if p.symbol == symbol]
+        if not open_positions:
+            return
+        series = self.bars[(symbol, "M15")]
+        high, low = series["high"][index], series["low"][index]
+        time = int(series["close_time"][index])
+        spread = self.spread_pips * pip_size(symbol)
+        slip = self.slippage_pips * pip_size(symbol)
+        for position in open_positions:
+            if position.time >= time:
+                continue
+            if position.direction == "BUY":
+                # Long positions exit on the bid; bar prices are bids
+                if position.sl and low <= position.sl:
+                    self._close(position, position.sl - slip, time, "sl")
+                elif position.tp and high >= position.tp:
+                    self._close(position, position.tp, time, "tp")
+            else:
+                # Short positions exit on the ask
+                if position.sl and high + spread >= position.sl:
+                    self._close(position, position.sl + slip, time, "sl")
+                elif position.tp and low + spread <= position.tp:
+                    self._close(position, position.tp, time, "tp")
+
+    def close_all(self, reason: str = "end"):
+        for position in list(self.positions):
+            tick = self.symbol_info_tick(position.symbol)
+            price = tick.bid if position.direction == "BUY" else tick.ask
+            self._close(position, price, self._now_ts(), reason)
@@ -0,0 +1,171 @@
+"""
+Event-driven backtest engine.
+
+Replays stored M15 bars for every symbol in time order. On each bar close the
+simulated clock is advanced, the SimulatedBroker checks open positions for
+SL/TP touches and - for bars that can produce a signal - the live
+run_all_strategies path runs unchanged against the simulated broker, so gates,
+risk limits, confluence scoring and position sizing all behave as in production.
+
+Running the full strategy on every bar is slow (four indicator frames per call),
+so by default bars are pre-screened with the vectorized MTF confluence rules:
+only bars inside trading sessions that pass the M15 S/R and volatility filters
+and come within `slack` points of the entry threshold are replayed. The slack
+covers EMA warm-up differences between full-history and 250-bar indicators.
+Pass prefilter=False for an exhaustive replay. Strategy evaluations happen at
+the scheduler cadence (every 30 minutes by default); SL/TP checks run on every bar.
+
+run_parallel() splits symbols across a process pool, one independent account
+per symbol - portfolio-wide limits (max open trades) are then per symbol.
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Any
+import numpy as np
+import pandas as pd
+from app.backtest.broker import SimulatedBroker
+from app.core.clock import SimulatedClock, get_clock, set_clock
+from app.core.logger import setup_logger
+from app.data.broker import get_broker, set_broker
+
+logger = setup_logger("Backtest")
+
+
+def candidate_mask(mtf_data: Dict[str, pd.DataFrame], slack: float = 3) -> np.ndarray:
+    """M15 bars where the MTF confluence strategy could plausibly fire"""
+    from app.backtest.optimizer import session_mask
+    from app.strategies.rule_specs import get_compiled_strategy, prepare_frames
+
+    compiled = get_compiled_strategy("mtf_confluence")
+    frames = prepare_frames("mtf_confluence", mtf_data)
+    result = compiled.score(compiled.build_inputs(frames))
+    # Gates 0 and 1 are the M15 S/R and volatility filters (rolling-window based, exact)
+    m15_filters_ok = ~np.isin(result["failed_gate"], [0, 1])
+    near_threshold = np.maximum(result["score_buy"], result["score_sell"]) >= compiled.threshold - slack
+    close_times = frames["M15"]['time'] + pd.Timedelta(minutes=15)
+    return m15_filters_ok & near_threshold & session_mask(close_times)
+
+
+class BacktestEngine:
+    def __init__(self, history: Dict[str, Dict[str, pd.DataFrame]], start: datetime = None,
+                 end: datetime = None, prefilter: bool = True, slack: float = 3,
+                 cadence_minutes: int = 30, **broker_kwargs):
+        """
+        Args:
+            history: {symbol: {"D1"|"H4"|"H1"|"M15": DataFrame}}, including warm-up bars before start
+            start/end: UTC bounds of the replayed period (defaults to the whole history)
+            prefilter: only replay bars passing candidate_mask()
+            cadence_minutes: evaluate strategies on bar closes that are multiples of this
+            broker_kwargs: forwarded to SimulatedBroker (balance, spread_pips, slippage_pips, ...)
+        """
+        self.history = history
+        self.symbols = list(history)
+        self.start = start
+        self.end = end
+        self.prefilter = prefilter
+        self.slack = slack
+        self.cadence = cadence_minutes * 60
+        self.clock = SimulatedClock()
+        self.broker = SimulatedBroker(history, clock=self.clock, **broker_kwargs)
+
+    def _timeline(self):
+        """(close_time, symbol index, bar index) for every M15 bar, sorted by close time"""
+        times, symbol_ids, bar_ids = [], [], []
+        for s, symbol in enumerate(self.symbols):
+            close_time = self.broker.bars[(symbol, "M15")]["close_time"]
+            times.append(close_time)
+            symbol_ids.append(np.full(len(close_time), s))
+            bar_ids.append(np.arange(len(close_time)))
+        times = np.concatenate(times)
+        order = np.argsort(times, kind="stable")
+        return times[order], np.concatenate(symbol_ids)[order], np.concatenate(bar_ids)[order]
+
+    def run(self) -> Dict[str, Any]:
+        from app.signals.signal_engine import run_all_strategies
+
+        started = time.perf_counter()
+        if self.prefilter:
+            candidates = [candidate_mask(self.history[s], self.slack) for s in self.symbols]
+        else:
+            candidates = [np.ones(len(self.history[s]["M15"]), dtype=bool) for s in self.symbols]
+
+        times, symbol_ids, bar_ids = self._timeline()
+        start_ts = int(pd.Timestamp(self.start).timestamp()) if self.start else times[0]
+        end_ts = int(pd.Timestamp(self.end).timestamp()) if self.end else times[-1]
+        in_range = (times >= start_ts) & (times <= end_ts)
+        times, symbol_ids, bar_ids = times[in_range], symbol_ids[in_range], bar_ids[in_range]
+
+        previous_clock, previous_broker = get_clock(), get_broker()
+        set_clock(self.clock)
+        set_broker(self.broker)
+        evaluations = 0
+        signals: List[dict] = []
+        try:
+            for ts, s, i in zip(times.tolist(), symbol_ids.tolist(), bar_ids.tolist()):
+                symbol = self.symbols[s]
+                self.broker.on_bar(symbol, i)
+                if ts % self.cadence or not candidates[s][i]:
+                    continue
+                self.clock.set(datetime.utcfromtimestamp(ts))
+                evaluations += 1
+                for sig in run_all_strategies(None, symbol, "MTF", notify=False, persist=False):
+                    signals.append({**sig, "time": ts})
+            if len(times):
+                self.clock.set(datetime.utcfromtimestamp(int(times[-1])))
+                self.broker.close_all()
+        finally:
+            set_clock(previous_clock)
+            set_broker(previous_broker)
+
+        elapsed = time.perf_counter() - started
+        result = summarize_backtest(self.broker, signals, evaluations, len(times), elapsed)
+        logger.info(f"📊 Backtest: {len(times)} bars, {evaluations} evaluations, "
+                    f"{result['stats']['trades']} trades in {elapsed:.1f}s")
+        return result
+
+
+def summarize_backtest(broker: SimulatedBroker, signals: List[dict], evaluations: int,
+                       bars: int, elapsed: float) -> Dict[str, Any]:
+    trades = pd.DataFrame([vars(d) for d in broker.deals])
+    stats = {"trades": len(trades), "bars": bars, "evaluations": evaluations,
+             "signals": len(signals), "runtime_sec": elapsed, "final_balance": broker.balance}
+    if len(trades):
+        net = trades['profit'] + trades['commission']
+        equity = broker.balance - net.sum() + net.cumsum()
+        peak = np.maximum.accumulate(np.r_[broker.balance - net.sum(), equity.to_numpy()])[1:]
+        stats.update({
+            "win_rate": float((net > 0).mean()),
+            "net_profit": float(net.sum()),
+            "expectancy_r": float(trades['r_multiple'].mean()),
+            "max_drawdown_pct": float(((peak - equity) / peak).max() * 100),
+        })
+    return {"stats": stats, "trades": trades, "signals": pd.DataFrame(signals)}
+
+
+def _run_symbol(args):
+    history, kwargs = args
+    return BacktestEngine(history, **kwargs).run()
+
+
+def run_parallel(history: Dict[str, Dict[str, pd.DataFrame]], workers: int = None, **kwargs) -> Dict[str, Any]:
+    """Backtest each symbol in its own process and account, then merge trades and signals"""
+    jobs = [({symbol: frames}, kwargs) for symbol, frames in history.items()]
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_run_symbol, jobs))
+
+    trades = pd.concat([r["trades"] for r in results], ignore_index=True)
+    if len(trades):
+        trades = trades.sort_values("time").reset_index(drop=True)
+    signals = pd.concat([r["signals"] for r in results], ignore_index=True)
+    stats = {
+        "symbols": len(results),
+        "trades": len(trades),
+        "bars": sum(r["stats"]["bars"] for r in results),
+        "evaluations": sum(r["stats"]["evaluations"] for r in results),
+        "runtime_sec": time.perf_counter() - started,
+        "net_profit": float((trades['profit'] + trades['commission']).sum()) if len(trades) else 0.0,
+        "expectancy_r": float(trades['r_multiple'].mean()) if len(trades) else 0.0,
+    }
+    return {"stats": stats, "trades": trades, "signals": signals, "per_symbol": [r["stats"] for r in results]}
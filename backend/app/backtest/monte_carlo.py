@@ -0,0 +1,199 @@
+"""
+Monte Carlo and bootstrap robustness statistics for strategy results.
+
+Trade sequences (R-multiples) are resampled in batched (simulations x trades)
+arrays - with replacement ("bootstrap") or as permutations ("shuffle") - and
+replayed through the live position sizing: calculate_lot_size on the running
+balance, capped by ProfessionalRiskManager.max_risk_per_trade, with trading
+halted for the rest of a day once max_daily_loss is hit. Simulation batches run
+across a process pool.
+
+Also reports bootstrap confidence intervals on win rate and expectancy per
+get_confidence() tier (50/60/70/80) of the MTF confluence strategy.
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Optional
+import numpy as np
+import pandas as pd
+from app.core.logger import setup_logger
+from app.utils.risk_utils import ProfessionalRiskManager
+
+logger = setup_logger("MonteCarlo")
+
+CONFIDENCE_TIERS = [50, 60, 70, 80]
+DEFAULT_SL_PIPS = 20.0
+
+
+def lot_sizes(balance: np.ndarray, risk_percent: float, sl_pips: np.ndarray, pip_value: float = 10) -> np.ndarray:
+    """Vectorized calculate_lot_size: risk-based lot, clamped to [0.01, 5.0] and rounded to 0.01"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        lot = balance * (risk_percent / 100) / (sl_pips * pip_value)
+    return np.round(np.clip(np.nan_to_num(lot, nan=0.01), 0.01, 5.0), 2)
+
+
+def simulate_paths(r: np.ndarray, sl_pips: np.ndarray, day: Optional[np.ndarray], start_balance: float,
+                   risk_percent: float, max_daily_loss: float, ruin_balance: float,
+                   pip_value: float = 10) -> Dict[str, np.ndarray]:
+    """
+    Replay (sims x trades) R-multiples with compounding position sizing.
+    `day` labels each trade slot; the daily loss limit resets when it changes.
+    Returns per-simulation final balance, max drawdown %, lowest balance and ruin flag.
+    """
+    n_sims, n_trades = r.shape
+    balance = np.full(n_sims, float(start_balance))
+    peak = balance.copy()
+    max_dd = np.zeros(n_sims)
+    lowest = balance.copy()
+    day_start = balance.copy()
+    halted = np.zeros(n_sims, dtype=bool)
+    ruined = np.zeros(n_sims, dtype=bool)
+
+    for j in range(n_trades):
+        if day is not None and j > 0 and day[j] != day[j - 1]:
+            day_start = balance.copy()
+            halted[:] = False
+        lot = lot_sizes(balance, risk_percent, sl_pips[:, j], pip_value)
+        pnl = r[:, j] * lot * sl_pips[:, j] * pip_value
+        balance = balance + np.where(halted | ruined, 0.0, pnl)
+
+        peak = np.maximum(peak, balance)
+        max_dd = np.maximum(max_dd, (peak - balance) / peak)
+        lowest = np.minimum(lowest, balance)
+        ruined |= balance <= ruin_balance
+        if day is not None:
+            halted |= (balance - day_start) / day_start <= -max_daily_loss
+
+    return {"final_balance": balance, "max_drawdown_pct": max_dd * 100,
+            "lowest_balance": lowest, "ruined": ruined}
+
+
+# Trade data shared with pool workers
+_data = {}
+
+
+def _init_worker(data: Dict[str, Any]):
+    _data.update(data)
+
+
+def _simulate_batch(args) -> Dict[str, np.ndarray]:
+    seed, n_sims, mode = args
+    rng = np.random.default_rng(seed)
+    r, sl_pips = _data["r"], _data["sl_pips"]
+    n = len(r)
+    if mode == "bootstrap":
+        picks = rng.integers(0, n, size=(n_sims, n))
+    else:
+        picks = rng.permuted(np.broadcast_to(np.arange(n), (n_sims, n)), axis=1)
+    return simulate_paths(r[picks], sl_pips[picks], _data["day"], _data["start_balance"],
+                          _data["risk_percent"], _data["max_daily_loss"], _data["ruin_balance"])
+
+
+def _trade_arrays(trades: pd.DataFrame):
+    r = trades['r_multiple'].to_numpy(float)
+    if 'sl_pips' in trades:
+        sl_pips = trades['sl_pips'].to_numpy(float)
+    elif {'entry', 'stop_loss'} <= set(trades.columns):
+        # Same pip conversion as run_all_strategies
+        sl_pips = (trades['entry'] - trades['stop_loss']).abs().to_numpy(float) * 10000
+    else:
+        sl_pips = np.full(len(r), DEFAULT_SL_PIPS)
+    day = None
+    for column in ('timestamp', 'time', 'created_at'):
+        if column in trades:
+            times = trades[column]
+            if pd.api.types.is_numeric_dtype(times):
+                times = pd.to_datetime(times, unit='s')
+            day = pd.to_datetime(times).dt.floor('D').to_numpy().astype(np.int64)
+            break
+    return r, sl_pips, day
+
+
+def run_monte_carlo(trades: pd.DataFrame, n_sims: int = 10000, mode: str = "bootstrap",
+                    start_balance: float = 10000.0, risk_percent: float = 1.0,
+                    ruin_fraction: float = 0.5, risk_manager: ProfessionalRiskManager = None,
+                    workers: int = None, batch_size: int = 1000, seed: int = 42) -> Dict[str, Any]:
+    """
+    Args:
+        trades: one row per trade in time order with r_multiple and optionally sl_pips
+            (or entry/stop_loss) and a timestamp for the daily loss limit
+        mode: "bootstrap" (resample with replacement) or "shuffle" (reorder)
+        ruin_fraction: balance fraction at or below which a path counts as ruined
+    """
+    if mode not in ("bootstrap", "shuffle"):
+        raise ValueError("mode must be 'bootstrap' or 'shuffle'")
+    risk_manager = risk_manager or ProfessionalRiskManager()
+    r, sl_pips, day = _trade_arrays(trades)
+    if len(r) == 0:
+        return {"trades": 0, "simulations": 0}
+
+    data = {
+        "r": r, "sl_pips": sl_pips, "day": day,
+        "start_balance": start_balance,
+        "risk_percent": min(risk_percent, risk_manager.max_risk_per_trade * 100),
+        "max_daily_loss": risk_manager.max_daily_loss,
+        "ruin_balance": start_balance * ruin_fraction,
+    }
+    seeds = np.random.SeedSequence(seed).spawn((n_sims + batch_size - 1) // batch_size)
+    batches = [(s, min(batch_size, n_sims - i * batch_size), mode) for i, s in enumerate(seeds)]
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(data,)) as pool:
+        parts = list(pool.map(_simulate_batch, batches))
+    paths = {key: np.concatenate([p[key] for p in parts]) for key in parts[0]}
+
+    percentiles = [5, 25, 50, 75, 95]
+    result = {
+        "trades": len(r),
+        "simulations": n_sims,
+        "mode": mode,
+        "risk_of_ruin": float(paths["ruined"].mean()),
+        "max_drawdown_pct": dict(zip(percentiles, np.percentile(paths["max_drawdown_pct"], percentiles).tolist())),
+        "final_balance": dict(zip(percentiles, np.percentile(paths["final_balance"], percentiles).tolist())),
+        "prob_loss": float((paths["final_balance"] < start_balance).mean()),
+        "runtime_sec": time.perf_counter() - started,
+    }
+    logger.info(f"Monte Carlo ({mode}): {n_sims} paths x {len(r)} trades in {result['runtime_sec']:.2f}s, "
+                f"risk of ruin {result['risk_of_ruin']:.2%}, median max DD {result['max_drawdown_pct'][50]:.1f}%")
+    return result
+
+
+def confidence_band_stats(trades: pd.DataFrame, n_boot: int = 5000, ci: float = 95,
+                          seed: int = 42) -> pd.DataFrame:
+    """Bootstrap CIs on win rate and expectancy for each confidence tier"""
+    rng = np.random.default_rng(seed)
+    tiers = np.array(CONFIDENCE_TIERS)
+    band_index = np.digitize(trades['confidence'].to_numpy(float), tiers) - 1
+    r = trades['r_multiple'].to_numpy(float)
+    lo_q, hi_q = (100 - ci) / 2, 100 - (100 - ci) / 2
+
+    rows = []
+    for i, tier in enumerate(tiers):
+        band_r = r[band_index == i]
+        if len(band_r) == 0:
+            continue
+        samples = band_r[rng.integers(0, len(band_r), size=(n_boot, len(band_r)))]
+        win_rates = (samples > 0).mean(axis=1)
+        expectancy = samples.mean(axis=1)
+        rows.append({
+            "confidence": int(tier),
+            "trades": len(band_r),
+            "win_rate": float((band_r > 0).mean()),
+            "win_rate_low": float(np.percentile(win_rates, lo_q)),
+            "win_rate_high": float(np.percentile(win_rates, hi_q)),
+            "expectancy": float(band_r.mean()),
+            "expectancy_low": float(np.percentile(expectancy, lo_q)),
+            "expectancy_high": float(np.percentile(expectancy, hi_q)),
+        })
+    return pd.DataFrame(rows)
+
+
+def analyze_results(trades: pd.DataFrame, n_sims: int = 10000, **kwargs) -> Dict[str, Any]:
+    """Bootstrap and shuffle path statistics plus per-tier CIs (when trades carry confidence)"""
+    analysis = {
+        "bootstrap": run_monte_carlo(trades, n_sims=n_sims, mode="bootstrap", **kwargs),
+        "shuffle": run_monte_carlo(trades, n_sims=n_sims, mode="shuffle", **kwargs),
+    }
+    if 'confidence' in trades:
+        analysis["confidence_bands"] = confidence_band_stats(trades).to_dict("records")
+    return analysis
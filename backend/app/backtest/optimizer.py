@@ -0,0 +1,303 @@
+"""
+Parallel parameter sweep for the MTF confluence strategy.
+
+The per-timeframe conditions of detect_mtf_confluence_signal are evaluated once
+over the whole stored history (via the MTF_CONFLUENCE_RULES spec), packed into a
+single feature matrix and published through shared memory. Worker processes
+attach to that matrix and score batches of parameter sets - timeframe weights,
+accuracy threshold offset, D1 trend cutoff and SL/TP ATR multiples - resolving
+every trade with array searches. Results are ranked by expectancy, then drawdown.
+
+Usage:
+    python -m app.backtest.optimizer --data-dir data --symbols EURUSD GBPUSD --mode random --samples 10000
+"""
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, Any, List
+import numpy as np
+import pandas as pd
+from app.backtest.outcomes import resolve_outcomes
+from app.core.logger import setup_logger
+from app.strategies.rule_compiler import RuleExpression
+from app.strategies.rule_specs import get_compiled_strategy, prepare_frames
+
+logger = setup_logger("Optimizer")
+
+# Search space matching the hard-coded values in detect_mtf_confluence_signal
+DEFAULT_GRID = {
+    "w_d1": [1, 2, 3],
+    "w_h4": [2, 3, 4],
+    "w_h1": [1, 2, 3],
+    "w_m15": [0, 1, 2],
+    "accuracy_offset": [0, 1, 2],
+    "d1_cutoff": [0.0005, 0.001, 0.002],
+    "sl_atr": [1.0, 1.5, 2.0],
+    "tp_atr": [2.0, 3.0, 4.0],
+}
+
+# Row layout of the shared feature matrix
+FEATURES = [
+    "buy_d1", "buy_h4", "buy_h1", "buy_m15",
+    "sell_d1", "sell_h4", "sell_h1", "sell_m15",
+    "accuracy", "tradable", "d1_strength",
+    "close", "high", "low", "atr",
+]
+ROW = {name: i for i, name in enumerate(FEATURES)}
+
+MAX_HOLD_BARS = 96      # 24h on M15 before a trade is closed at market
+COOLDOWN_BARS = 4       # Same 1-hour duplicate window as signal_exists
+MIN_TRADES = 30         # Parameter sets with fewer trades are ranked last
+
+
+def load_csv_history(data_dir: str, symbol: str) -> Dict[str, pd.DataFrame]:
+    """Read <data_dir>/<SYMBOL>_<TF>.csv files (time, open, high, low, close) for all timeframes"""
+    mtf_data = {}
+    for tf in ["D1", "H4", "H1", "M15"]:
+        df = pd.read_csv(os.path.join(data_dir, f"{symbol}_{tf}.csv"))
+        if pd.api.types.is_numeric_dtype(df['time']):
+            df['time'] = pd.to_datetime(df['time'], unit='s')
+        else:
+            df['time'] = pd.to_datetime(df['time'])
+        mtf_data[tf] = df.sort_values('time').reset_index(drop=True)
+    return mtf_data
+
+
+def session_mask(times: pd.Series) -> np.ndarray:
+    """Vectorize the session/news filters by evaluating each distinct weekday/hour/minute once"""
+    from app.strategies.market_filters import MarketConditionFilter
+    market_filter = MarketConditionFilter()
+    keys = times.dt.weekday * 10000 + times.dt.hour * 100 + times.dt.minute
+    allowed = {}
+    for key in np.unique(keys):
+        weekday, hour, minute = key // 10000, (key // 100) % 100, key % 100
+        # 2024-01-01 is a Monday, so day offsets map onto weekdays
+        moment = pd.Timestamp(2024, 1, 1 + int(weekday), int(hour), int(minute)).to_pydatetime()
+        allowed[key] = market_filter.is_trading_session(now=moment) and not market_filter.is_news_time(now=moment)
+    return keys.map(allowed).to_numpy(dtype=bool)
+
+
+def build_features(mtf_data: Dict[str, pd.DataFrame], use_session_filter: bool = True) -> np.ndarray:
+    """Evaluate every parameter-independent condition over one symbol's history"""
+    compiled = get_compiled_strategy("mtf_confluence")
+    frames = prepare_frames("mtf_confluence", mtf_data)
+    inputs = compiled.build_inputs(frames)
+    m15 = frames["M15"]
+
+    strength = RuleExpression("abs(D1.ema_20 - D1.ema_50) / D1.close", compiled.timeframes, "M15")
+    safe_zone, volatility_ok = compiled.require[0], compiled.require[1]
+    tradable = (np.nan_to_num(safe_zone(inputs)) != 0) & (np.nan_to_num(volatility_ok(inputs)) != 0)
+    if use_session_filter:
+        tradable &= session_mask(m15['time'])
+
+    features = np.empty((len(FEATURES), len(m15)))
+    for i, (expr, _) in enumerate(compiled.buy):
+        features[i] = np.nan_to_num(expr(inputs).astype(float))
+    for i, (expr, _) in enumerate(compiled.sell):
+        features[4 + i] = np.nan_to_num(expr(inputs).astype(float))
+    features[ROW["accuracy"]] = np.nan_to_num(compiled.bonus[0][0](inputs))
+    features[ROW["tradable"]] = tradable
+    features[ROW["d1_strength"]] = np.nan_to_num(strength(inputs))
+    for column in ("close", "high", "low", "atr"):
+        features[ROW[column]] = m15[column].to_numpy(dtype=float)
+    return features
+
+
+def stack_symbols(per_symbol: List[np.ndarray], pad: int = MAX_HOLD_BARS) -> np.ndarray:
+    """
+    Concatenate symbols along the bar axis. Each symbol is followed by `pad` flat
+    bars at its last close, so forward windows never read into the next symbol.
+    """
+    blocks = []
+    for features in per_symbol:
+        padding = np.zeros((features.shape[0], pad))
+        for column in ("close", "high", "low"):
+            padding[ROW[column]] = features[ROW["close"], -1]
+        padding[ROW["atr"]] = features[ROW["atr"], -1]
+        blocks.extend([features, padding])
+    return np.ascontiguousarray(np.concatenate(blocks, axis=1))
+
+
+def grid_params(grid: Dict[str, list] = None) -> List[Dict[str, float]]:
+    grid = grid or DEFAULT_GRID
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def random_params(samples: int, grid: Dict[str, list] = None, seed: int = 42) -> List[Dict[str, float]]:
+    """Sample parameter sets; list entries are choices, (low, high) tuples are uniform ranges"""
+    grid = grid or DEFAULT_GRID
+    rng = np.random.default_rng(seed)
+    params = []
+    for _ in range(samples):
+        sample = {}
+        for key, space in grid.items():
+            if isinstance(space, tuple):
+                sample[key] = float(rng.uniform(space[0], space[1]))
+            else:
+                sample[key] = space[int(rng.integers(len(space)))]
+        params.append(sample)
+    return params
+
+
+def signal_directions(features: np.ndarray, params: Dict[str, float]) -> np.ndarray:
+    """Vectorized equivalent of the detect_mtf_confluence_signal scoring for one parameter set"""
+    weights = np.array([params["w_d1"], params["w_h4"], params["w_h1"], params["w_m15"]], dtype=float)
+    accuracy = features[ROW["accuracy"]]
+    score_buy = weights @ features[0:4] + accuracy
+    score_sell = weights @ features[4:8] + accuracy
+
+    max_score = weights.sum() + 2
+    threshold = weights.sum() * 0.5 + params["accuracy_offset"]
+    buy_ok = score_buy >= threshold
+    sell_ok = score_sell >= threshold
+    # get_confidence() returns 0 below 50% of max_score
+    allowed = (features[ROW["tradable"]] != 0) & (features[ROW["d1_strength"]] > params["d1_cutoff"])
+
+    direction = np.zeros(features.shape[1], dtype=np.int8)
+    direction[allowed & buy_ok & ~sell_ok & (score_buy >= 0.5 * max_score)] = 1
+    direction[allowed & sell_ok & ~buy_ok & (score_sell >= 0.5 * max_score)] = -1
+    return direction
+
+
+def first_signals(direction: np.ndarray, cooldown: int = COOLDOWN_BARS) -> np.ndarray:
+    """Indices of signals not preceded by a same-direction signal within the cooldown"""
+    index = np.flatnonzero(direction)
+    if len(index) == 0:
+        return index
+    side = direction[index]
+    keep = np.ones(len(index), dtype=bool)
+    keep[1:] = (np.diff(index) > cooldown) | (side[1:] != side[:-1])
+    return index[keep]
+
+
+def resolve_r_multiples(features: np.ndarray, index: np.ndarray, direction: np.ndarray,
+                        sl_atr: float, tp_atr: float, max_bars: int = MAX_HOLD_BARS) -> np.ndarray:
+    """R-multiple of each trade: first SL/TP touch in the next max_bars bars, SL wins same-bar ties"""
+    close, high, low, atr = (features[ROW[c]] for c in ("close", "high", "low", "atr"))
+    valid = (index + max_bars < len(close)) & (atr[index] > 0)
+    index, direction = index[valid], direction[valid].astype(float)
+    if len(index) == 0:
+        return np.empty(0)
+
+    entry = close[index]
+    stop_loss = entry - direction * sl_atr * atr[index]
+    take_profit = entry + direction * tp_atr * atr[index]
+    resolved = resolve_outcomes(high, low, close, index, direction, entry, stop_loss, take_profit,
+                                max_bars=max_bars, excursions=False)
+    return resolved["r_multiple"]
+
+
+def summarize(r: np.ndarray) -> Dict[str, float]:
+    if len(r) == 0:
+        return {"trades": 0, "win_rate": 0.0, "expectancy": 0.0, "total_r": 0.0,
+                "max_drawdown": 0.0, "profit_factor": 0.0}
+    equity = np.cumsum(r)
+    drawdown = np.maximum.accumulate(np.maximum(equity, 0)) - equity
+    gains, losses = r[r > 0].sum(), -r[r < 0].sum()
+    return {
+        "trades": int(len(r)),
+        "win_rate": float((r > 0).mean()),
+        "expectancy": float(r.mean()),
+        "total_r": float(equity[-1]),
+        "max_drawdown": float(drawdown.max()),
+        "profit_factor": float(gains / losses) if losses > 0 else float("inf"),
+    }
+
+
+def trade_returns(features: np.ndarray, params: Dict[str, float]) -> np.ndarray:
+    """R-multiples of the trades one parameter set takes, in time order"""
+    direction = signal_directions(features, params)
+    index = first_signals(direction)
+    return resolve_r_multiples(features, index, direction[index], params["sl_atr"], params["tp_atr"])
+
+
+def evaluate_params(features: np.ndarray, params: Dict[str, float]) -> Dict[str, Any]:
+    return {**params, **summarize(trade_returns(features, params))}
+
+
+# Worker-side view of the shared feature matrix
+_shared = {}
+
+
+def _attach_features(name: str, shape: tuple, dtype: str):
+    shm = shared_memory.SharedMemory(name=name)
+    _shared["shm"] = shm  # keep the mapping alive for the worker's lifetime
+    _shared["features"] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _evaluate_batch(batch: List[Dict[str, float]]) -> List[Dict[str, Any]]:
+    features = _shared["features"]
+    return [evaluate_params(features, params) for params in batch]
+
+
+def rank_results(results: List[Dict[str, Any]], min_trades: int = MIN_TRADES) -> pd.DataFrame:
+    """Best expectancy first; ties broken by the shallower drawdown"""
+    df = pd.DataFrame(results)
+    df["eligible"] = df["trades"] >= min_trades
+    return df.sort_values(["eligible", "expectancy", "max_drawdown"],
+                          ascending=[False, False, True]).reset_index(drop=True)
+
+
+def run_sweep(features: np.ndarray, param_sets: List[Dict[str, float]],
+              workers: int = None, batch_size: int = None) -> pd.DataFrame:
+    """Score every parameter set across a process pool sharing one feature matrix"""
+    workers = workers or os.cpu_count() or 1
+    batch_size = batch_size or max(1, len(param_sets) // (workers * 8))
+    batches = [param_sets[i:i + batch_size] for i in range(0, len(param_sets), batch_size)]
+
+    start = time.perf_counter()
+    shm = shared_memory.SharedMemory(create=True, size=features.nbytes)
+    try:
+        np.ndarray(features.shape, dtype=features.dtype, buffer=shm.buf)[:] = features
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach_features,
+                                 initargs=(shm.name, features.shape, features.dtype.str)) as pool:
+            results = [row for rows in pool.map(_evaluate_batch, batches) for row in rows]
+    finally:
+        shm.close()
+        shm.unlink()
+
+    logger.info(f"Swept {len(param_sets)} parameter sets on {features.shape[1]} bars "
+                f"with {workers} workers in {time.perf_counter() - start:.1f}s")
+    return rank_results(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MTF confluence parameter sweep")
+    parser.add_argument("--data-dir", required=True)
+    parser.add_argument("--symbols", nargs="+", required=True)
+    parser.add_argument("--mode", choices=["grid", "random"], default="grid")
+    parser.add_argument("--samples", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--no-session-filter", action="store_true")
+    parser.add_argument("--out", default="optimizer_results.csv")
+    parser.add_argument("--monte-carlo", type=int, default=0, metavar="SIMS",
+                        help="Resample the best parameter set's trades SIMS times")
+    args = parser.parse_args()
+
+    per_symbol = []
+    for symbol in args.symbols:
+        per_symbol.append(build_features(load_csv_history(args.data_dir, symbol),
+                                         use_session_filter=not args.no_session_filter))
+        logger.info(f"Precomputed features for {symbol}")
+    features = stack_symbols(per_symbol)
+
+    param_sets = grid_params() if args.mode == "grid" else random_params(args.samples)
+    ranked = run_sweep(features, param_sets, workers=args.workers)
+    ranked.to_csv(args.out, index=False)
+    logger.info(f"Top parameter sets:\n{ranked.head(10).to_string()}")
+
+    if args.monte_carlo:
+        from app.backtest.monte_carlo import analyze_results
+        best = ranked.iloc[0].to_dict()
+        trades = pd.DataFrame({"r_multiple": trade_returns(features, best)})
+        analysis = analyze_results(trades, n_sims=args.monte_carlo, workers=args.workers)
+        for mode in ("bootstrap", "shuffle"):
+            logger.info(f"{mode}: {analysis[mode]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+Vectorized SL/TP outcome resolution for batches of signals.
+
+For each trade the forward bars are gathered into a (trades x max_bars) block
+and the first SL and TP touches are found with argmax over boolean masks - no
+per-bar Python loop. Trades are processed in chunks to bound memory, so
+hundreds of thousands of historical signals resolve in seconds.
+
+Outcome codes: TP=1, SL=-1, EXPIRED=0 (max_bars elapsed, closed at market),
+OPEN=2 (history ends before the trade resolves; marked to the last close).
+
+resolve_open_trades is the scheduled job that settles live trades: it fetches
+bars for every symbol with trades still 'unknown' and stores their outcomes
+(and the analytics aggregates) through resolve_trade_performance.
+"""
+import calendar
+from datetime import datetime
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+from app.core.clock import utcnow
+from app.core.config import settings
+from app.core.constants import TIMEFRAME_MINUTES
+from app.core.logger import setup_logger
+from app.core.metrics import metrics
+from app.database.analytics import mirror_outcomes, outcome_rows, record_outcomes
+from app.database.storage import Storage, get_storage
+
+logger = setup_logger("Outcomes")
+
+TP, SL, EXPIRED, OPEN = 1, -1, 0, 2
+OUTCOME_NAMES = {TP: "tp", SL: "sl", EXPIRED: "expired", OPEN: "open"}
+
+# How to settle bars whose range touches both SL and TP
+AMBIGUITY_RULES = ("sl_first", "tp_first", "nearest_open")
+
+# Most bars resolve_open_trades fetches per symbol; older trades can't be settled
+MAX_FETCH_BARS = 10000
+
+
+def _epoch_seconds(times: pd.Series) -> np.ndarray:
+    """Epoch seconds from a time column of epoch numbers (fetch_ohlcv bars), datetimes or ISO strings"""
+    if pd.api.types.is_numeric_dtype(times):
+        times = pd.to_datetime(times, unit='s')
+    return pd.to_datetime(times).to_numpy(dtype="datetime64[s]").astype(np.int64)
+
+
+def resolve_outcomes(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                     bar_index: np.ndarray, direction: np.ndarray, entry: np.ndarray,
+                     stop_loss: np.ndarray, take_profit: np.ndarray,
+                     max_bars=96, ambiguity: str = "sl_first",
+                     open_: np.ndarray = None, time: np.ndarray = None,
+                     excursions: bool = True, chunk_size: int = 50000) -> Dict[str, np.ndarray]:
+    """
+    Resolve trades entered at the close of bar_index against the following bars.
+
+    Args:
+        high/low/close/open_/time: one symbol's bar arrays (time in epoch seconds)
+        direction: +1 for BUY, -1 for SELL
+        max_bars: holding limit in bars, scalar or per trade
+        ambiguity: same-bar SL+TP rule; "nearest_open" picks the level closer to the bar open
+        excursions: also compute MAE/MFE (skip for a faster R-only pass)
+    Returns:
+        dict of per-trade arrays: outcome, exit_index, exit_price, r_multiple, bars_held,
+        holding_seconds (when time is given), mae_r / mfe_r (when excursions=True)
+    """
+    if ambiguity not in AMBIGUITY_RULES:
+        raise ValueError(f"ambiguity must be one of {AMBIGUITY_RULES}")
+    if ambiguity == "nearest_open" and open_ is None:
+        raise ValueError("nearest_open ambiguity rule needs open prices")
+
+    bar_index = np.asarray(bar_index, dtype=np.int64)
+    direction = np.asarray(direction, dtype=float)
+    entry, stop_loss, take_profit = (np.asarray(a, dtype=float) for a in (entry, stop_loss, take_profit))
+    max_bars = np.broadcast_to(np.asarray(max_bars, dtype=np.int64), bar_index.shape)
+    n_trades, n_bars = len(bar_index), len(close)
+
+    out = {
+        "outcome": np.empty(n_trades, dtype=np.int8),
+        "exit_index": np.empty(n_trades, dtype=np.int64),
+        "exit_price": np.empty(n_trades),
+        "r_multiple": np.empty(n_trades),
+        "bars_held": np.empty(n_trades, dtype=np.int64),
+    }
+    if excursions:
+        out["mae_r"] = np.empty(n_trades)
+        out["mfe_r"] = np.empty(n_trades)
+
+    for lo in range(0, n_trades, chunk_size):
+        sl_ = slice(lo, lo + chunk_size)
+        idx, side, limit = bar_index[sl_], direction[sl_], max_bars[sl_]
+        entry_c, sl_c, tp_c = entry[sl_], stop_loss[sl_], take_profit[sl_]
+        horizon = max(int(limit.max()), 1) if len(limit) else 1
+
+        offsets = np.arange(1, horizon + 1)
+        forward = idx[:, None] + offsets
+        in_window = (forward < n_bars) & (offsets <= limit[:, None])
+        forward = np.minimum(forward, n_bars - 1)
+        highs, lows = high[forward], low[forward]
+
+        is_buy = (side > 0)[:, None]
+        sl_hit = np.where(is_buy, lows <= sl_c[:, None], highs >= sl_c[:, None]) & in_window
+        tp_hit = np.where(is_buy, highs >= tp_c[:, None], lows <= tp_c[:, None]) & in_window
+
+        never = horizon
+        sl_bar = np.where(sl_hit.any(axis=1), sl_hit.argmax(axis=1), never)
+        tp_bar = np.where(tp_hit.any(axis=1), tp_hit.argmax(axis=1), never)
+
+        both = (sl_bar == tp_bar) & (sl_bar < never)
+        sl_wins = sl_bar < tp_bar
+        if ambiguity == "sl_first":
+            sl_wins |= both
+        elif ambiguity == "nearest_open":
+            bar_open = open_[np.minimum(idx + sl_bar.clip(max=horizon - 1) + 1, n_bars - 1)]
+            sl_wins |= both & (np.abs(bar_open - sl_c) <= np.abs(bar_open - tp_c))
+        tp_wins = (tp_bar < never) & ~sl_wins
+
+        # Last bar the trade can see: window end, or the end of history
+        window_end = np.minimum(idx + limit, n_bars - 1)
+        truncated = idx + limit > n_bars - 1
+        outcome = np.where(sl_wins, SL, np.where(tp_wins, TP, np.where(truncated, OPEN, EXPIRED)))
+        exit_offset = np.where(sl_wins, sl_bar, np.where(tp_wins, tp_bar, window_end - idx - 1))
+        exit_index = idx + exit_offset + 1
+        exit_price = np.where(sl_wins, sl_c, np.where(tp_wins, tp_c, close[window_end]))
+
+        risk = np.abs(entry_c - sl_c)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r_multiple = np.where(risk > 0, side * (exit_price - entry_c) / risk, 0.0)
+
+        out["outcome"][sl_] = outcome
+        out["exit_index"][sl_] = exit_index
+        out["exit_price"][sl_] = exit_price
+        out["r_multiple"][sl_] = r_multiple
+        out["bars_held"][sl_] = exit_offset + 1
+
+        if excursions:
+            held = in_window & (offsets[None, :] <= (exit_offset + 1)[:, None])
+            best = np.where(is_buy, highs, -lows)
+            worst = np.where(is_buy, -lows, highs)
+            signed_entry = side * entry_c
+            with np.errstate(divide="ignore", invalid="ignore"):
+                mfe = (np.where(held, best, -np.inf).max(axis=1, initial=-np.inf) - signed_entry) / risk
+                mae = (np.where(held, worst, -np.inf).max(axis=1, initial=-np.inf) + signed_entry) / risk
+            # Excursions are measured from entry, so never below zero
+            out["mfe_r"][sl_] = np.where(risk > 0, np.maximum(mfe, 0), 0.0)
+            out["mae_r"][sl_] = np.where(risk > 0, np.maximum(mae, 0), 0.0)
+
+    if time is not None:
+        time = np.asarray(time, dtype=np.int64)
+        out["holding_seconds"] = time[out["exit_index"].clip(max=n_bars - 1)] - time[bar_index]
+    return out
+
+
+def resolve_signal_history(signals: pd.DataFrame, bars_by_symbol: Dict[str, pd.DataFrame],
+                           time_column: str = "timestamp", **kwargs) -> pd.DataFrame:
+    """
+    Resolve a table of signals (symbol, direction BUY/SELL, entry, stop_loss, take_profit,
+    timestamp) against per-symbol bar frames (time, open, high, low, close). Times may be
+    epoch seconds or datetimes. Each signal is entered at the close of the last bar that
+    opened at or before its timestamp.
+    """
+    results = []
+    for symbol, group in signals.groupby("symbol", sort=False):
+        bars = bars_by_symbol.get(symbol)
+        if bars is None or group.empty:
+            continue
+        bar_time = _epoch_seconds(bars['time'])
+        signal_time = _epoch_seconds(group[time_column])
+        bar_index = np.searchsorted(bar_time, signal_time, side="right") - 1
+        usable = bar_index >= 0
+        group, bar_index = group[usable], bar_index[usable]
+
+        resolved = resolve_outcomes(
+            bars['high'].to_numpy(float), bars['low'].to_numpy(float), bars['close'].to_numpy(float),
+            bar_index, np.where(group['direction'].to_numpy() == "BUY", 1, -1),
+            group['entry'].to_numpy(float), group['stop_loss'].to_numpy(float),
+            group['take_profit'].to_numpy(float),
+            open_=bars['open'].to_numpy(float), time=bar_time, **kwargs
+        )
+        resolved = pd.DataFrame(resolved, index=group.index)
+        resolved["status"] = resolved["outcome"].map(OUTCOME_NAMES)
+        results.append(group.join(resolved))
+
+    if not results:
+        return signals.iloc[0:0]
+    return pd.concat(results).sort_index()
+
+
+def resolve_trade_performance(bars_by_symbol: Dict[str, pd.DataFrame], db_path: Optional[str] = None,
+                              **kwargs) -> pd.DataFrame:
+    """Resolve trade_performance rows still marked 'unknown' and store their tp/sl/expired status"""
+    storage = Storage(db_path) if db_path else get_storage()
+    try:
+        trades = pd.read_sql_query(
+            "SELECT id, symbol, direction, entry_price AS entry, stop_loss, take_profit, created_at, "
+            "confidence, strategy FROM trade_performance WHERE status IS NULL OR status = 'unknown'",
+            storage.connection()
+        )
+        if trades.empty:
+            return trades
+        resolved = resolve_signal_history(trades, bars_by_symbol, time_column="created_at", **kwargs)
+        final = resolved[resolved["outcome"] != OPEN]
+        rows = outcome_rows(final)
+        with storage.transaction():
+            storage.executemany("UPDATE trade_performance SET status = ?, r_multiple = ? WHERE id = ?",
+                                list(zip(final["status"], final["r_multiple"].astype(float), final["id"].astype(int))),
+                                name="resolve_trade_performance")
+            # Same transaction as the statuses
+            record_outcomes(rows, storage)
+        if not db_path:
+            # Committed; only the live database feeds the in-memory mirror
+            mirror_outcomes(rows)
+        logger.info(f"Resolved {len(final)} of {len(trades)} pending trades")
+        return resolved
+    finally:
+        if db_path:
+            storage.close()
+
+
+def resolve_open_trades(timeframe: str = None, max_bars: int = None) -> int:
+    """
+    Scheduled job: settle every trade still marked 'unknown' against fresh bars of
+    its symbol. Returns how many were settled; trades still open are retried next run.
+    """
+    from app.data.market_store import fetch_bars
+
+    timeframe = timeframe or settings.OUTCOME_TIMEFRAME
+    max_bars = max_bars or settings.OUTCOME_MAX_BARS
+    rows = get_storage().query(
+        "SELECT symbol, MIN(created_at) AS oldest FROM trade_performance "
+        "WHERE status IS NULL OR status = 'unknown' GROUP BY symbol", name="unresolved_trades"
+    )
+    if not rows:
+        return 0
+
+    now = calendar.timegm(utcnow().timetuple())
+    bar_seconds = TIMEFRAME_MINUTES[timeframe] * 60
+    bars_by_symbol = {}
+    for row in rows:
+        oldest = calendar.timegm(datetime.fromisoformat(row["oldest"]).timetuple())
+        count = min(MAX_FETCH_BARS, max(0, now - oldest) // bar_seconds + 2)
+        try:
+            bars = fetch_bars(row["symbol"], timeframe, bars=count)
+        except Exception as e:
+            logger.error(f"❌ {row['symbol']}: bars for trade outcomes unavailable - {e}")
+            continue
+        if bars:
+            bars_by_symbol[row["symbol"]] = pd.DataFrame(bars)
+
+    with metrics.timer("outcomes.resolve"):
+        resolved = resolve_trade_performance(bars_by_symbol, max_bars=max_bars)
+    settled = int((resolved["outcome"] != OPEN).sum()) if "outcome" in resolved else 0
+    metrics.incr("outcomes.settled", settled)
+    return settled
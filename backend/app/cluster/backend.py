@@ -0,0 +1,213 @@
+"""
+Queue backends for cluster mode.
+
+A backend carries everything the leader and workers share: worker
+registrations and heartbeats, named leases (leader election) and the per-scan
+task queue. QueueBackend is the interface; SQLiteQueueBackend implements it on
+a single SQLite file (WAL mode, via app.database.storage), so processes on one
+host coordinate without any external service. WAL needs shared memory, so the
+file must be on local disk: it can't be shared between hosts over a network
+filesystem - spreading across hosts takes another QueueBackend implementation.
+"""
+import json
+import time
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Optional, Tuple
+from app.database.storage import Storage
+
+PENDING, CLAIMED, DONE, FAILED = "pending", "claimed", "done", "failed"
+
+
+class QueueBackend(ABC):
+    """Interface shared by the leader and workers"""
+
+    @abstractmethod
+    def register_worker(self, worker_id: str, host: str, pid: int):
+        ...
+
+    @abstractmethod
+    def heartbeat(self, worker_id: str):
+        ...
+
+    @abstractmethod
+    def remove_worker(self, worker_id: str):
+        ...
+
+    @abstractmethod
+    def live_workers(self, ttl: float) -> List[str]:
+        ...
+
+    @abstractmethod
+    def acquire_lease(self, name: str, holder: str, ttl: float) -> bool:
+        ...
+
+    @abstractmethod
+    def release_lease(self, name: str, holder: str):
+        ...
+
+    @abstractmethod
+    def enqueue(self, scan_id: str, assignments: List[Tuple[str, str]]):
+        ...
+
+    @abstractmethod
+    def claim(self, worker_id: str, limit: int = 1) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def complete(self, worker_id: str, task_id: int, result: Optional[dict], error: Optional[str] = None):
+        ...
+
+    @abstractmethod
+    def tasks(self, scan_id: str) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def reassign(self, task_ids: List[int], worker_id: str):
+        ...
+
+    @abstractmethod
+    def fail(self, task_ids: List[int], error: str):
+        ...
+
+    @abstractmethod
+    def purge(self, older_than: float):
+        ...
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cluster_workers (
+    worker_id TEXT PRIMARY KEY,
+    host TEXT,
+    pid INTEGER,
+    started_at REAL,
+    heartbeat_at REAL
+);
+CREATE TABLE IF NOT EXISTS cluster_leases (
+    name TEXT PRIMARY KEY,
+    holder TEXT,
+    expires_at REAL
+);
+CREATE TABLE IF NOT EXISTS cluster_tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    scan_id TEXT,
+    symbol TEXT,
+    worker_id TEXT,
+    status TEXT,
+    created_at REAL,
+    claimed_at REAL,
+    finished_at REAL,
+    result TEXT,
+    error TEXT,
+    UNIQUE (scan_id, symbol)
+);
+CREATE INDEX IF NOT EXISTS idx_cluster_tasks_claim ON cluster_tasks (worker_id, status)
+"""
+
+
+def _json_default(value):
+    # numpy scalars and timestamps inside signal dicts
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+class SQLiteQueueBackend(QueueBackend):
+    def __init__(self, path: str):
+        self.storage = Storage(path, metrics_prefix="cluster_db")
+        self.storage.migrate([SCHEMA])
+
+    # --- workers -------------------------------------------------------
+
+    def register_worker(self, worker_id, host, pid):
+        now = time.time()
+        self.storage.execute("INSERT OR REPLACE INTO cluster_workers VALUES (?, ?, ?, ?, ?)",
+                             (worker_id, host, pid, now, now), name="register_worker")
+
+    def heartbeat(self, worker_id):
+        self.storage.execute("UPDATE cluster_workers SET heartbeat_at = ? WHERE worker_id = ?",
+                             (time.time(), worker_id), name="heartbeat")
+
+    def remove_worker(self, worker_id):
+        self.storage.execute("DELETE FROM cluster_workers WHERE worker_id = ?", (worker_id,), name="remove_worker")
+
+    def live_workers(self, ttl):
+        rows = self.storage.query("SELECT worker_id FROM cluster_workers WHERE heartbeat_at >= ? ORDER BY worker_id",
+                                  (time.time() - ttl,), name="live_workers")
+        return [r["worker_id"] for r in rows]
+
+    # --- leases --------------------------------------------------------
+
+    def acquire_lease(self, name, holder, ttl):
+        """Take or renew a lease; succeeds if it is free, expired, or already ours"""
+        now = time.time()
+        with self.storage.transaction() as conn:
+            row = conn.execute("SELECT holder, expires_at FROM cluster_leases WHERE name = ?", (name,)).fetchone()
+            if row is None or row["holder"] == holder or row["expires_at"] < now:
+                conn.execute("INSERT OR REPLACE INTO cluster_leases VALUES (?, ?, ?)", (name, holder, now + ttl))
+                return True
+            return False
+
+    def release_lease(self, name, holder):
+        self.storage.execute("DELETE FROM cluster_leases WHERE name = ? AND holder = ?", (name, holder),
+                             name="release_lease")
+
+    # --- tasks ---------------------------------------------------------
+
+    def enqueue(self, scan_id, assignments):
+        now = time.time()
+        with self.storage.transaction():
+            # UNIQUE (scan_id, symbol): a symbol is analyzed at most once per scan
+            self.storage.executemany(
+                "INSERT OR IGNORE INTO cluster_tasks (scan_id, symbol, worker_id, status, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(scan_id, symbol, worker_id, PENDING, now) for symbol, worker_id in assignments], name="enqueue"
+            )
+
+    def claim(self, worker_id, limit=1):
+        with self.storage.transaction() as conn:
+            rows = conn.execute(
+                "SELECT id, scan_id, symbol FROM cluster_tasks WHERE worker_id = ? AND status = ? "
+                "ORDER BY id LIMIT ?", (worker_id, PENDING, limit)
+            ).fetchall()
+            conn.executemany("UPDATE cluster_tasks SET status = ?, claimed_at = ? WHERE id = ?",
+                             [(CLAIMED, time.time(), r["id"]) for r in rows])
+            return [dict(r) for r in rows]
+
+    def complete(self, worker_id, task_id, result, error=None):
+        # Only the worker holding the claim: a task reassigned away from a slow worker keeps its new owner's result
+        self.storage.execute(
+            "UPDATE cluster_tasks SET status = ?, finished_at = ?, result = ?, error = ? "
+            "WHERE id = ? AND worker_id = ? AND status = ?",
+            (FAILED if error else DONE, time.time(),
+             json.dumps(result, default=_json_default) if result is not None else None, error,
+             task_id, worker_id, CLAIMED),
+            name="complete"
+        )
+
+    def tasks(self, scan_id):
+        rows = self.storage.query("SELECT * FROM cluster_tasks WHERE scan_id = ? ORDER BY id", (scan_id,),
+                                  name="tasks")
+        tasks = []
+        for r in rows:
+            task = dict(r)
+            task["result"] = json.loads(task["result"]) if task["result"] else None
+            tasks.append(task)
+        return tasks
+
+    def reassign(self, task_ids, worker_id):
+        with self.storage.transaction():
+            self.storage.executemany(
+                "UPDATE cluster_tasks SET worker_id = ?, status = ?, claimed_at = NULL "
+                "WHERE id = ? AND status IN (?, ?)",
+                [(worker_id, PENDING, task_id, PENDING, CLAIMED) for task_id in task_ids], name="reassign"
+            )
+
+    def fail(self, task_ids, error):
+        with self.storage.transaction():
+            self.storage.executemany(
+                "UPDATE cluster_tasks SET status = ?, error = ?, finished_at = ? WHERE id = ? AND status IN (?, ?)",
+                [(FAILED, error, time.time(), task_id, PENDING, CLAIMED) for task_id in task_ids], name="fail"
+            )
+
+    def purge(self, older_than):
+        self.storage.execute("DELETE FROM cluster_tasks WHERE created_at < ?", (older_than,), name="purge")
@@ -0,0 +1,202 @@
+"""
+Leader side of cluster mode.
+
+Every API process runs a LeaderElector. Whichever process holds the "leader"
+lease runs the scheduler and is the only one that places orders, writes
+signals and sends alerts; the others stand by and take over when the lease
+expires. So several uvicorn workers never duplicate trades: the API rejects
+order-placing requests on a standby (is_leader), and execute_signal re-checks
+the lease against the backend right before each order (confirm_leadership).
+
+For each scan the leader's ClusterCoordinator shards the pairs across the live
+workers (rendezvous hashing), enqueues one task per pair and collects the
+results. Tasks held by a worker whose heartbeat stops are moved to a live
+worker; a claimed task that runs past the per-pair timeout is failed, and the
+scan gives up when no worker is left or its overall time limit passes. Results
+come back in the same format as parallel_scan.analyze_pairs, so scan_all
+applies them through the same ordered coordinator path.
+"""
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Callable, List, Dict, Any, Optional
+from app.cluster.backend import QueueBackend, PENDING, CLAIMED, DONE, FAILED
+from app.cluster.sharding import assign_shards
+from app.core.logger import setup_logger
+from app.core.metrics import metrics
+
+logger = setup_logger("ClusterLeader")
+
+LEADER_LEASE = "leader"
+
+
+def node_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class LeaderElector(threading.Thread):
+    """Background lease holder; calls on_elected / on_lost as leadership changes"""
+
+    def __init__(self, backend: QueueBackend, ttl: float, on_elected: Callable[[], None],
+                 on_lost: Callable[[], None]):
+        super().__init__(name="leader-elector", daemon=True)
+        self.backend = backend
+        self.ttl = ttl
+        self.on_elected = on_elected
+        self.on_lost = on_lost
+        self.holder = node_id()
+        self.is_leader = False
+        self._stopping = threading.Event()
+
+    def run(self):
+        while not self._stopping.is_set():
+            try:
+                leader = self.backend.acquire_lease(LEADER_LEASE, self.holder, self.ttl)
+            except Exception as e:
+                logger.error(f"❌ Leader lease check failed: {e}")
+                leader = False
+            if leader and not self.is_leader:
+                self.is_leader = True
+                metrics.gauge("cluster.leader", 1)
+                logger.info(f"👑 {self.holder} is now the cluster leader")
+                self.on_elected()
+            elif not leader and self.is_leader:
+                self.is_leader = False
+                metrics.gauge("cluster.leader", 0)
+                logger.warning(f"⚠️ {self.holder} lost the leader lease")
+                self.on_lost()
+            # Renew well inside the TTL
+            self._stopping.wait(self.ttl / 3)
+
+    def confirm(self) -> bool:
+        """Still the leader? Checked (and the lease renewed) against the backend, not just the last renewal"""
+        if not self.is_leader:
+            return False
+        try:
+            return self.backend.acquire_lease(LEADER_LEASE, self.holder, self.ttl)
+        except Exception as e:
+            logger.error(f"❌ Leader lease check failed: {e}")
+            return False
+
+    def stop(self):
+        self._stopping.set()
+        if self.is_leader:
+            self.backend.release_lease(LEADER_LEASE, self.holder)
+            self.is_leader = False
+            self.on_lost()
+
+
+# This process's elector; None when cluster mode is off
+_elector: Optional[LeaderElector] = None
+
+
+def set_elector(elector: Optional[LeaderElector]):
+    global _elector
+    _elector = elector
+
+
+def get_elector() -> Optional[LeaderElector]:
+    return _elector
+
+
+def is_leader() -> bool:
+    """False only in cluster mode, on a process that doesn't hold the leader lease"""
+    return _elector is None or _elector.is_leader
+
+
+def confirm_leadership() -> bool:
+    """is_leader(), re-checked against the backend - call right before placing an order"""
+    return _elector is None or _elector.confirm()
+
+
+class ClusterCoordinator:
+    def __init__(self, backend: QueueBackend, worker_ttl: float, poll_interval: float = 0.2,
+                 task_retention: float = 24 * 3600):
+        self.backend = backend
+        self.worker_ttl = worker_ttl
+        self.poll_interval = poll_interval
+        self.task_retention = task_retention
+
+    def analyze_pairs(self, pairs: List[str], timeout: float, deadline: float = None) -> List[Dict[str, Any]]:
+        """
+        Run one scan's analysis on the workers; results in input order, like
+        parallel_scan.analyze_pairs (error is "timeout", "deferred", "no workers" or the worker's error).
+        """
+        scan_id = uuid.uuid4().hex
+        symbols = list(dict.fromkeys(pairs))
+        workers = self.backend.live_workers(self.worker_ttl)
+        metrics.gauge("cluster.workers", len(workers))
+        if not workers:
+            logger.error("❌ No live cluster workers - scan skipped")
+            return [{"symbol": p, "signal": None, "error": "no workers"} for p in pairs]
+
+        shards = assign_shards(symbols, workers)
+        self.backend.enqueue(scan_id, [(s, shards[s]) for s in symbols])
+        # Every worker runs its shard one pair at a time (plus one pair's worth of slack); past this the scan stops waiting
+        time_limit = time.monotonic() + timeout * (max(Counter(shards.values()).values()) + 1)
+
+        finished: Dict[str, Dict[str, Any]] = {}
+        while True:
+            tasks = self.backend.tasks(scan_id)
+            for task in tasks:
+                if task["status"] in (DONE, FAILED) and task["symbol"] not in finished:
+                    finished[task["symbol"]] = task
+            open_tasks = [t for t in tasks if t["status"] in (PENDING, CLAIMED)]
+            if not open_tasks:
+                break
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                self._give_up(open_tasks, "deferred", finished)
+                break
+            if now >= time_limit:
+                metrics.incr("cluster.scan_timeouts")
+                logger.error(f"❌ Cluster scan timed out with {len(open_tasks)} task(s) unfinished")
+                self._give_up(open_tasks, "timeout", finished)
+                break
+            if not self._supervise(open_tasks, timeout):
+                logger.error(f"❌ No live cluster workers left - {len(open_tasks)} task(s) unfinished")
+                self._give_up(open_tasks, "no workers", finished)
+                break
+            time.sleep(self.poll_interval)
+
+        results = []
+        for pair in pairs:
+            task = finished.get(pair, {})
+            results.append({"symbol": pair, "signal": task.get("result"), "error": task.get("error"),
+                            "worker": task.get("worker_id")})
+            if task.get("worker_id"):
+                metrics.incr(f"cluster.worker.{task['worker_id']}.tasks")
+
+        # Only the leader scans, so the queue is trimmed here rather than by every worker
+        try:
+            self.backend.purge(time.time() - self.task_retention)
+        except Exception as e:
+            logger.error(f"❌ Purging old cluster tasks failed: {e}")
+        return results
+
+    def _give_up(self, open_tasks: List[Dict[str, Any]], error: str, finished: Dict[str, Dict[str, Any]]):
+        self.backend.fail([t["id"] for t in open_tasks], error)
+        for t in open_tasks:
+            finished[t["symbol"]] = {**t, "error": error}
+
+    def _supervise(self, open_tasks: List[Dict[str, Any]], timeout: float) -> List[str]:
+        """Rebalance tasks of dead workers and fail claimed tasks past the per-pair timeout; returns the live workers"""
+        live = self.backend.live_workers(self.worker_ttl)
+        now = time.time()
+        overdue = [t["id"] for t in open_tasks
+                   if t["status"] == CLAIMED and t["claimed_at"] and now - t["claimed_at"] > timeout]
+        if overdue:
+            metrics.incr("scan.pair_timeouts", len(overdue))
+            self.backend.fail(overdue, "timeout")
+
+        orphaned = [t for t in open_tasks if t["worker_id"] not in live and t["id"] not in overdue]
+        if orphaned and live:
+            shards = assign_shards([t["symbol"] for t in orphaned], live)
+            for task in orphaned:
+                self.backend.reassign([task["id"]], shards[task["symbol"]])
+            metrics.incr("cluster.rebalanced_tasks", len(orphaned))
+            logger.warning(f"⚠️ Rebalanced {len(orphaned)} task(s) from dead workers onto {len(live)} live worker(s)")
+        return live
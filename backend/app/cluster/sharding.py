@@ -0,0 +1,21 @@
+"""
+Symbol-to-worker assignment by rendezvous (highest random weight) hashing.
+
+Every symbol goes to the worker with the highest hash(worker, symbol), so when
+a worker joins or dies only the symbols it gains or owned move - the rest of
+the universe keeps its worker (and that worker's warm caches).
+"""
+import hashlib
+from typing import Dict, List
+
+
+def _weight(worker_id: str, symbol: str) -> int:
+    # hashlib rather than hash(): must agree across processes and hosts
+    return int.from_bytes(hashlib.blake2b(f"{worker_id}:{symbol}".encode(), digest_size=8).digest(), "big")
+
+
+def assign_shards(symbols: List[str], workers: List[str]) -> Dict[str, str]:
+    """{symbol: worker_id} for every symbol; empty if there are no workers"""
+    if not workers:
+        return {}
+    return {symbol: max(workers, key=lambda w: _weight(w, symbol)) for symbol in symbols}
@@ -0,0 +1,74 @@
+"""
+Cluster worker process.
+
+Registers with the queue backend, heartbeats from a background thread and runs
+analyze_symbol() for every task the leader assigns to it. Workers never place
+orders or write signals - results go back through the queue.
+
+Usage (from backend/, one per core or host):
+    python -m app.cluster.worker --db cluster.db
+"""
+import argparse
+import os
+import socket
+import threading
+import time
+import uuid
+from app.cluster.backend import QueueBackend, SQLiteQueueBackend
+from app.core.config import settings
+from app.core.logger import setup_logger
+
+logger = setup_logger("ClusterWorker")
+
+
+def run_worker(backend: QueueBackend, worker_id: str = None, heartbeat_interval: float = 5.0,
+               poll_interval: float = 0.5, stop: threading.Event = None):
+    from app.signals.signal_engine import analyze_symbol
+
+    worker_id = worker_id or f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+    stop = stop or threading.Event()
+    backend.register_worker(worker_id, socket.gethostname(), os.getpid())
+
+    def beat():
+        while not stop.wait(heartbeat_interval):
+            try:
+                backend.heartbeat(worker_id)
+            except Exception as e:
+                logger.error(f"❌ Heartbeat failed: {e}")
+
+    # Heartbeats run beside the analysis so a long task doesn't look like a dead worker
+    threading.Thread(target=beat, name="heartbeat", daemon=True).start()
+    logger.info(f"Worker {worker_id} started")
+    try:
+        while not stop.is_set():
+            tasks = backend.claim(worker_id)
+            if not tasks:
+                stop.wait(poll_interval)
+                continue
+            for task in tasks:
+                start = time.perf_counter()
+                try:
+                    backend.complete(worker_id, task["id"], analyze_symbol(task["symbol"]))
+                except Exception as e:
+                    logger.error(f"❌ {task['symbol']}: analysis failed - {e}")
+                    backend.complete(worker_id, task["id"], None, error=f"{type(e).__name__}: {e}")
+                logger.info(f"{task['symbol']} analyzed in {time.perf_counter() - start:.2f}s")
+    finally:
+        stop.set()
+        backend.remove_worker(worker_id)
+        logger.info(f"Worker {worker_id} stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cluster scan worker")
+    parser.add_argument("--db", default=settings.CLUSTER_DB)
+    parser.add_argument("--worker-id")
+    args = parser.parse_args()
+    try:
+        run_worker(SQLiteQueueBackend(args.db), args.worker_id, heartbeat_interval=settings.CLUSTER_HEARTBEAT_SECONDS)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
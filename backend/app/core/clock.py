@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta
+
+class SystemClock:
+    """Wall clock in UTC (live trading)"""
+
+    def now(self) -> datetime:
+        return datetime.utcnow()
+
+class SimulatedClock:
+    """Clock driven by the backtest engine"""
+
+    def __init__(self, start: datetime = None):
+        self._now = start or datetime(1970, 1, 1)
+
+    def now(self) -> datetime:
+        return self._now
+
+    def set(self, moment: datetime):
+        self._now = moment
+
+    def advance(self, delta: timedelta):
+        self._now += delta
+
+_clock = SystemClock()
+
+def get_clock():
+    return _clock
+
+def set_clock(clock):
+    """Swap the process-wide clock (pass SystemClock() to restore live time)"""
+    global _clock
+    _clock = clock
+
+def utcnow() -> datetime:
+    return _clock.now()
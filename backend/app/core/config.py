@@ -36,4 +36,76 @@ class Settings:
     TELEGRAM_BOT_TOKEN: str = os.getenv("TELEGRAM_BOT_TOKEN", "")
     TELEGRAM_CHAT_ID: str = os.getenv("TELEGRAM_CHAT_ID", "")
 
+    # Scan execution: SCAN_WORKERS > 1 analyzes pairs in a process pool
+    SCAN_WORKERS: int = int(os.getenv("SCAN_WORKERS", 0))
+    SCAN_PAIR_TIMEOUT: float = float(os.getenv("SCAN_PAIR_TIMEOUT", 60))
+
+    # Asyncio staged pipeline (fetch -> indicators -> decide -> persist -> dispatch)
+    SCAN_PIPELINE: bool = os.getenv("SCAN_PIPELINE", "false").lower() in ("1", "true", "yes")
+    PIPELINE_FETCH_CONCURRENCY: int = int(os.getenv("PIPELINE_FETCH_CONCURRENCY", 4))
+    PIPELINE_QUEUE_SIZE: int = int(os.getenv("PIPELINE_QUEUE_SIZE", 8))
+
+    # Scan schedule: "interval" (every 30 min) or "bar_close" (after each M15 close,
+    # once the broker has had BAR_SETTLE_SECONDS to finalize the bar)
+    SCHEDULE_MODE: str = os.getenv("SCHEDULE_MODE", "interval")
+    BAR_SETTLE_SECONDS: int = int(os.getenv("BAR_SETTLE_SECONDS", 10))
+    # Total time budget per scan; 0 = 80% of the scan interval
+    SCAN_DEADLINE_SECONDS: float = float(os.getenv("SCAN_DEADLINE_SECONDS", 0))
+
+    # API handlers: blocking work runs in bounded pools; each route has a concurrency cap and timeout
+    API_BROKER_WORKERS: int = int(os.getenv("API_BROKER_WORKERS", 4))
+    API_CPU_WORKERS: int = int(os.getenv("API_CPU_WORKERS", 2))
+    API_CONCURRENCY: int = int(os.getenv("API_CONCURRENCY", 8))
+    API_TIMEOUT_SECONDS: float = float(os.getenv("API_TIMEOUT_SECONDS", 15))
+    # /scan may place orders: one at a time by default
+    API_SCAN_CONCURRENCY: int = int(os.getenv("API_SCAN_CONCURRENCY", 1))
+    API_SCAN_TIMEOUT_SECONDS: float = float(os.getenv("API_SCAN_TIMEOUT_SECONDS", 60))
+    # Symbols a /scan/batch request analyzes at once (each still bounded by the pools above)
+    API_BATCH_CONCURRENCY: int = int(os.getenv("API_BATCH_CONCURRENCY", 4))
+
+    # Rendered /signal/trend answers kept until their bar's next close (0 = off)
+    RESPONSE_CACHE_MB: float = float(os.getenv("RESPONSE_CACHE_MB", 16))
+
+    # Push channel (/events SSE, /ws/events): per-subscriber buffer (oldest dropped when full) and keepalive
+    EVENTS_BUFFER_SIZE: int = int(os.getenv("EVENTS_BUFFER_SIZE", 256))
+    EVENTS_HEARTBEAT_SECONDS: float = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", 15))
+
+    # Signals database; relative paths are resolved against backend/
+    DB_PATH: str = os.getenv("DB_PATH", "signals.db")
+    # Same symbol/timeframe/direction within this window is a duplicate (DB row and alert)
+    SIGNAL_DEDUP_MINUTES: int = int(os.getenv("SIGNAL_DEDUP_MINUTES", 60))
+    # Rows older than this move to monthly partitions in <db>_archive.db (0 = keep everything hot)
+    RETENTION_DAYS: int = int(os.getenv("RETENTION_DAYS", 90))
+    # Executed trades are settled (tp/sl/expired) against bars of this timeframe on this
+    # interval; a trade still open after OUTCOME_MAX_BARS bars is closed at market
+    OUTCOME_TIMEFRAME: str = os.getenv("OUTCOME_TIMEFRAME", "M15")
+    OUTCOME_MAX_BARS: int = int(os.getenv("OUTCOME_MAX_BARS", 96))
+    OUTCOME_RESOLVE_MINUTES: int = int(os.getenv("OUTCOME_RESOLVE_MINUTES", 60))
+    # Keep fetched MT5 bars in the market_data table and fetch only new bars from the broker
+    MARKET_DATA_STORE: bool = os.getenv("MARKET_DATA_STORE", "true").lower() in ("1", "true", "yes")
+    # Signal/trade inserts are committed by a background writer in batches
+    WRITE_BEHIND: bool = os.getenv("WRITE_BEHIND", "true").lower() in ("1", "true", "yes")
+    WRITE_BEHIND_BATCH_SIZE: int = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", 200))
+    WRITE_BEHIND_FLUSH_SECONDS: float = float(os.getenv("WRITE_BEHIND_FLUSH_SECONDS", 1.0))
+
+    # Pending forecast entries are checked against the latest tick this often
+    FORECAST_POLL_SECONDS: float = float(os.getenv("FORECAST_POLL_SECONDS", 5))
+    # Pending forecasts expire after this long; structure is re-checked on this interval
+    FORECAST_TTL_HOURS: float = float(os.getenv("FORECAST_TTL_HOURS", 24))
+    FORECAST_REVALIDATE_MINUTES: int = int(os.getenv("FORECAST_REVALIDATE_MINUTES", 15))
+    # A forecast whose order fails is retried after FORECAST_RETRY_SECONDS, doubling
+    # each time, and marked failed after FORECAST_MAX_ORDER_ATTEMPTS attempts
+    FORECAST_RETRY_SECONDS: float = float(os.getenv("FORECAST_RETRY_SECONDS", 30))
+    FORECAST_MAX_ORDER_ATTEMPTS: int = int(os.getenv("FORECAST_MAX_ORDER_ATTEMPTS", 5))
+
+    # Cluster mode: the lease-holding API process schedules scans and executes;
+    # `python -m app.cluster.worker` processes analyze the sharded pairs
+    CLUSTER_ENABLED: bool = os.getenv("CLUSTER_ENABLED", "false").lower() in ("1", "true", "yes")
+    CLUSTER_DB: str = os.getenv("CLUSTER_DB", "cluster.db")
+    CLUSTER_HEARTBEAT_SECONDS: float = float(os.getenv("CLUSTER_HEARTBEAT_SECONDS", 5))
+    CLUSTER_WORKER_TTL: float = float(os.getenv("CLUSTER_WORKER_TTL", 20))
+    CLUSTER_LEADER_TTL: float = float(os.getenv("CLUSTER_LEADER_TTL", 30))
+    # Finished scans' task rows are purged from the queue after this long
+    CLUSTER_TASK_RETENTION_HOURS: float = float(os.getenv("CLUSTER_TASK_RETENTION_HOURS", 24))
+
 settings = Settings()
\ No newline at end of file
@@ -20,3 +20,8 @@ PAIRS = [
 TIMEFRAMES = [
     "M15", "H1", "H4", "D1"
 ]
+
+# Bar length of each supported timeframe in minutes
+TIMEFRAME_MINUTES = {
+    "M15": 15, "H1": 60, "H4": 240, "D1": 1440
+}
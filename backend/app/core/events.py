@@ -0,0 +1,140 @@
+"""
+In-process event hub for push consumers (SSE and WebSocket endpoints).
+
+The signal engine publishes from whatever thread it runs on - scan threads,
+pipeline stages, the forecast poller:
+
+    events.publish("signal", sig)
+
+publish() is O(1) for the caller and never blocks: with no subscribers it
+returns immediately, otherwise it hands the event to the API's event loop
+(call_soon_threadsafe), where it is encoded once and fanned out to every
+matching subscriber. Each subscriber has its own bounded buffer; when a slow
+consumer lets it fill, the oldest events are dropped (and counted) rather than
+holding up the scan or the other subscribers.
+
+Event types: signal, forecast, rejection, order, forecast_triggered.
+Subscribers filter by symbol, strategy and type.
+
+Metrics: events.published / .delivered / .dropped counters,
+events.subscribers gauge.
+"""
+import asyncio
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from typing import Iterable, List, Optional, Set, Tuple
+from app.core.config import settings
+from app.core.metrics import metrics
+
+EVENT_TYPES = ("signal", "forecast", "rejection", "order", "forecast_triggered")
+
+# Live scan (MTF confluence) signals carry no strategy key
+DEFAULT_STRATEGY = "mtf_confluence"
+
+
+def _json_default(value):
+    # numpy scalars and the like
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+def _filter(values: Optional[Iterable[str]]) -> Optional[Set[str]]:
+    values = {v for v in values or () if v}
+    return values or None
+
+
+class Subscriber:
+    def __init__(self, symbols=None, strategies=None, types=None, buffer_size: int = 256):
+        self.set_filters(symbols, strategies, types)
+        self.buffer: deque = deque(maxlen=buffer_size)
+        self.dropped = 0
+        self._ready = asyncio.Event()
+
+    def set_filters(self, symbols=None, strategies=None, types=None):
+        """None or empty = everything"""
+        self.symbols = _filter(s.upper() for s in symbols or ())
+        self.strategies = _filter(strategies)
+        self.types = _filter(types)
+
+    def matches(self, event: dict) -> bool:
+        return ((self.types is None or event["type"] in self.types)
+                and (self.symbols is None or event["symbol"] in self.symbols)
+                and (self.strategies is None or event["strategy"] in self.strategies))
+
+    def offer(self, item: Tuple[dict, str]):
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped += 1
+            metrics.incr("events.dropped")
+        self.buffer.append(item)
+        self._ready.set()
+
+    async def next_batch(self, timeout: float) -> List[Tuple[dict, str]]:
+        """Buffered (event, json) pairs, oldest first; empty if none arrived within timeout"""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        self._ready.clear()
+        batch = list(self.buffer)
+        self.buffer.clear()
+        metrics.incr("events.delivered", len(batch))
+        return batch
+
+    def take_dropped(self) -> int:
+        dropped, self.dropped = self.dropped, 0
+        return dropped
+
+
+class EventHub:
+    def __init__(self, buffer_size: int = 256):
+        self.buffer_size = buffer_size
+        self._subscribers: Set[Subscriber] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def publish(self, event_type: str, payload: dict):
+        if not self._subscribers or self._loop is None:
+            return
+        event = {
+            "id": next(self._ids),
+            "type": event_type,
+            "time": time.time(),
+            "symbol": payload.get("symbol"),
+            "strategy": payload.get("strategy") or DEFAULT_STRATEGY,
+            # Snapshot: the engine keeps adding keys (lot_size, executed) to the same dict
+            "data": dict(payload),
+        }
+        metrics.incr("events.published")
+        try:
+            self._loop.call_soon_threadsafe(self._fanout, event)
+        except RuntimeError:
+            pass  # loop closed during shutdown
+
+    def _fanout(self, event: dict):
+        encoded = json.dumps(event, default=_json_default)
+        for subscriber in list(self._subscribers):
+            if subscriber.matches(event):
+                subscriber.offer((event, encoded))
+
+    def subscribe(self, symbols=None, strategies=None, types=None) -> Subscriber:
+        """Register a subscriber; call from the API's event loop"""
+        subscriber = Subscriber(symbols, strategies, types, self.buffer_size)
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            self._subscribers.add(subscriber)
+            metrics.gauge("events.subscribers", len(self._subscribers))
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+            metrics.gauge("events.subscribers", len(self._subscribers))
+
+    def __len__(self):
+        return len(self._subscribers)
+
+
+events = EventHub(settings.EVENTS_BUFFER_SIZE)
@@ -0,0 +1,75 @@
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+class Metrics:
+    """In-process counters, gauges and timings shared by the scan pipeline and API"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(int)
+        self._gauges = {}
+        self._timings = {}
+
+    def incr(self, name: str, value: int = 1):
+        with self._lock:
+            self._counters[name] += value
+
+    def gauge(self, name: str, value: float):
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            stat = self._timings.get(name)
+            if stat is None:
+                stat = self._timings[name] = {"count": 0, "total": 0.0, "max": 0.0, "last": 0.0}
+            stat["count"] += 1
+            stat["total"] += seconds
+            stat["last"] = seconds
+            stat["max"] = max(stat["max"], seconds)
+
+    @contextmanager
+    def timer(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            timings = {
+                name: {**stat, "avg": stat["total"] / stat["count"]}
+                for name, stat in self._timings.items()
+            }
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "timings": timings,
+            }
+
+    def merge(self, snapshot: dict, prefix: str = ""):
+        """Fold another process's snapshot() into this one (gauges are overwritten)"""
+        with self._lock:
+            for name, value in snapshot.get("counters", {}).items():
+                self._counters[prefix + name] += value
+            for name, value in snapshot.get("gauges", {}).items():
+                self._gauges[prefix + name] = value
+            for name, other in snapshot.get("timings", {}).items():
+                stat = self._timings.get(prefix + name)
+                if stat is None:
+                    stat = self._timings[prefix + name] = {"count": 0, "total": 0.0, "max": 0.0, "last": 0.0}
+                stat["count"] += other["count"]
+                stat["total"] += other["total"]
+                stat["last"] = other["last"]
+                stat["max"] = max(stat["max"], other["max"])
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._timings.clear()
+
+metrics = Metrics()
@@ -0,0 +1,112 @@
+"""
+Broker access used by the signal pipeline, gates and risk manager.
+
+Live code talks to MT5Broker, which wraps the MetaTrader5 terminal and
+mt5_client. The backtester installs a SimulatedBroker with set_broker() so the
+same run_all_strategies path can be replayed against stored bars.
+
+The MetaTrader5 package drives one terminal connection per process and is not
+thread-safe (mt5_client.fetch_ohlcv even initializes and shuts it down around
+each fetch), so every MT5Broker call holds one process-wide lock: scheduler
+scans, the API's broker pool and forecast polling take turns.
+"""
+import functools
+import threading
+
+_mt5_lock = threading.RLock()
+
+
+def _serialized(method):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with _mt5_lock:
+            return method(*args, **kwargs)
+    return wrapper
+
+
+class MT5Broker:
+    """Live broker backed by the MetaTrader5 terminal"""
+
+    # Fetched bars are kept in the local market_data store (app.data.market_store)
+    persist_bars = True
+
+    @_serialized
+    def fetch_ohlcv(self, symbol: str, timeframe: str, bars: int = 100):
+        from app.data.mt5_client import fetch_ohlcv
+        return fetch_ohlcv(symbol, timeframe, bars=bars)
+
+    @_serialized
+    def fetch_rates(self, symbol: str, timeframe: str, count: int):
+        """
+        The newest `count` bars straight from MT5 - no 250-bar floor and no
+        Tiingo/mock fallback, so the result is safe to store. None if unavailable.
+        """
+        import MetaTrader5 as mt5
+        from app.data.data_utils import rates_to_ohlcv
+        from app.data.mt5_client import ensure_mt5_connection
+        if not ensure_mt5_connection():
+            return None
+        rates = mt5.copy_rates_from_pos(symbol, getattr(mt5, f"TIMEFRAME_{timeframe}"), 0, count)
+        return rates_to_ohlcv(rates) if rates is not None and len(rates) else None
+
+    @_serialized
+    def place_order(self, symbol, direction, entry, sl, tp, lot=0.1, magic=123456):
+        from app.data.mt5_client import place_order
+        return place_order(symbol, direction, entry, sl, tp, lot=lot, magic=magic)
+
+    @_serialized
+    def account_info(self):
+        import MetaTrader5 as mt5
+        return mt5.account_info()
+
+    @_serialized
+    def account_balance(self) -> float:
+        account = self.account_info()
+        return account.balance if account else 0
+
+    @_serialized
+    def positions_get(self, symbol: str = None):
+        import MetaTrader5 as mt5
+        positions = mt5.positions_get(symbol=symbol) if symbol else mt5.positions_get()
+        return positions or ()
+
+    @_serialized
+    def history_deals_get(self, start, end):
+        import MetaTrader5 as mt5
+        return mt5.history_deals_get(start, end) or ()
+
+    @_serialized
+    def symbol_info(self, symbol: str):
+        import MetaTrader5 as mt5
+        return mt5.symbol_info(symbol)
+
+    @_serialized
+    def symbol_info_tick(self, symbol: str):
+        import MetaTrader5 as mt5
+        return mt5.symbol_info_tick(symbol)
+
+    @_serialized
+    def latest_bar_time(self, symbol: str, timeframe: str = "M15"):
+        """Open time (epoch seconds) of the newest bar - one rate instead of a full fetch"""
+        import MetaTrader5 as mt5
+        from app.data.mt5_client import ensure_mt5_connection
+        if not ensure_mt5_connection():
+            return None
+        rates = mt5.copy_rates_from_pos(symbol, getattr(mt5, f"TIMEFRAME_{timeframe}"), 0, 1)
+        return int(rates[0]['time']) if rates is not None and len(rates) else None
+
+    @_serialized
+    def is_market_open(self, symbol: str) -> bool:
+        import MetaTrader5 as mt5
+        info = mt5.symbol_info(symbol)
+        return bool(info) and info.trade_mode == mt5.SYMBOL_TRADE_MODE_FULL
+
+_broker = MT5Broker()
+
+def get_broker():
+    return _broker
+
+def set_broker(broker):
+    """Swap the process-wide broker (pass MT5Broker() to restore live trading)"""
+    global _broker
+    _broker = broker
@@ -1,7 +1,7 @@
 import pandas as pd
-from app.data.mt5_client import fetch_ohlcv
 
 def fetch_mtf_data(symbol: str):
+    from app.data.market_store import fetch_bars as fetch_ohlcv
     tf_map = {
         "D1": fetch_ohlcv(symbol, "D1", bars=150),
         "H4": fetch_ohlcv(symbol, "H4", bars=150),
@@ -15,6 +15,23 @@ def fetch_mtf_data(symbol: str):
         mtf_data[tf] = df
     return mtf_data
 
+def rates_to_ohlcv(rates, spread: int = 2):
+    """Convert an MT5 rates array (numpy structured) to the fetch_ohlcv list-of-dicts format"""
+    has_real_volume = 'real_volume' in rates.dtype.names
+    ohlcv_data = []
+    for r in rates:
+        ohlcv_data.append({
+            'time': int(r['time']),
+            'open': float(r['open']),
+            'high': float(r['high']),
+            'low': float(r['low']),
+            'close': float(r['close']),
+            'tick_volume': int(r['tick_volume']),
+            'spread': spread,
+            'real_volume': int(r['real_volume']) if has_real_volume else 0
+        })
+    return ohlcv_data
+
 def format_market_data(raw_data):
     # Format raw market data for analysis
     pass
@@ -0,0 +1,116 @@
+"""
+Local OHLCV store (market_data table).
+
+Bars are keyed by (symbol, timeframe, timestamp) in a WITHOUT ROWID table, so
+the primary key is the clustered index: a range read for one series is a
+single contiguous scan with every column in the index. Upserts go through the
+write-behind queue as one bulk statement per series; the newest bar is
+overwritten as it forms.
+
+fetch_bars() is the store-first fetch used by the scan and the API: when the
+store already holds enough history it asks the broker only for the bars since
+the last stored one (plus that one, which may have still been forming), and
+serves the rest locally. Only brokers with persist_bars (live MT5) are stored;
+the SimulatedBroker already holds its history in memory.
+"""
+import calendar
+from typing import Dict, List, Optional
+import numpy as np
+from app.core.clock import utcnow
+from app.core.config import settings
+from app.core.constants import TIMEFRAME_MINUTES
+from app.core.logger import setup_logger
+from app.core.metrics import metrics
+from app.data.broker import get_broker
+from app.database.storage import get_storage
+from app.database.write_behind import write_queue
+
+logger = setup_logger("MarketStore")
+
+# Every fetch_ohlcv path returns at least this many bars; indicators rely on it
+MIN_BARS = 250
+
+COLUMNS = ("timestamp", "open", "high", "low", "close", "volume", "spread")
+
+UPSERT_SQL = """
+INSERT INTO market_data (symbol, timeframe, timestamp, open, high, low, close, volume, spread)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (symbol, timeframe, timestamp) DO UPDATE SET
+    open = excluded.open, high = excluded.high, low = excluded.low, close = excluded.close,
+    volume = excluded.volume, spread = excluded.spread
+"""
+
+
+def store_bars(symbol: str, timeframe: str, bars: List[dict]):
+    """Bulk-upsert fetch_ohlcv-format bars (queued; committed by the write-behind writer)"""
+    write_queue.submit_many(UPSERT_SQL, [
+        (symbol, timeframe, b["time"], b["open"], b["high"], b["low"], b["close"], b["tick_volume"], b.get("spread", 0))
+        for b in bars
+    ], name="store_bars")
+    metrics.incr("market_data.bars_stored", len(bars))
+
+
+def read_bars(symbol: str, timeframe: str, start: Optional[int] = None, end: Optional[int] = None,
+              limit: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    Stored bars with start <= timestamp <= end (epoch seconds), oldest first, as
+    column arrays {"timestamp": int64, "open": float64, ...}. With limit, the
+    newest `limit` bars of the range.
+    """
+    sql = ("SELECT timestamp, open, high, low, close, volume, spread FROM market_data "
+           "WHERE symbol = ? AND timeframe = ? AND timestamp BETWEEN ? AND ?")
+    params = [symbol, timeframe, start if start is not None else 0, end if end is not None else 2 ** 62]
+    if limit:
+        # Newest first to apply the limit on the index, flipped back below
+        sql += " ORDER BY timestamp DESC LIMIT ?"
+        params.append(limit)
+    else:
+        sql += " ORDER BY timestamp"
+    rows = get_storage().query(sql, params, name="read_bars")
+    data = np.array([tuple(r) for r in rows], dtype=np.float64).reshape(-1, len(COLUMNS))
+    if limit:
+        data = data[::-1]
+    arrays = {name: data[:, i] for i, name in enumerate(COLUMNS)}
+    arrays["timestamp"] = arrays["timestamp"].astype(np.int64)
+    return arrays
+
+
+def to_ohlcv(arrays: Dict[str, np.ndarray]) -> List[dict]:
+    """Column arrays back to the fetch_ohlcv list-of-dicts format"""
+    return [
+        {"time": int(t), "open": float(o), "high": float(h), "low": float(l), "close": float(c),
+         "tick_volume": int(v), "spread": int(s), "real_volume": 0}
+        for t, o, h, l, c, v, s in zip(*(arrays[name] for name in COLUMNS))
+    ]
+
+
+def fetch_bars(symbol: str, timeframe: str, bars: int = 100) -> List[dict]:
+    """fetch_ohlcv with the local store in front of the broker"""
+    broker = get_broker()
+    if not (settings.MARKET_DATA_STORE and getattr(broker, "persist_bars", False)):
+        return broker.fetch_ohlcv(symbol, timeframe, bars=bars)
+
+    want = max(bars, MIN_BARS)
+    stored = read_bars(symbol, timeframe, limit=want)
+    if len(stored["timestamp"]) >= want:
+        last = int(stored["timestamp"][-1])
+        now = calendar.timegm(utcnow().timetuple())
+        # Broker server time may run ahead of UTC; a larger real gap fails the overlap check below
+        missing = max(1, (now - last) // (TIMEFRAME_MINUTES[timeframe] * 60) + 1)
+        # Incremental only while the gap is small relative to the window
+        if missing <= want // 2:
+            fresh = broker.fetch_rates(symbol, timeframe, missing + 1)
+            if fresh and fresh[0]["time"] <= last:
+                store_bars(symbol, timeframe, fresh)
+                older = stored["timestamp"] < fresh[0]["time"]
+                metrics.incr("market_data.store_hits")
+                return (to_ohlcv({name: col[older] for name, col in stored.items()}) + fresh)[-want:]
+
+    fresh = broker.fetch_rates(symbol, timeframe, want)
+    if not fresh:
+        # MT5 unavailable: the broker's own fallbacks (Tiingo, mock) are not stored
+        metrics.incr("market_data.broker_fallbacks")
+        return broker.fetch_ohlcv(symbol, timeframe, bars=bars)
+    store_bars(symbol, timeframe, fresh)
+    metrics.incr("market_data.broker_fetches")
+    return fresh
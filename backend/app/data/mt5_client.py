@@ -5,6 +5,7 @@ def get_account_balance():
 from app.core.config import settings
 from app.core.logger import setup_logger
 from app.data.tiingo_client import fetch_tiingo_forex
+from app.data.data_utils import rates_to_ohlcv
 import MetaTrader5 as mt5
 from datetime import datetime
 import time
@@ -58,18 +59,7 @@ def fetch_ohlcv(symbol: str, timeframe: str, bars: int = 100):
             if rates is not None and len(rates) > 0:
                 logger.info(f"Fetched {len(rates)} bars from MT5 for {symbol} {timeframe}")
                 # Convert MT5 rates to expected format
-                ohlcv_data = []
-                for r in rates:
-                    ohlcv_data.append({
-                        'time': int(r['time']),
-                        'open': float(r['open']),
-                        'high': float(r['high']),
-                        'low': float(r['low']),
-                        'close': float(r['close']),
-                        'tick_volume': int(r['tick_volume']),
-                        'spread': 2,
-                        'real_volume': int(r['real_volume']) if 'real_volume' in r.dtype.names else 0
-                    })
+                ohlcv_data = rates_to_ohlcv(rates)
                 mt5.shutdown()
                 return ohlcv_data
             mt5.shutdown()
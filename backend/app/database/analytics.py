@@ -0,0 +1,293 @@
+"""
+Incrementally maintained performance aggregates.
+
+Every saved signal, saved trade and resolved trade adds its counts to a bucket
+keyed by (day, symbol, strategy, confidence tier) - both in the analytics_daily
+table (an upsert queued next to the row's own insert, so both usually commit
+in the same write-behind batch) and in an in-memory mirror loaded at startup.
+The mirror takes a delta only once its upsert has committed (write-behind
+callback, or after the outcome transaction), so it never counts a write that
+was rolled back or dropped.
+Dashboard reads never touch signals or trade_performance:
+
+- without a date range they sum the all-time rollup per (symbol, strategy,
+  tier), which grows with the universe, not with history
+- with one they sum only the days in the range
+
+Trade outcomes are counted on the day the trade was opened (cohort view), so a
+day's win rate is final once its trades have resolved.
+
+rebuild() recomputes everything from the hot tables and their archive
+partitions, for the first deployment or after a drift:
+    python -m app.database.analytics --rebuild
+"""
+import argparse
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import pandas as pd
+from app.core.logger import setup_logger
+from app.core.metrics import metrics
+from app.database.storage import get_storage
+from app.database.write_behind import write_queue
+
+logger = setup_logger("Analytics")
+
+# Lower bound (inclusive) of each confidence tier, highest first
+CONFIDENCE_TIERS = ((80, "high"), (60, "medium"), (0, "low"))
+
+# Per-bucket counters, in analytics_daily column order
+FIELDS = ("signals", "rr_sum", "trades", "wins", "losses", "expired", "r_sum")
+
+DIMENSIONS = ("day", "symbol", "strategy", "tier")
+
+UPSERT_SQL = f"""
+INSERT INTO analytics_daily ({', '.join(DIMENSIONS + FIELDS)})
+VALUES ({', '.join('?' * (len(DIMENSIONS) + len(FIELDS)))})
+ON CONFLICT ({', '.join(DIMENSIONS)}) DO UPDATE SET
+    {', '.join(f'{f} = {f} + excluded.{f}' for f in FIELDS)}
+"""
+
+Bucket = Tuple[str, str, str]  # (symbol, strategy, tier)
+
+
+def confidence_tier(confidence) -> str:
+    confidence = confidence or 0
+    for floor, tier in CONFIDENCE_TIERS:
+        if confidence >= floor:
+            return tier
+    return CONFIDENCE_TIERS[-1][1]
+
+
+def planned_rr(entry, stop_loss, take_profit) -> float:
+    """Reward:risk of the signal as placed"""
+    risk = abs((entry or 0) - (stop_loss or 0))
+    return abs((take_profit or 0) - (entry or 0)) / risk if risk > 0 else 0.0
+
+
+def _day(timestamp) -> str:
+    # ISO and SQLite CURRENT_TIMESTAMP text both start with YYYY-MM-DD
+    return str(timestamp)[:10]
+
+
+class PerformanceAggregates:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._daily: Dict[str, Dict[Bucket, List[float]]] = defaultdict(dict)
+        self._totals: Dict[Bucket, List[float]] = {}
+
+    @staticmethod
+    def _add(target: Dict[Bucket, List[float]], bucket: Bucket, values: Sequence[float]):
+        counters = target.get(bucket)
+        if counters is None:
+            counters = target[bucket] = [0.0] * len(FIELDS)
+        for i, value in enumerate(values):
+            counters[i] += value
+
+    def apply(self, day: str, bucket: Bucket, values: Sequence[float]):
+        with self._lock:
+            self._add(self._daily[day], bucket, values)
+            self._add(self._totals, bucket, values)
+
+    def load(self, rows: Iterable[Sequence]):
+        """Replace the mirror with analytics_daily rows (day, symbol, strategy, tier, *FIELDS)"""
+        daily, totals = defaultdict(dict), {}
+        for row in rows:
+            bucket, values = tuple(row[1:4]), row[4:]
+            self._add(daily[row[0]], bucket, values)
+            self._add(totals, bucket, values)
+        with self._lock:
+            self._daily, self._totals = daily, totals
+
+    def summary(self, group_by: Sequence[str] = ("strategy",), since: Optional[str] = None,
+                until: Optional[str] = None, symbol: Optional[str] = None, strategy: Optional[str] = None,
+                tier: Optional[str] = None) -> List[dict]:
+        """
+        Aggregated stats per group_by combination (any of DIMENSIONS), optionally
+        restricted to days in [since, until] ("YYYY-MM-DD") and one symbol/strategy/tier.
+        """
+        unknown = set(group_by) - set(DIMENSIONS)
+        if unknown:
+            raise ValueError(f"group_by must be drawn from {DIMENSIONS}, got {sorted(unknown)}")
+        by_day = "day" in group_by or since is not None or until is not None
+
+        with self._lock:
+            if by_day:
+                sources = [(day, buckets) for day, buckets in self._daily.items()
+                           if (since is None or day >= since) and (until is None or day <= until)]
+            else:
+                sources = [(None, self._totals)]
+            days = len(sources) if by_day else len(self._daily)
+
+            groups: Dict[tuple, List[float]] = {}
+            for day, buckets in sources:
+                for bucket, values in buckets.items():
+                    if (symbol and bucket[0] != symbol) or (strategy and bucket[1] != strategy) \
+                            or (tier and bucket[2] != tier):
+                        continue
+                    key = dict(zip(DIMENSIONS, (day,) + bucket))
+                    self._add(groups, tuple(key[d] for d in group_by), values)
+
+        return [dict(zip(group_by, key), **_stats(dict(zip(FIELDS, values)), days))
+                for key, values in sorted(groups.items())]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._totals)
+
+
+def _stats(c: Dict[str, float], days: int) -> dict:
+    decided = c["wins"] + c["losses"]
+    resolved = decided + c["expired"]
+    return {
+        "signals": int(c["signals"]),
+        "trades": int(c["trades"]),
+        "resolved": int(resolved),
+        "wins": int(c["wins"]),
+        "losses": int(c["losses"]),
+        "expired": int(c["expired"]),
+        "win_rate": c["wins"] / decided if decided else None,
+        "tp_rate": c["wins"] / resolved if resolved else None,
+        "sl_rate": c["losses"] / resolved if resolved else None,
+        "avg_rr": c["rr_sum"] / c["signals"] if c["signals"] else None,
+        "avg_r": c["r_sum"] / resolved if resolved else None,
+        "signals_per_day": c["signals"] / days if days else 0.0,
+    }
+
+
+aggregates = PerformanceAggregates()
+
+
+def _record(day: str, bucket: Bucket, **counts):
+    values = [counts.get(field, 0) for field in FIELDS]
+    # Mirrored from the writer thread once the upsert has committed
+    write_queue.submit(UPSERT_SQL, (day,) + bucket + tuple(values), name="analytics_upsert",
+                       callback=lambda _: aggregates.apply(day, bucket, values))
+    metrics.incr("analytics.updates")
+
+
+def _bucket(row: dict) -> Bucket:
+    return row["symbol"], row.get("strategy") or "unknown", confidence_tier(row.get("confidence"))
+
+
+def record_signal(row: dict):
+    """A signal row was queued for the signals table"""
+    _record(_day(row["timestamp"]), _bucket(row), signals=1,
+            rr_sum=planned_rr(row["entry"], row["stop_loss"], row["take_profit"]))
+
+
+def record_trade(signal: dict, opened_at: Optional[datetime] = None):
+    """A trade was queued for the trade_performance table"""
+    _record(_day((opened_at or datetime.utcnow()).isoformat()), _bucket(signal), trades=1)
+
+
+def _dimensions(frame: pd.DataFrame, time_column: str) -> pd.DataFrame:
+    return pd.DataFrame({
+        "day": frame[time_column].astype(str).str[:10],
+        "symbol": frame["symbol"],
+        "strategy": frame["strategy"].fillna("unknown"),
+        "tier": frame["confidence"].map(confidence_tier),
+    })
+
+
+def _sum_rows(frame: pd.DataFrame) -> List[tuple]:
+    """One analytics_daily row per bucket, summing whichever FIELDS the frame has"""
+    if frame.empty:
+        return []
+    frame = frame.assign(**{field: 0.0 for field in FIELDS if field not in frame})
+    grouped = frame.groupby(list(DIMENSIONS), sort=False)[list(FIELDS)].sum()
+    return [tuple(map(str, key)) + tuple(map(float, values)) for key, values in zip(grouped.index, grouped.to_numpy())]
+
+
+def outcome_rows(trades: pd.DataFrame) -> List[tuple]:
+    """
+    analytics_daily deltas for resolved trades (symbol, strategy, confidence,
+    created_at, status tp/sl/expired, r_multiple)
+    """
+    if trades.empty:
+        return []
+    return _sum_rows(_dimensions(trades, "created_at").assign(
+        wins=(trades["status"] == "tp").astype(float),
+        losses=(trades["status"] == "sl").astype(float),
+        expired=(trades["status"] == "expired").astype(float),
+        r_sum=trades["r_multiple"].fillna(0.0).astype(float),
+    ))
+
+
+def record_outcomes(rows: List[tuple], storage=None):
+    """
+    Store outcome_rows() deltas. The upsert runs on `storage` directly, so call it
+    inside the transaction that stores the statuses, and mirror_outcomes() after it commits.
+    """
+    if not rows:
+        return
+    (storage or get_storage()).executemany(UPSERT_SQL, rows, name="analytics_upsert")
+    metrics.incr("analytics.updates", len(rows))
+
+
+def mirror_outcomes(rows: List[tuple]):
+    """Add committed outcome_rows() deltas to the in-memory mirror"""
+    for row in rows:
+        aggregates.apply(row[0], tuple(row[1:4]), row[4:])
+
+
+def load_aggregates() -> int:
+    """Fill the in-memory mirror from analytics_daily (startup); returns buckets loaded"""
+    rows = get_storage().query(f"SELECT {', '.join(DIMENSIONS + FIELDS)} FROM analytics_daily",
+                               name="load_aggregates")
+    aggregates.load(tuple(r) for r in rows)
+    return len(rows)
+
+
+def _history(table: str, columns: List[str]) -> pd.DataFrame:
+    from app.database.retention import query_partitions
+
+    return pd.DataFrame(query_partitions(table), columns=columns)
+
+
+def rebuild() -> int:
+    """Recompute analytics_daily from scratch (hot tables + archive partitions); returns buckets written"""
+    write_queue.flush()
+    with metrics.timer("analytics.rebuild"):
+        signals = _history("signals", ["timestamp", "symbol", "strategy", "confidence",
+                                       "entry", "stop_loss", "take_profit"])
+        trades = _history("trade_performance", ["created_at", "symbol", "strategy", "confidence",
+                                                "status", "r_multiple"])
+        rows = _sum_rows(pd.concat([
+            _dimensions(signals, "timestamp").assign(signals=1.0, rr_sum=[
+                planned_rr(*levels) for levels in signals[["entry", "stop_loss", "take_profit"]].to_numpy()
+            ]),
+            _dimensions(trades, "created_at").assign(trades=1.0),
+        ], ignore_index=True))
+        rows += outcome_rows(trades[trades["status"].isin(["tp", "sl", "expired"])])
+
+        storage = get_storage()
+        with storage.transaction():
+            storage.execute("DELETE FROM analytics_daily", name="analytics_rebuild")
+            storage.executemany(UPSERT_SQL, rows, name="analytics_rebuild")
+        aggregates.load(rows)
+    buckets = len(aggregates)
+    logger.info(f"📊 Rebuilt analytics from {len(signals)} signal(s) and {len(trades)} trade(s)")
+    return buckets
+
+
+def main():
+    from app.database.db_utils import init_db
+
+    parser = argparse.ArgumentParser(description="Performance analytics aggregates")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute analytics_daily from scratch")
+    parser.add_argument("--group-by", default="strategy", help=f"Comma-separated {DIMENSIONS}")
+    parser.add_argument("--since", help="YYYY-MM-DD")
+    args = parser.parse_args()
+    init_db()
+    if args.rebuild:
+        rebuild()
+    else:
+        load_aggregates()
+    for row in aggregates.summary(args.group_by.split(","), since=args.since):
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,36 @@
-import sqlite3
+import time
 from datetime import datetime
+from typing import Callable
+from app.core.config import settings
+from app.database.analytics import record_signal, record_trade
+from app.database.storage import get_storage
+from app.database.write_behind import write_queue
+from app.signals.recent_signals import recent_alerts, recent_signals
 
-DB_PATH = "signals.db"
+# Forecast lifecycle: pending -> triggered | expired | invalidated
+FORECAST_STATUS_COLUMNS = {
+    "status": "TEXT DEFAULT 'pending'",
+    "status_reason": "TEXT",
+    "updated_at": "TEXT",
+}
 
-def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
+def _add_missing_columns(conn, table: str, columns: dict):
+    """Migrate tables created before a column existed; returns the added column names"""
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    added = [name for name in columns if name not in existing]
+    for name in added:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {columns[name]}")
+    return added
+
+def _forecast_status(conn):
+    if "status" in _add_missing_columns(conn, "forecast_signals", FORECAST_STATUS_COLUMNS):
+        conn.execute("UPDATE forecast_signals SET status = 'triggered' WHERE triggered = 1")
+
+# Schema history, applied once by init_db(); PRAGMA user_version = migrations applied.
+# Append new steps - never edit one that has shipped.
+MIGRATIONS = [
+    # 1: base schema
+    """
     CREATE TABLE IF NOT EXISTS signals (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         timestamp TEXT,
@@ -18,9 +42,7 @@ def init_db():
         take_profit REAL,
         confidence INTEGER,
         reason TEXT
-    )
-    """)
-    c.execute("""
+    );
     CREATE TABLE IF NOT EXISTS forecast_signals (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         timestamp TEXT,
@@ -33,15 +55,13 @@ def init_db():
         confidence INTEGER,
         reason TEXT,
         triggered INTEGER DEFAULT 0
-    )
-    """)
-    c.execute("""
+    );
     CREATE TABLE IF NOT EXISTS trade_performance (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         symbol TEXT,
         direction TEXT,
         entry_price REAL,
-        stop_loss REAL, 
+        stop_loss REAL,
         take_profit REAL,
         confidence INTEGER,
         execution_time TEXT,
@@ -50,52 +70,131 @@ def init_db():
         status TEXT,
         created_at TEXT DEFAULT CURRENT_TIMESTAMP
     )
-    """)
-    conn.commit()
-    conn.close()
+    """,
+    # 2: forecast lifecycle columns
+    _forecast_status,
+    # 3: numeric signal time for indexed dedup and range queries
+    """
+    ALTER TABLE signals ADD COLUMN ts_epoch INTEGER;
+    UPDATE signals SET ts_epoch = CAST(strftime('%s', timestamp) AS INTEGER);
+    CREATE INDEX IF NOT EXISTS idx_signals_dedup ON signals (symbol, timeframe, direction, ts_epoch)
+    """,
+    # 4: local OHLCV store, clustered on its key (app.data.market_store)
+    """
+    CREATE TABLE IF NOT EXISTS market_data (
+        symbol TEXT NOT NULL,
+        timeframe TEXT NOT NULL,
+        timestamp INTEGER NOT NULL,
+        open REAL,
+        high REAL,
+        low REAL,
+        close REAL,
+        volume REAL,
+        spread INTEGER,
+        PRIMARY KEY (symbol, timeframe, timestamp)
+    ) WITHOUT ROWID
+    """,
+    # 5: partial indexes over the pending state, which stays small as history is archived
+    """
+    CREATE INDEX IF NOT EXISTS idx_forecast_pending ON forecast_signals (symbol)
+        WHERE triggered = 0 AND status = 'pending';
+    CREATE INDEX IF NOT EXISTS idx_trade_unresolved ON trade_performance (id)
+        WHERE status IS NULL OR status = 'unknown'
+    """,
+    # 6: strategy and realized R for analytics; incrementally maintained aggregates (app.database.analytics)
+    """
+    ALTER TABLE signals ADD COLUMN strategy TEXT;
+    ALTER TABLE trade_performance ADD COLUMN strategy TEXT;
+    ALTER TABLE trade_performance ADD COLUMN r_multiple REAL;
+    CREATE TABLE IF NOT EXISTS analytics_daily (
+        day TEXT NOT NULL,
+        symbol TEXT NOT NULL,
+        strategy TEXT NOT NULL,
+        tier TEXT NOT NULL,
+        signals INTEGER DEFAULT 0,
+        rr_sum REAL DEFAULT 0,
+        trades INTEGER DEFAULT 0,
+        wins INTEGER DEFAULT 0,
+        losses INTEGER DEFAULT 0,
+        expired INTEGER DEFAULT 0,
+        r_sum REAL DEFAULT 0,
+        PRIMARY KEY (day, symbol, strategy, tier)
+    ) WITHOUT ROWID
+    """,
+    # 7: (symbol, time) and (time) indexes for keyset-paginated history reads (app.database.history);
+    # the rowid (id) is implicitly the last index column, so (time, id) cursors seek directly
+    """
+    CREATE INDEX IF NOT EXISTS idx_signals_symbol_time ON signals (symbol, ts_epoch);
+    CREATE INDEX IF NOT EXISTS idx_signals_time ON signals (ts_epoch);
+    CREATE INDEX IF NOT EXISTS idx_forecast_symbol_time ON forecast_signals (symbol, timestamp);
+    CREATE INDEX IF NOT EXISTS idx_forecast_time ON forecast_signals (timestamp);
+    CREATE INDEX IF NOT EXISTS idx_trade_symbol_time ON trade_performance (symbol, created_at);
+    CREATE INDEX IF NOT EXISTS idx_trade_time ON trade_performance (created_at)
+    """,
+]
+
+def init_db():
+    """Bring the schema up to date; the only place DDL runs"""
+    get_storage().migrate(MIGRATIONS)
+
+def warm_recent_signals():
+    """
+    Load the dedup windows from the database (startup). Executed signals were
+    alerted when they were saved, so the same rows also warm the alert window
+    and a restart doesn't resend the last hour's alerts.
+    """
+    rows = get_storage().query("""
+    SELECT id, timestamp, ts_epoch, symbol, timeframe, direction, entry, stop_loss, take_profit, confidence, reason
+    FROM signals WHERE ts_epoch >= ? ORDER BY ts_epoch
+    """, (int(time.time()) - settings.SIGNAL_DEDUP_MINUTES * 60,), name="warm_recent_signals")
+    rows = [dict(r) for r in rows]
+    recent_signals.warm(rows)
+    recent_alerts.warm(rows)
+    return len(rows)
+
 def signal_exists(symbol: str, timeframe: str, direction: str) -> bool:
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
-    SELECT COUNT(*) FROM signals
-    WHERE symbol = ? AND timeframe = ? AND direction = ?
-      AND timestamp >= datetime('now', '-1 hour')
-    """, (symbol, timeframe, direction))
-    count = c.fetchone()[0]
-    conn.close()
-    return count > 0
+    """Database check (index seek on idx_signals_dedup); save_signal uses the in-memory window instead"""
+    row = get_storage().query_one("""
+    SELECT 1 FROM signals
+    WHERE symbol = ? AND timeframe = ? AND direction = ? AND ts_epoch >= ?
+    LIMIT 1
+    """, (symbol, timeframe, direction, int(time.time()) - settings.SIGNAL_DEDUP_MINUTES * 60), name="signal_exists")
+    return row is not None
 
 
 def save_signal(signal: dict):
-    if signal_exists(signal["symbol"], signal["timeframe"], signal["direction"]):
+    now = time.time()
+    timestamp = datetime.utcfromtimestamp(now).isoformat()
+    row = {
+        "timestamp": timestamp,
+        "ts_epoch": int(now),
+        "symbol": signal["symbol"],
+        "timeframe": signal["timeframe"],
+        "direction": signal["direction"],
+        "entry": signal["entry"],
+        "stop_loss": signal["stop_loss"],
+        "take_profit": signal["take_profit"],
+        "confidence": signal.get("confidence", 0),
+        "reason": signal["reason"],
+        "strategy": signal.get("strategy"),
+    }
+    if not recent_signals.claim(row, now):
         return  # Skip duplicate alert
 
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
-    INSERT INTO signals (timestamp, symbol, timeframe, direction, entry, stop_loss, take_profit, confidence, reason)
-    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
-        datetime.utcnow().isoformat(),
-        signal["symbol"],
-        signal["timeframe"],
-        signal["direction"],
-        signal["entry"],
-        signal["stop_loss"],
-        signal["take_profit"],
-        signal.get("confidence", 0),
-        signal["reason"]
-    ))
-    conn.commit()
-    conn.close()
+    write_queue.submit("""
+    INSERT INTO signals (timestamp, ts_epoch, symbol, timeframe, direction, entry, stop_loss, take_profit, confidence, reason,
+                         strategy)
+    VALUES (:timestamp, :ts_epoch, :symbol, :timeframe, :direction, :entry, :stop_loss, :take_profit, :confidence, :reason,
+            :strategy)
+    """, row, name="save_signal", callback=lambda row_id: row.update(id=row_id))
+    record_signal(row)
 
-def save_forecast_signal(signal: dict):
+def save_forecast_signal(signal: dict, on_saved: Callable[[int], None] = None):
     """
-    Save a forecast/pending signal to the forecast_signals table.
+    Queue a forecast/pending signal for the forecast_signals table;
+    on_saved(row id) runs once it is committed.
     """
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
+    write_queue.submit("""
     INSERT INTO forecast_signals (timestamp, symbol, timeframe, direction, entry, stop_loss, take_profit, confidence, reason)
     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
     """, (
@@ -108,43 +207,20 @@ def save_forecast_signal(signal: dict):
         signal["take_profit"],
         signal.get("confidence", 0),
         signal["reason"]
-    ))
-    conn.commit()
-    conn.close()
+    ), name="save_forecast_signal", callback=on_saved)
 
 # Add performance tracking
 def save_trade_performance(signal, execution_result):
     """Track trade performance for optimization"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS trade_performance (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            symbol TEXT,
-            direction TEXT,
-            entry_price REAL,
-            stop_loss REAL, 
-            take_profit REAL,
-            confidence INTEGER,
-            execution_time TEXT,
-            spread REAL,
-            slippage REAL,
-            status TEXT,
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    cursor.execute('''
+    write_queue.submit('''
         INSERT INTO trade_performance (symbol, direction, entry_price, stop_loss, take_profit, 
-                                     confidence, execution_time, spread, slippage, status)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                                     confidence, execution_time, spread, slippage, status, strategy)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     ''', (
         signal['symbol'], signal['direction'], signal['entry'], 
         signal['stop_loss'], signal['take_profit'], signal['confidence'],
         execution_result.get('execution_time'), execution_result.get('spread'),
-        execution_result.get('slippage'), execution_result.get('status', 'unknown')
-    ))
-    
-    conn.commit()
-    conn.close()
+        execution_result.get('slippage'), execution_result.get('status', 'unknown'),
+        signal.get('strategy')
+    ), name="save_trade_performance")
+    record_trade(signal)
@@ -0,0 +1,131 @@
+"""
+Filtered, keyset-paginated reads of signals, forecast_signals and trade_performance.
+
+Pages are ordered by (time, id) and continue from an opaque cursor holding the
+last row's (time, id), so page N costs the same index seek as page 1 - no
+OFFSET rows to skip. Each table has a (symbol, time) and a (time) index
+(migration 7); symbol + time window + cursor resolve to one range on the
+first, time window + cursor alone to one range on the second, and the
+remaining filters (timeframe, direction, confidence) are checked on the rows
+the range yields.
+
+Only the hot tables are read; rows older than RETENTION_DAYS live in the
+archive partitions (app.database.retention.query_partitions).
+"""
+import base64
+import json
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Union
+from app.database.storage import get_storage
+
+# API name -> table, time column and how a datetime is written in that column
+HISTORY_TABLES = {
+    "signals": {"table": "signals", "time": "ts_epoch", "format": None},
+    "forecasts": {"table": "forecast_signals", "time": "timestamp", "format": "%Y-%m-%dT%H:%M:%S"},
+    "trades": {"table": "trade_performance", "time": "created_at", "format": "%Y-%m-%d %H:%M:%S"},
+}
+
+_columns: Dict[str, List[str]] = {}
+
+
+def table_columns(table: str) -> List[str]:
+    if table not in _columns:
+        _columns[table] = [r["name"] for r in get_storage().query(f"PRAGMA table_info({table})", name="table_schema")]
+    return _columns[table]
+
+
+def parse_time(value: Union[str, int, float]) -> datetime:
+    """Epoch seconds or ISO 8601 (UTC)"""
+    text = str(value).strip()
+    try:
+        return datetime.utcfromtimestamp(float(text))
+    except (OverflowError, OSError):
+        raise ValueError(f"Time out of range: {text}")
+    except ValueError:
+        parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed
+
+
+def encode_cursor(time_value, row_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([time_value, row_id]).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        time_value, row_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return time_value, int(row_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def query_history(kind: str, symbol: Optional[str] = None, timeframe: Optional[str] = None,
+                  direction: Optional[str] = None, min_confidence: Optional[int] = None,
+                  max_confidence: Optional[int] = None, since=None, until=None,
+                  cursor: Optional[str] = None, limit: int = 100, fields: Optional[List[str]] = None,
+                  order: str = "desc") -> dict:
+    """
+    One page of rows, newest first (order="asc" for oldest first):
+    {"items": [...], "count": n, "next_cursor": str or None}.
+    Raises ValueError for unknown tables, fields or filters the table doesn't have.
+    """
+    if kind not in HISTORY_TABLES:
+        raise ValueError(f"Unknown table {kind}")
+    spec = HISTORY_TABLES[kind]
+    table, time_column = spec["table"], spec["time"]
+    columns = table_columns(table)
+
+    if fields:
+        unknown = set(fields) - set(columns)
+        if unknown:
+            raise ValueError(f"Unknown field(s) for {kind}: {', '.join(sorted(unknown))}")
+    selected = [c for c in columns if not fields or c in fields or c in ("id", time_column)]
+
+    def to_column(moment: datetime):
+        return int((moment - datetime(1970, 1, 1)).total_seconds()) if spec["format"] is None \
+            else moment.strftime(spec["format"])
+
+    where, params = [], []
+    for column, value in (("symbol", symbol and symbol.upper()), ("timeframe", timeframe and timeframe.upper()),
+                          ("direction", direction and direction.upper())):
+        if value is None:
+            continue
+        if column not in columns:
+            raise ValueError(f"{kind} has no {column} column")
+        where.append(f"{column} = ?")
+        params.append(value)
+    if min_confidence is not None:
+        where.append("confidence >= ?")
+        params.append(min_confidence)
+    if max_confidence is not None:
+        where.append("confidence <= ?")
+        params.append(max_confidence)
+    if since is not None:
+        where.append(f"{time_column} >= ?")
+        params.append(to_column(parse_time(since)))
+    if until is not None:
+        # Exclusive, so consecutive windows don't overlap
+        where.append(f"{time_column} < ?")
+        params.append(to_column(parse_time(until)))
+    # Rows without a time can't carry a cursor
+    where.append(f"{time_column} IS NOT NULL")
+
+    descending = order.lower() != "asc"
+    op, direction_sql = ("<", "DESC") if descending else (">", "ASC")
+    if cursor:
+        after_time, after_id = decode_cursor(cursor)
+        # The plain bound gives the planner its index range; the row value picks up ties on time
+        where.append(f"{time_column} {op}= ? AND ({time_column}, id) {op} (?, ?)")
+        params += [after_time, after_time, after_id]
+
+    sql = (f"SELECT {', '.join(selected)} FROM {table} WHERE {' AND '.join(where)}"
+           f" ORDER BY {time_column} {direction_sql}, id {direction_sql} LIMIT ?")
+    rows = get_storage().query(sql, params + [limit + 1], name=f"history.{kind}")
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][time_column], rows[-1]["id"])
+    items = [{c: r[c] for c in selected if not fields or c in fields} for r in rows]
+    return {"items": items, "count": len(items), "next_cursor": next_cursor}
@@ -4,16 +4,18 @@ from sqlalchemy.ext.declarative import declarative_base
 Base = declarative_base()
 
 class MarketData(Base):
+    # Mirrors migration 4 in db_utils; read and written by app.data.market_store
     __tablename__ = 'market_data'
-    id = Column(Integer, primary_key=True)
-    symbol = Column(String)
-    timeframe = Column(String)
+    __table_args__ = {'sqlite_with_rowid': False}
+    symbol = Column(String, primary_key=True)
+    timeframe = Column(String, primary_key=True)
+    timestamp = Column(Integer, primary_key=True)  # bar open time, epoch seconds
     open = Column(Float)
     high = Column(Float)
     low = Column(Float)
     close = Column(Float)
     volume = Column(Float)
-    timestamp = Column(DateTime)
+    spread = Column(Integer)
 
 class Signal(Base):
     __tablename__ = 'signals'
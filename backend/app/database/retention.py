@@ -0,0 +1,187 @@
+"""
+Retention: archive old rows into monthly partitions and compact the hot file.
+
+Rows older than RETENTION_DAYS move from the hot tables in signals.db to
+monthly tables (signals_2024_03, forecast_signals_2024_03, ...) in a separate
+archive file next to it. Pending forecasts and unresolved trades are never
+archived. Rows move in small batches, each one short transaction on either
+file, so writers are never held up for long; archive inserts are INSERT OR
+IGNORE on the original id, so a batch interrupted between the two commits is
+simply redone on the next run.
+
+compact() then checkpoints the WAL without blocking writers (PASSIVE),
+returns free pages to the filesystem incrementally and refreshes planner
+statistics. query_partitions() reads a table across the hot file and its
+archive partitions.
+
+Usage (from backend/):
+    python -m app.database.retention [--days 30] [--vacuum]
+"""
+import argparse
+import os
+import re
+from datetime import timedelta
+from typing import Dict, List, Optional
+from app.core.clock import utcnow
+from app.core.config import settings
+from app.core.logger import setup_logger
+from app.core.metrics import metrics
+from app.database.storage import Storage, get_storage
+
+logger = setup_logger("Retention")
+
+# table -> (time column, rows that may leave the hot table)
+ARCHIVED_TABLES = {
+    "signals": ("timestamp", "1 = 1"),
+    "forecast_signals": ("timestamp", "triggered = 1 OR status != 'pending'"),
+    "trade_performance": ("created_at", "status IS NOT NULL AND status != 'unknown'"),
+}
+
+_archives: Dict[str, Storage] = {}
+
+
+def archive_path(hot_path: str) -> str:
+    return os.path.splitext(hot_path)[0] + "_archive.db"
+
+
+def get_archive() -> Storage:
+    """Archive storage belonging to the current signals database"""
+    path = archive_path(get_storage().path)
+    if path not in _archives:
+        _archives[path] = Storage(path, metrics_prefix="archive_db")
+    return _archives[path]
+
+
+def partition_name(table: str, timestamp: str) -> str:
+    # ISO and SQLite CURRENT_TIMESTAMP text both start with YYYY-MM
+    return f"{table}_{timestamp[:4]}_{timestamp[5:7]}"
+
+
+def _ensure_partition(archive: Storage, table: str, partition: str):
+    """Create a monthly partition with the hot table's schema"""
+    sql = get_storage().query_one("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?",
+                                  (table,), name="table_schema")["sql"]
+    ddl = re.sub(rf"^CREATE TABLE (IF NOT EXISTS )?\"?{table}\"?", f"CREATE TABLE IF NOT EXISTS {partition}",
+                 sql.strip(), flags=re.IGNORECASE)
+    archive.execute(ddl, name="create_partition")
+    # Partitions created before a later migration get its new columns
+    columns = {r["name"]: r["type"] for r in get_storage().query(f"PRAGMA table_info({table})", name="table_schema")}
+    existing = {r["name"] for r in archive.query(f"PRAGMA table_info({partition})", name="table_schema")}
+    for name in columns.keys() - existing:
+        archive.execute(f"ALTER TABLE {partition} ADD COLUMN {name} {columns[name]}", name="create_partition")
+
+
+def archive_table(table: str, days: int, batch_size: int = 500) -> int:
+    """Move archivable rows older than `days` into monthly partitions; returns rows moved"""
+    time_column, archivable = ARCHIVED_TABLES[table]
+    # Date-only cutoff compares correctly against both timestamp text formats
+    cutoff = (utcnow() - timedelta(days=days)).strftime("%Y-%m-%d")
+    hot, archive = get_storage(), get_archive()
+    created = set()
+    moved = 0
+    while True:
+        rows = hot.query(
+            f"SELECT * FROM {table} WHERE {time_column} < ? AND ({archivable}) ORDER BY id LIMIT ?",
+            (cutoff, batch_size), name=f"archive_select.{table}"
+        )
+        if not rows:
+            break
+        columns = rows[0].keys()
+        by_partition: Dict[str, list] = {}
+        for row in rows:
+            by_partition.setdefault(partition_name(table, row[time_column]), []).append(tuple(row))
+
+        with archive.transaction():
+            for partition, values in by_partition.items():
+                if partition not in created:
+                    _ensure_partition(archive, table, partition)
+                    created.add(partition)
+                archive.executemany(
+                    f"INSERT OR IGNORE INTO {partition} ({', '.join(columns)}) "
+                    f"VALUES ({', '.join('?' * len(columns))})", values, name="archive_insert"
+                )
+        with hot.transaction():
+            hot.executemany(f"DELETE FROM {table} WHERE id = ?", [(row["id"],) for row in rows],
+                            name=f"archive_delete.{table}")
+        moved += len(rows)
+        if len(rows) < batch_size:
+            break
+
+    if moved:
+        metrics.incr(f"retention.archived.{table}", moved)
+        logger.info(f"🗄️ Archived {moved} {table} row(s) older than {cutoff}")
+    return moved
+
+
+def partitions(table: str) -> List[str]:
+    """Archive partitions of a table, oldest first"""
+    rows = get_archive().query("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE ?",
+                               (f"{table}_%",), name="partitions")
+    pattern = re.compile(rf"^{table}_\d{{4}}_\d{{2}}$")
+    return sorted(r["name"] for r in rows if pattern.match(r["name"]))
+
+
+def query_partitions(table: str, where: str = "1 = 1", params=(), since_month: Optional[str] = None) -> List[dict]:
+    """
+    Rows matching `where` from the archive partitions (from since_month, "YYYY-MM")
+    and the hot table, oldest partition first.
+    """
+    rows = []
+    for partition in partitions(table):
+        if since_month and partition[-7:].replace("_", "-") < since_month:
+            continue
+        rows += [dict(r) for r in get_archive().query(f"SELECT * FROM {partition} WHERE {where}", params,
+                                                      name="partition_query")]
+    rows += [dict(r) for r in get_storage().query(f"SELECT * FROM {table} WHERE {where}", params,
+                                                  name="partition_query")]
+    return rows
+
+
+def compact(storage: Storage = None, max_pages: int = 2000):
+    """Checkpoint, reclaim free pages and refresh statistics without blocking writers"""
+    storage = storage or get_storage()
+    with metrics.timer("retention.compact"):
+        storage.execute("PRAGMA wal_checkpoint(PASSIVE)", name="checkpoint")
+        if storage.query_one("PRAGMA auto_vacuum", name="compact")[0] == 2:
+            # INCREMENTAL: a bounded number of pages per run keeps each lock short
+            storage.execute(f"PRAGMA incremental_vacuum({max_pages})", name="compact").fetchall()
+        elif storage.query_one("PRAGMA freelist_count", name="compact")[0] > max_pages:
+            logger.warning(f"⚠️ {storage.path} has no incremental auto-vacuum; "
+                           "run `python -m app.database.retention --vacuum` during a quiet period")
+        storage.execute("PRAGMA optimize", name="compact")
+
+
+def run_retention(days: int = None) -> Dict[str, int]:
+    """Scheduled job: archive every table, then compact both files"""
+    days = settings.RETENTION_DAYS if days is None else days
+    if days <= 0:
+        return {}
+    moved = {table: archive_table(table, days) for table in ARCHIVED_TABLES}
+    compact()
+    compact(get_archive())
+    return moved
+
+
+def vacuum():
+    """Offline: switch to incremental auto-vacuum and rebuild the file (blocks writers while it runs)"""
+    storage = get_storage()
+    storage.execute("PRAGMA auto_vacuum = INCREMENTAL", name="vacuum")
+    storage.execute("VACUUM", name="vacuum")
+    logger.info(f"Vacuumed {storage.path}")
+
+
+def main():
+    from app.database.db_utils import init_db
+
+    parser = argparse.ArgumentParser(description="Archive old rows and compact signals.db")
+    parser.add_argument("--days", type=int, default=settings.RETENTION_DAYS)
+    parser.add_argument("--vacuum", action="store_true", help="Full VACUUM (stop the API first)")
+    args = parser.parse_args()
+    init_db()
+    if args.vacuum:
+        vacuum()
+    logger.info(f"Archived: {run_retention(args.days)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+SQLite storage layer.
+
+One connection per thread and database, opened once and reused: the API's
+request threads and the scheduler's job threads each keep their own, and WAL
+journaling lets readers run alongside the single writer instead of blocking on
+it. Connections run in autocommit mode; multi-statement writes go through
+transaction(), which takes the write lock up front (BEGIN IMMEDIATE).
+
+Statements are reused through sqlite3's per-connection statement cache, so hot
+queries are parsed once per thread. Schema changes run once at startup via
+migrate(), tracked in PRAGMA user_version - never on the hot path.
+
+Every query is timed into app.core.metrics as <prefix>.<name>.
+"""
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, List, Union
+from app.core.metrics import metrics
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",    # durable at checkpoints; safe with WAL
+    "PRAGMA cache_size=-16000",     # 16 MB page cache per connection
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA foreign_keys=ON",
+)
+
+# A migration is a SQL script or a callable taking the connection
+Migration = Union[str, Callable[[sqlite3.Connection], None]]
+
+
+class Storage:
+    def __init__(self, path: str, metrics_prefix: str = "db", busy_timeout: float = 30.0):
+        self.path = os.path.abspath(path)
+        self.metrics_prefix = metrics_prefix
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: List[sqlite3.Connection] = []
+
+    def connection(self) -> sqlite3.Connection:
+        """This thread's connection, opened on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None,
+                                   check_same_thread=False, cached_statements=256)
+            conn.row_factory = sqlite3.Row
+            if conn.execute("PRAGMA page_count").fetchone()[0] == 0:
+                # Only a new, empty file takes it (see retention.vacuum()); setting it on an
+                # existing one needs the write lock and would stall behind open transactions
+                conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            for pragma in PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+            metrics.incr(f"{self.metrics_prefix}.connections")
+        return conn
+
+    @contextmanager
+    def _timed(self, name: str):
+        with metrics.timer(f"{self.metrics_prefix}.{name}"):
+            yield
+
+    def execute(self, sql: str, params=(), name: str = "query") -> sqlite3.Cursor:
+        with self._timed(name):
+            return self.connection().execute(sql, params)
+
+    def executemany(self, sql: str, rows, name: str = "query") -> sqlite3.Cursor:
+        with self._timed(name):
+            return self.connection().executemany(sql, rows)
+
+    def query(self, sql: str, params=(), name: str = "query") -> List[sqlite3.Row]:
+        with self._timed(name):
+            return self.connection().execute(sql, params).fetchall()
+
+    def query_one(self, sql: str, params=(), name: str = "query"):
+        with self._timed(name):
+            return self.connection().execute(sql, params).fetchone()
+
+    @contextmanager
+    def transaction(self):
+        """
+        BEGIN IMMEDIATE ... COMMIT on this thread's connection; rolls back on error.
+        Nested calls join the outer transaction.
+        """
+        conn = self.connection()
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def migrate(self, migrations: List[Migration]) -> int:
+        """Apply migrations[user_version:] in order, each in its own transaction; returns the new version"""
+        conn = self.connection()
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for number, migration in enumerate(migrations[version:], start=version + 1):
+            with self.transaction():
+                if callable(migration):
+                    migration(conn)
+                else:
+                    for statement in migration.split(";"):
+                        if statement.strip():
+                            conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {number}")
+            version = number
+        return version
+
+    def close(self):
+        """Close every connection this storage opened (threads reopen on next use)"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+
+def default_db_path() -> str:
+    # Relative DB_PATH values are anchored at backend/, not the process cwd
+    from app.core.config import settings
+    backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return os.path.join(backend_dir, settings.DB_PATH)
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage() -> Storage:
+    """Process-wide storage for the signals database"""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = Storage(default_db_path())
+    return _storage
+
+
+def set_storage(path: str) -> Storage:
+    """Point the process at another database file (benchmarks, backtests); returns the new storage"""
+    global _storage
+    with _storage_lock:
+        if _storage is not None:
+            _storage.close()
+        _storage = Storage(path)
+    return _storage
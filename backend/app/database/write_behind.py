@@ -0,0 +1,170 @@
+"""
+Write-behind queue for signal and trade inserts and market-data upserts.
+
+Scan threads hand their INSERTs to write_queue.submit() (or a bulk statement
+to submit_many()) and move on; a single writer thread commits them in batches -
+one transaction per batch_size items or flush_interval seconds, whichever comes
+first. The queue is shared by every writer in the process, so nothing can
+suspend those triggers: a trade recorded mid-scan is committed within
+flush_interval like any other write.
+
+Callers that need the new row id pass a callback; it runs on the writer thread
+after the commit. Until start() is called (scripts, backtests, benchmarks)
+submit() writes inline, so nothing is ever left unflushed. stop() drains the
+queue and checkpoints the WAL.
+
+Metrics: db.write_queue.depth gauge, db.write_behind.flush timer,
+db.write_behind.rows / .errors / .overflow counters.
+"""
+import queue
+import threading
+import time
+from typing import Callable, Optional
+from app.core.config import settings
+from app.core.logger import setup_logger
+from app.core.metrics import metrics
+from app.database.storage import get_storage
+
+logger = setup_logger("WriteBehind")
+
+_STOP = object()
+
+
+class _Flush:
+    """Queue marker: commit everything before it (and signal `done` if given)"""
+
+    def __init__(self, done: threading.Event = None):
+        self.done = done
+
+
+class WriteBehindQueue:
+    def __init__(self, batch_size: int = 200, flush_interval: float = 1.0, max_size: int = 10000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_size)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+        logger.info(f"Write-behind queue started (batch {self.batch_size}, every {self.flush_interval:g}s)")
+
+    def submit(self, sql: str, params, name: str = "write", callback: Callable[[int], None] = None):
+        """Queue one statement; callback(lastrowid) runs after it is committed"""
+        self._submit((sql, params, name, callback, False))
+
+    def submit_many(self, sql: str, rows: list, name: str = "write"):
+        """Queue one executemany (bulk upsert) as a single item"""
+        if rows:
+            self._submit((sql, rows, name, None, True))
+
+    def _submit(self, item):
+        if not self.running:
+            self._commit([item])
+            return
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            # Backlogged writer: write inline rather than drop the row
+            metrics.incr("db.write_behind.overflow")
+            self._commit([item])
+        metrics.gauge("db.write_queue.depth", self._queue.qsize())
+
+    def flush(self, timeout: float = 30.0) -> bool:
+        """Block until everything submitted so far is committed"""
+        if not self.running:
+            return True
+        done = threading.Event()
+        self._queue.put(_Flush(done))
+        return done.wait(timeout)
+
+    def stop(self, timeout: float = 30.0):
+        """Drain, commit and checkpoint; later submits write inline"""
+        if not self.running:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+        try:
+            get_storage().execute("PRAGMA wal_checkpoint(TRUNCATE)", name="checkpoint")
+        except Exception as e:
+            logger.error(f"❌ WAL checkpoint failed: {e}")
+        logger.info("Write-behind queue stopped")
+
+    def _run(self):
+        pending = []
+        first_at = None
+        while True:
+            timeout = None
+            if pending:
+                timeout = max(0.0, first_at + self.flush_interval - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = _Flush()  # interval elapsed
+
+            if item is _STOP:
+                self._commit(pending)
+                return
+            if isinstance(item, _Flush):
+                self._commit(pending)
+                pending, first_at = [], None
+                if item.done:
+                    item.done.set()
+                continue
+
+            if not pending:
+                first_at = time.monotonic()
+            pending.append(item)
+            if len(pending) >= self.batch_size:
+                self._commit(pending)
+                pending, first_at = [], None
+
+    def _commit(self, items):
+        if not items:
+            return
+        storage = get_storage()
+        try:
+            with metrics.timer("db.write_behind.flush"):
+                with storage.transaction():
+                    row_ids = [self._execute(storage, item) for item in items]
+        except Exception as e:
+            # One bad row must not lose the batch: retry the items one by one
+            logger.error(f"❌ Batch of {len(items)} write(s) failed ({e}) - retrying individually")
+            row_ids = []
+            for item in items:
+                try:
+                    with storage.transaction():
+                        row_ids.append(self._execute(storage, item))
+                except Exception as row_error:
+                    metrics.incr("db.write_behind.errors")
+                    logger.error(f"❌ Dropped {item[2]} write: {row_error}")
+                    row_ids.append(None)
+
+        metrics.incr("db.write_behind.rows", sum(len(item[1]) if item[4] else 1
+                                                 for item, row_id in zip(items, row_ids) if row_id is not None))
+        metrics.gauge("db.write_queue.depth", self._queue.qsize())
+        for (_, _, name, callback, _), row_id in zip(items, row_ids):
+            if callback and row_id is not None:
+                try:
+                    callback(row_id)
+                except Exception as e:
+                    logger.error(f"❌ {name} callback failed: {e}")
+
+    @staticmethod
+    def _execute(storage, item) -> int:
+        """Run one queued item; returns its lastrowid (0 for bulk items)"""
+        sql, params, name, _, many = item
+        if many:
+            storage.executemany(sql, params, name=name)
+            return 0
+        return storage.execute(sql, params, name=name).lastrowid
+
+
+write_queue = WriteBehindQueue(settings.WRITE_BEHIND_BATCH_SIZE, settings.WRITE_BEHIND_FLUSH_SECONDS)
@@ -187,41 +187,41 @@ def add_supertrend(df: pd.DataFrame, period=10, multiplier=3.0) -> pd.DataFrame:
     hl2 = (df['high'] + df['low']) / 2
     atr = df['atr'] if 'atr' in df.columns else calculate_atr(df, period)
     
-    upper_band = hl2 + (multiplier * atr)
-    lower_band = hl2 - (multiplier * atr)
+    # The band recursion is inherently sequential; run it over plain lists
+    # rather than Series.iloc, which costs microseconds per access
+    upper_band = (hl2 + (multiplier * atr)).tolist()
+    lower_band = (hl2 - (multiplier * atr)).tolist()
+    close = df['close'].tolist()
     
-    supertrend = pd.Series(index=df.index, dtype=float)
-    direction = pd.Series(index=df.index, dtype=int)
+    n = len(df)
+    supertrend = [np.nan] * n
+    direction = [np.nan] * n
     
-    for i in range(1, len(df)):
+    for i in range(1, n):
         # Upper band logic
-        if upper_band.iloc[i] < upper_band.iloc[i-1] or df['close'].iloc[i-1] > upper_band.iloc[i-1]:
-            upper_band.iloc[i] = upper_band.iloc[i]
-        else:
-            upper_band.iloc[i] = upper_band.iloc[i-1]
+        if not (upper_band[i] < upper_band[i-1] or close[i-1] > upper_band[i-1]):
+            upper_band[i] = upper_band[i-1]
             
         # Lower band logic  
-        if lower_band.iloc[i] > lower_band.iloc[i-1] or df['close'].iloc[i-1] < lower_band.iloc[i-1]:
-            lower_band.iloc[i] = lower_band.iloc[i]
-        else:
-            lower_band.iloc[i] = lower_band.iloc[i-1]
+        if not (lower_band[i] > lower_band[i-1] or close[i-1] < lower_band[i-1]):
+            lower_band[i] = lower_band[i-1]
             
         # SuperTrend calculation
-        if supertrend.iloc[i-1] == upper_band.iloc[i-1] and df['close'].iloc[i] < upper_band.iloc[i]:
-            supertrend.iloc[i] = upper_band.iloc[i]
-            direction.iloc[i] = -1
-        elif supertrend.iloc[i-1] == lower_band.iloc[i-1] and df['close'].iloc[i] > lower_band.iloc[i]:
-            supertrend.iloc[i] = lower_band.iloc[i]  
-            direction.iloc[i] = 1
-        elif df['close'].iloc[i] <= lower_band.iloc[i]:
-            supertrend.iloc[i] = lower_band.iloc[i]
-            direction.iloc[i] = 1
+        if supertrend[i-1] == upper_band[i-1] and close[i] < upper_band[i]:
+            supertrend[i] = upper_band[i]
+            direction[i] = -1
+        elif supertrend[i-1] == lower_band[i-1] and close[i] > lower_band[i]:
+            supertrend[i] = lower_band[i]  
+            direction[i] = 1
+        elif close[i] <= lower_band[i]:
+            supertrend[i] = lower_band[i]
+            direction[i] = 1
         else:
-            supertrend.iloc[i] = upper_band.iloc[i]
-            direction.iloc[i] = -1
+            supertrend[i] = upper_band[i]
+            direction[i] = -1
     
-    df['supertrend'] = supertrend
-    df['supertrend_direction'] = direction
+    df['supertrend'] = pd.Series(supertrend, index=df.index, dtype=float)
+    df['supertrend_direction'] = pd.Series(direction, index=df.index, dtype=float)
     return df
 
 def calculate_atr(df: pd.DataFrame, period: int = 14) -> pd.Series:
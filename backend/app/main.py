@@ -1,4 +1,4 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
 import warnings
 import pandas as pd
 import numpy as np
@@ -10,52 +10,106 @@ warnings.filterwarnings("ignore", message=".*fillna with 'method' is deprecated.
 warnings.filterwarnings("ignore", message=".*pkg_resources is deprecated.*", category=UserWarning)
 
 from app.core.config import settings
-from app.data.mt5_client import initialize_mt5, shutdown_mt5, fetch_ohlcv
+from app.data.mt5_client import initialize_mt5, shutdown_mt5
+from app.data.market_store import fetch_bars as fetch_ohlcv
 from app.strategies.trend import detect_trend_signal
 from app.signals.signal_engine import run_all_strategies
-from app.database.db_utils import init_db
-from app.scheduler.jobs import start_scheduler
+from app.database.db_utils import init_db, warm_recent_signals
+from app.database.analytics import load_aggregates
+from app.database.storage import get_storage
+from app.database.write_behind import write_queue
+from app.scheduler.jobs import start_scheduler, stop_scheduler
+from app.cluster.backend import SQLiteQueueBackend
+from app.cluster.leader import LeaderElector, get_elector, is_leader, set_elector
+from app.scheduler.parallel_scan import shutdown_scan_pool
+from app.core.metrics import metrics
+from app.api.routes import router
+from app.api.concurrency import broker_call, cpu_call, limited, shutdown_executors
+from app.api.response_cache import response_cache
 
 app = FastAPI(title=settings.PROJECT_NAME, version=settings.VERSION)
+app.include_router(router)
 
 @app.on_event("startup")
 def startup_event():
     init_db()
+    warm_recent_signals()
+    load_aggregates()
+    if settings.WRITE_BEHIND:
+        write_queue.start()
     initialize_mt5()
-    start_scheduler()
+    if settings.CLUSTER_ENABLED:
+        # Only the process holding the leader lease runs the scheduler and places orders
+        elector = LeaderElector(SQLiteQueueBackend(settings.CLUSTER_DB), settings.CLUSTER_LEADER_TTL,
+                                on_elected=start_scheduler, on_lost=stop_scheduler)
+        set_elector(elector)
+        elector.start()
+    else:
+        start_scheduler()
 
 @app.on_event("shutdown")
 def shutdown_event():
+    if get_elector() is not None:
+        get_elector().stop()
+    stop_scheduler()
+    shutdown_executors()
+    shutdown_scan_pool()
     shutdown_mt5()
+    # Last: commit whatever the scheduler queued while stopping
+    write_queue.stop()
+    get_storage().close()
+
+@app.get("/metrics")
+def get_metrics():
+    return metrics.snapshot()
+
+def _frame(raw) -> pd.DataFrame:
+    df = pd.DataFrame(raw)
+    df['time'] = pd.to_datetime(df['time'], unit='s')
+    return df
 
 @app.get("/fetch/{symbol}/{timeframe}")
-def get_ohlcv(symbol: str, timeframe: str):
+@limited("fetch", settings.API_CONCURRENCY, settings.API_TIMEOUT_SECONDS)
+async def get_ohlcv(symbol: str, timeframe: str):
     try:
-        data = fetch_ohlcv(symbol.upper(), timeframe.upper(), bars=100)
+        data = await broker_call(fetch_ohlcv, symbol.upper(), timeframe.upper(), bars=100)
         return {"symbol": symbol, "timeframe": timeframe, "bars": len(data)}
     except Exception as e:
         return {"error": str(e)}
 
-@app.get("/signal/trend/{symbol}/{timeframe}")
-def trend_signal(symbol: str, timeframe: str):
+@limited("trend_signal", settings.API_CONCURRENCY, settings.API_TIMEOUT_SECONDS)
+async def _trend_signal(symbol: str, timeframe: str):
     try:
-        raw = fetch_ohlcv(symbol.upper(), timeframe.upper(), bars=150)
-        df = pd.DataFrame(raw)
-        df['time'] = pd.to_datetime(df['time'], unit='s')
-        signal = detect_trend_signal(df, symbol, timeframe)
+        raw = await broker_call(fetch_ohlcv, symbol.upper(), timeframe.upper(), bars=150)
+        df = await cpu_call(_frame, raw)
+        signal = await cpu_call(detect_trend_signal, df, symbol, timeframe)
         return signal if signal else {"signal": "No valid trend signal"}
     except Exception as e:
         return {"error": str(e)}
 
-@app.get("/scan/{symbol}/{timeframe}")
-def scan_market(symbol: str, timeframe: str):
+@limited("scan", settings.API_SCAN_CONCURRENCY, settings.API_SCAN_TIMEOUT_SECONDS)
+async def _scan_market(symbol: str, timeframe: str):
     try:
-        raw = fetch_ohlcv(symbol.upper(), timeframe.upper(), bars=150)
-        df = pd.DataFrame(raw)
-        df['time'] = pd.to_datetime(df['time'], unit='s')
-        # Signal engine handles all saving internally
-        signals = run_all_strategies(df, symbol, timeframe)
+        raw = await broker_call(fetch_ohlcv, symbol.upper(), timeframe.upper(), bars=150)
+        df = await cpu_call(_frame, raw)
+        # Signal engine handles all saving internally (and may place orders - never cancelled midway).
+        # It is mostly broker I/O (gates, MTF fetch, orders), so it runs on the broker pool
+        signals = await broker_call(run_all_strategies, df, symbol, timeframe)
 
         return signals if signals else {"signal": "No high-confidence signals"}
     except Exception as e:
-        return {"error": str(e)}
\ No newline at end of file
+        return {"error": str(e)}
+
+# Answers can't change before the next bar closes: served from the bar-aware cache,
+# identical concurrent requests sharing one computation
+@app.get("/signal/trend/{symbol}/{timeframe}")
+async def trend_signal(symbol: str, timeframe: str, request: Request):
+    return await response_cache.serve(request, "trend_signal", symbol, timeframe, _trend_signal, symbol, timeframe)
+
+# Not cached: every /scan runs its own alerts, saves and orders
+@app.get("/scan/{symbol}/{timeframe}")
+async def scan_market(symbol: str, timeframe: str):
+    if not is_leader():
+        # Cluster standby: /scan places orders, which only the leader may do
+        raise HTTPException(status_code=503, detail="Not the cluster leader, retry on the leader")
+    return await _scan_market(symbol, timeframe)
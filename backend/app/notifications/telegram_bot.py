@@ -1,6 +1,9 @@
+import time
 import requests
 from app.core.config import settings
 from app.core.logger import setup_logger
+from app.core.metrics import metrics
+from app.signals.recent_signals import recent_alerts
 
 logger = setup_logger("Telegram")
 
@@ -16,6 +19,15 @@ def format_signal_message(signal: dict) -> str:
 def send_signal_to_telegram(signal: dict):
     token = settings.TELEGRAM_BOT_TOKEN
     chat_id = settings.TELEGRAM_CHAT_ID
+    if not token or not chat_id:
+        logger.warning("Telegram not configured - skipping alert")
+        return
+    claimed_at = time.time()
+    # Claimed up front so concurrent scans can't both send it; released again if the send fails
+    if not recent_alerts.claim(signal, claimed_at):
+        metrics.incr("telegram.duplicates")
+        logger.info(f"Duplicate {signal['direction']} alert for {signal['symbol']} - skipped")
+        return
     message = format_signal_message(signal)
 
     url = f"https://api.telegram.org/bot{token}/sendMessage"
@@ -29,7 +41,9 @@ def send_signal_to_telegram(signal: dict):
         response = requests.post(url, data=payload)
         if response.status_code == 200:
             logger.info("Telegram alert sent.")
-        else:
-            logger.error(f"Failed to send Telegram alert: {response.text}")
+            return
+        logger.error(f"Failed to send Telegram alert: {response.text}")
     except Exception as e:
         logger.error(f"Telegram send error: {e}")
+    metrics.incr("telegram.errors")
+    recent_alerts.release(signal, claimed_at)
@@ -0,0 +1,69 @@
+"""
+Run accounting for scheduled jobs.
+
+Jobs are registered with max_instances=1 and coalesce=True, so a run that
+overruns its interval is never stacked on top of itself and any backlog of
+missed fire times collapses into one run. monitored() wraps the job function
+to record duration, errors and slow runs; the scheduler listener records start
+lag (actual start vs scheduled fire time), misfires and overlap skips.
+
+Metrics (app.core.metrics), per job id:
+    job.<id>              timer - run duration
+    job.<id>.lag          timer - start delay behind the scheduled fire time
+    job.<id>.runs / .errors / .slow / .missed / .overlap_skipped   counters
+    job.<id>.last_run     gauge - epoch seconds of the last finished run
+"""
+import functools
+import time
+from apscheduler.events import EVENT_JOB_MISSED, EVENT_JOB_MAX_INSTANCES, EVENT_JOB_SUBMITTED
+from app.core.logger import setup_logger
+from app.core.metrics import metrics
+
+logger = setup_logger("JobMonitor")
+
+# Fire times older than this are dropped as misfires instead of run late
+MISFIRE_GRACE_SECONDS = 120
+
+JOB_DEFAULTS = {"max_instances": 1, "coalesce": True, "misfire_grace_time": MISFIRE_GRACE_SECONDS}
+
+
+def monitored(job_id: str, interval_seconds: float):
+    """Record duration and outcome of every run; runs longer than the interval count as slow"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                metrics.incr(f"job.{job_id}.errors")
+                logger.error(f"❌ Job {job_id} failed: {e}")
+                raise
+            finally:
+                duration = time.perf_counter() - start
+                metrics.observe(f"job.{job_id}", duration)
+                metrics.incr(f"job.{job_id}.runs")
+                metrics.gauge(f"job.{job_id}.last_run", time.time())
+                if duration > interval_seconds:
+                    metrics.incr(f"job.{job_id}.slow")
+                    logger.warning(f"🐢 Job {job_id} took {duration:.0f}s, longer than its {interval_seconds:.0f}s interval")
+        return wrapper
+    return decorator
+
+
+def _on_event(event):
+    if event.code == EVENT_JOB_SUBMITTED:
+        if event.scheduled_run_times:
+            scheduled = event.scheduled_run_times[-1]
+            lag = time.time() - scheduled.timestamp()
+            metrics.observe(f"job.{event.job_id}.lag", max(lag, 0.0))
+    elif event.code == EVENT_JOB_MISSED:
+        metrics.incr(f"job.{event.job_id}.missed")
+        logger.warning(f"⚠️ Job {event.job_id} missed its {event.scheduled_run_time} run")
+    elif event.code == EVENT_JOB_MAX_INSTANCES:
+        metrics.incr(f"job.{event.job_id}.overlap_skipped")
+        logger.warning(f"⚠️ Job {event.job_id} still running - skipped overlapping run")
+
+
+def attach_listener(scheduler):
+    scheduler.add_listener(_on_event, EVENT_JOB_SUBMITTED | EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES)
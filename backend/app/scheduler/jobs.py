@@ -1,22 +1,98 @@
 from apscheduler.schedulers.background import BackgroundScheduler
-from app.data.mt5_client import fetch_ohlcv
-from app.signals.signal_engine import run_all_strategies
-from app.core.constants import PAIRS, TIMEFRAMES
+from app.signals.signal_engine import analyze_symbol, process_signal
+from app.core.constants import PAIRS, TIMEFRAMES, TIMEFRAME_MINUTES
 import pandas as pd
 from app.core.logger import setup_logger
-from app.signals.forecast_engine import check_forecast_entries
+from app.signals.forecast_engine import (check_forecast_entries, load_pending_forecasts, poll_forecast_triggers,
+                                         revalidate_forecasts)
+from app.signals.gates import evaluate_clock_gates
+from app.core.metrics import metrics
+from app.core.config import settings
+from app.core.clock import utcnow
+from app.data.broker import get_broker
+from app.scheduler.parallel_scan import analyze_pairs, apply_result, get_scan_pool
+from app.scheduler.pipeline import run_pipeline
+from app.scheduler.job_monitor import JOB_DEFAULTS, attach_listener, monitored
+import time
+from app.cluster.backend import SQLiteQueueBackend
+from app.cluster.leader import ClusterCoordinator
+from app.database.retention import run_retention
+from app.backtest.outcomes import resolve_open_trades
 
 logger = setup_logger("Scheduler")
 
-def scan_all():
-    """Scan all pairs using MTF confluence strategy - ONE call per symbol"""
+# Pairs cut off by the previous scan's deadline; they go first next time
+_deferred = []
+
+def prioritize(pairs) -> list:
+    """Deferred pairs first, then the given order (PAIRS lists the highest-priority symbols first)"""
+    carried = [p for p in dict.fromkeys(_deferred) if p in pairs]
+    return carried + [p for p in pairs if p not in carried]
+
+def _out_of_time(deadline) -> bool:
+    """True when the next pair is not expected to finish before the deadline"""
+    if deadline is None:
+        return False
+    expected = metrics.snapshot()["timings"].get("scan.pair", {}).get("avg", 0.0)
+    return time.monotonic() + expected > deadline
+
+def scan_all(pairs=None, deadline_seconds: float = None):
+    """
+    Scan all pairs (or the given subset) using MTF confluence strategy - ONE call per symbol.
+    With deadline_seconds, pairs that can't be finished in time are deferred to the next scan.
+    Returns the pairs whose scan completed (neither deferred nor failed).
+    """
+    global _deferred
+    pairs = prioritize(PAIRS if pairs is None else pairs)
+    deadline = time.monotonic() + deadline_seconds if deadline_seconds else None
+    deferred = []
+    failed = []
     total_signals = 0
     filtered_count = 0
+
+    # Clock gates reject every symbol alike - skip the whole universe without touching the broker
+    rejection = evaluate_clock_gates()
+    if rejection:
+        metrics.incr("scan.skipped_pairs", len(pairs))
+        logger.info(f"⏸️  Scan skipped: {rejection['reason']}")
+        return pairs
     
-    for pair in PAIRS:
+    parallel = settings.SCAN_WORKERS > 1
+    if settings.SCAN_PIPELINE:
+        # Staged pipeline: the whole scan, side effects included, happens here
+        processed, deferred, failed = run_pipeline(
+            pairs,
+            concurrency={"fetch": settings.PIPELINE_FETCH_CONCURRENCY},
+            queue_size=settings.PIPELINE_QUEUE_SIZE,
+            cpu_executor=get_scan_pool(settings.SCAN_WORKERS) if parallel else None,
+            deadline=deadline,
+        )
+    elif settings.CLUSTER_ENABLED or parallel:
+        # Parallel/cluster mode: analysis runs in worker processes up front; side
+        # effects below still happen here, one pair at a time in order
+        if settings.CLUSTER_ENABLED:
+            outcomes = get_coordinator().analyze_pairs(pairs, settings.SCAN_PAIR_TIMEOUT, deadline)
+        else:
+            outcomes = analyze_pairs(pairs, settings.SCAN_WORKERS, settings.SCAN_PAIR_TIMEOUT, deadline)
+        deferred = [o["symbol"] for o in outcomes if o["error"] == "deferred"]
+        failed = [o["symbol"] for o in outcomes if o["error"] not in (None, "deferred")]
+
+    for i, pair in enumerate(pairs):
+        if pair in deferred:
+            continue
+        serial = not (settings.SCAN_PIPELINE or settings.CLUSTER_ENABLED or parallel)
+        if serial and _out_of_time(deadline):
+            deferred = pairs[i:]
+            break
         try:
-            # Run MTF analysis once per symbol (fetches all 4 timeframes internally)
-            signals = run_all_strategies(None, pair, "MTF")
+            if settings.SCAN_PIPELINE:
+                signals = processed.get(pair, [])
+            elif not serial:
+                signals = apply_result(outcomes[i])
+            else:
+                # Run MTF analysis once per symbol (fetches all 4 timeframes internally)
+                with metrics.timer("scan.pair"):
+                    signals = process_signal(analyze_symbol(pair), pair)
 
             if signals:
                 total_signals += len(signals)
@@ -30,17 +106,127 @@ def scan_all():
                 logger.info(f"⚠️  No signals for {pair} - likely filtered by accuracy checks")
                 
         except Exception as e:
+            failed.append(pair)
             logger.error(f"❌ MTF scan error on {pair}: {e}")
             import traceback
             traceback.print_exc()
 
+    _deferred = list(dict.fromkeys(deferred))
+    metrics.gauge("scan.deferred_pairs", len(_deferred))
+    if _deferred:
+        metrics.incr("scan.deadline_hits")
+        logger.warning(f"⏱️ Scan deadline reached - deferred {len(_deferred)} pair(s) to the next run: {', '.join(_deferred)}")
+
     # Summary log
-    total_pairs = len(PAIRS)
+    total_pairs = len(pairs) - len(deferred)
     logger.info(f"📊 SCAN COMPLETE: {total_signals} signals from {total_pairs} pairs, {filtered_count} filtered")
+    return [p for p in pairs if p not in deferred and p not in failed]
+
+# Newest M15 bar time per symbol: seen by the last bar check / covered by a completed scan
+_seen_bar_time = {}
+_last_bar_time = {}
+
+def closed_timeframes(moment) -> list:
+    """Timeframes whose bar closed at this (UTC, minute-aligned) moment"""
+    minutes = moment.hour * 60 + moment.minute
+    return [tf for tf, length in TIMEFRAME_MINUTES.items() if minutes % length == 0]
+
+def symbols_with_new_bars(pairs=None, timeframe: str = "M15") -> list:
+    """
+    Symbols whose market is open and whose newest bar has not been scanned yet.
+    A symbol stays "new" until record_scanned() is called for it, so a pair
+    whose scan failed or was deferred is picked up again by the next check.
+    """
+    broker = get_broker()
+    fresh = []
+    for pair in dict.fromkeys(pairs or PAIRS):
+        try:
+            if not broker.is_market_open(pair):
+                metrics.incr("scan.market_closed")
+                continue
+            latest = broker.latest_bar_time(pair, timeframe)
+        except Exception as e:
+            logger.error(f"❌ Bar check failed for {pair}: {e}")
+            continue
+        if latest is None or latest == _last_bar_time.get(pair):
+            metrics.incr("scan.unchanged_pairs")
+            continue
+        _seen_bar_time[pair] = latest
+        fresh.append(pair)
+    return fresh
+
+def record_scanned(pairs):
+    """Mark the bars found by symbols_with_new_bars() as scanned for these pairs"""
+    for pair in pairs:
+        if pair in _seen_bar_time:
+            _last_bar_time[pair] = _seen_bar_time.pop(pair)
+
+def scan_new_bars(deadline_seconds: float = None):
+    """Bar-close job: scan only the symbols that have a new M15 bar (plus any deferred last time)"""
+    closed = closed_timeframes(utcnow())
+    fresh = symbols_with_new_bars()
+    pairs = list(dict.fromkeys(_deferred + fresh))
+    metrics.gauge("scan.enqueued_pairs", len(pairs))
+    logger.info(f"🕯️ Bar close ({'/'.join(closed) or 'off-boundary'}): {len(fresh)} symbol(s) with new bars")
+    if pairs:
+        record_scanned(scan_all(pairs, deadline_seconds=deadline_seconds))
+
+_coordinator = None
+
+def get_coordinator() -> ClusterCoordinator:
+    global _coordinator
+    if _coordinator is None:
+        _coordinator = ClusterCoordinator(SQLiteQueueBackend(settings.CLUSTER_DB), settings.CLUSTER_WORKER_TTL,
+                                          task_retention=settings.CLUSTER_TASK_RETENTION_HOURS * 3600)
+    return _coordinator
+
+_scheduler = None
 
 def start_scheduler():
-    scheduler = BackgroundScheduler()
-    scheduler.add_job(scan_all, 'interval', minutes=30)
-    scheduler.add_job(check_forecast_entries, 'interval', minutes=180)  # Check pending entries
+    global _scheduler
+    if _scheduler is not None:
+        return
+    scheduler = BackgroundScheduler(job_defaults=JOB_DEFAULTS)
+    attach_listener(scheduler)
+    if settings.SCHEDULE_MODE == "bar_close":
+        # Every H1/H4/D1 boundary is also an M15 boundary, so one quarter-hour trigger covers all
+        interval = 15 * 60
+        delay_min, delay_sec = divmod(settings.BAR_SETTLE_SECONDS, 60)
+        minutes = ",".join(str((m + delay_min) % 60) for m in (0, 15, 30, 45))
+        scan_job, trigger = scan_new_bars, {"trigger": "cron", "minute": minutes, "second": delay_sec, "timezone": "UTC"}
+        scan_desc = f"scanning {settings.BAR_SETTLE_SECONDS}s after each M15 close"
+    else:
+        interval = 30 * 60
+        scan_job, trigger = scan_all, {"trigger": "interval", "minutes": 30}
+        scan_desc = "scanning every 30 mins"
+
+    # A scan must finish before the next one is due
+    deadline = settings.SCAN_DEADLINE_SECONDS or interval * 0.8
+    scheduler.add_job(monitored("scan", interval)(scan_job), id="scan",
+                      kwargs={"deadline_seconds": deadline}, **trigger)
+    # Pending entries: cheap tick checks against the in-memory index, plus a
+    # periodic reload from the database
+    load_pending_forecasts()
+    scheduler.add_job(monitored("forecast_poll", settings.FORECAST_POLL_SECONDS)(poll_forecast_triggers), 'interval',
+                      seconds=settings.FORECAST_POLL_SECONDS, id="forecast_poll")
+    scheduler.add_job(monitored("forecast", 180 * 60)(check_forecast_entries), 'interval',
+                      minutes=180, id="forecast")
+    scheduler.add_job(monitored("forecast_revalidate", settings.FORECAST_REVALIDATE_MINUTES * 60)(revalidate_forecasts),
+                      'interval', minutes=settings.FORECAST_REVALIDATE_MINUTES, id="forecast_revalidate")
+    # Executed trades settled to tp/sl/expired, feeding the performance aggregates
+    scheduler.add_job(monitored("outcomes", settings.OUTCOME_RESOLVE_MINUTES * 60)(resolve_open_trades),
+                      'interval', minutes=settings.OUTCOME_RESOLVE_MINUTES, id="outcomes")
+    # Nightly archive + compaction, in batches that don't hold up the writers
+    scheduler.add_job(monitored("retention", 24 * 3600)(run_retention), 'cron', hour=0, minute=30,
+                      timezone="UTC", id="retention")
     scheduler.start()
-    logger.info("Scheduler started: scanning every 30 mins, checking forecast every 180 mins")
+    _scheduler = scheduler
+    logger.info(f"Scheduler started: {scan_desc} ({deadline:.0f}s deadline), "
+                f"checking forecast entries every {settings.FORECAST_POLL_SECONDS:g}s")
+
+def stop_scheduler():
+    global _scheduler
+    if _scheduler is not None:
+        _scheduler.shutdown(wait=False)
+        _scheduler = None
+        logger.info("Scheduler stopped")
@@ -0,0 +1,160 @@
+"""
+Process-pool analysis for scan_all.
+
+The CPU-bound part of a scan - gates, data fetch and the MTF indicator/strategy
+work in analyze_symbol() - is spread across a persistent pool of worker
+processes. Workers stay up between scans, so imports and module-level caches
+are paid for once. Side effects never happen in workers: results come back to
+the scheduler process, which applies them one pair at a time in PAIRS order
+through process_signal() (DB writes, Telegram, orders), exactly as a serial
+scan would. The risk gate is re-checked just before each execution because
+worker results were computed before earlier pairs in the scan placed orders.
+
+Each worker reports its gate/pipeline metrics with every result; they are
+merged into app.core.metrics along with per-worker task counts and timings
+(scan.worker.<pid>.*).
+"""
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait as wait_all
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Any
+from app.core.logger import setup_logger
+from app.core.metrics import metrics
+
+logger = setup_logger("ParallelScan")
+
+_pool = None
+_pool_workers = 0
+
+
+def _init_worker():
+    # Import the analysis stack up front so the first task doesn't pay for it
+    import app.signals.signal_engine  # noqa: F401
+
+
+def _analyze(symbol: str) -> Dict[str, Any]:
+    """Worker task: analyze one symbol and report the metrics it produced"""
+    from app.signals.signal_engine import analyze_symbol
+
+    metrics.reset()
+    start = time.perf_counter()
+    signal, error = None, None
+    try:
+        signal = analyze_symbol(symbol)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return {
+        "symbol": symbol,
+        "signal": signal,
+        "error": error,
+        "pid": os.getpid(),
+        "seconds": time.perf_counter() - start,
+        "metrics": metrics.snapshot(),
+    }
+
+
+def get_scan_pool(workers: int) -> ProcessPoolExecutor:
+    """Shared warm pool, recreated only when the worker count changes"""
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        shutdown_scan_pool()
+        _pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+        _pool_workers = workers
+        logger.info(f"Started scan pool with {workers} workers")
+    return _pool
+
+
+def shutdown_scan_pool(wait: bool = True):
+    """Stop the pool; wait=False returns at once and lets running tasks finish on their own"""
+    global _pool, _pool_workers
+    if _pool is not None:
+        _pool.shutdown(wait=wait, cancel_futures=True)
+        _pool, _pool_workers = None, 0
+
+
+def analyze_pairs(pairs: List[str], workers: int, timeout: float, deadline: float = None) -> List[Dict[str, Any]]:
+    """
+    Analyze pairs in the pool; results come back in input order.
+    At most `workers` pairs are submitted at a time, so a pair starts running
+    when it is submitted and gets `timeout` seconds from then. A pair still
+    running after that is reported with error="timeout" and its pool is
+    retired: the remaining pairs go to a fresh pool while the stuck worker
+    exits once its task returns. Pairs not finished by `deadline`
+    (time.monotonic()) are reported with error="deferred".
+    """
+    metrics.gauge("scan.workers", workers)
+    results: List[Dict[str, Any]] = [None] * len(pairs)
+    queued = list(enumerate(pairs))
+    running = {}  # future -> (index, pair, time limit, pool)
+
+    while queued or running:
+        now = time.monotonic()
+        if deadline is not None and now >= deadline:
+            break
+        pool = get_scan_pool(workers)
+        while queued and sum(1 for *_, owner in running.values() if owner is pool) < workers:
+            index, pair = queued.pop(0)
+            running[pool.submit(_analyze, pair)] = (index, pair, now + timeout, pool)
+
+        limits = [limit for _, _, limit, _ in running.values()]
+        if deadline is not None:
+            limits.append(deadline)
+        done, _ = wait_all(list(running), timeout=max(min(limits) - time.monotonic(), 0.0),
+                           return_when=FIRST_COMPLETED)
+        for future in done:
+            index, pair, _, owner = running.pop(future)
+            results[index] = _collect(pair, future, owner)
+
+        now = time.monotonic()
+        for future, (index, pair, limit, owner) in list(running.items()):
+            if limit > now:
+                continue
+            del running[future]
+            metrics.incr("scan.pair_timeouts")
+            logger.error(f"⏱️ {pair}: analysis not finished within {timeout:g}s - skipped this scan")
+            results[index] = {"symbol": pair, "signal": None, "error": "timeout"}
+            if owner is _pool:
+                # A stuck worker holds its slot until the task returns; later pairs get a fresh pool
+                shutdown_scan_pool(wait=False)
+
+    for index, pair in [(i, p) for i, p, _, _ in running.values()] + queued:
+        results[index] = {"symbol": pair, "signal": None, "error": "deferred"}
+    return results
+
+
+def _collect(pair: str, future, owner: ProcessPoolExecutor) -> Dict[str, Any]:
+    """Result of a finished task, with the worker's metrics merged into this process"""
+    try:
+        outcome = future.result()
+    except BrokenProcessPool as e:
+        metrics.incr("scan.worker_crashes")
+        logger.error(f"❌ {pair}: scan worker died - {e}")
+        if owner is _pool:
+            shutdown_scan_pool(wait=False)
+        return {"symbol": pair, "signal": None, "error": "worker crashed"}
+
+    worker = f"scan.worker.{outcome['pid']}"
+    metrics.merge(outcome.pop("metrics"))
+    metrics.incr(f"{worker}.tasks")
+    metrics.observe(f"{worker}.analyze", outcome["seconds"])
+    if outcome["error"]:
+        metrics.incr(f"{worker}.errors")
+    return outcome
+
+
+def apply_result(outcome: Dict[str, Any]) -> List[dict]:
+    """Coordinator side of a parallel scan: run the side-effect stage for one worker result"""
+    from app.signals.gates import evaluate_risk_gate
+    from app.signals.signal_engine import process_signal
+
+    symbol, sig = outcome["symbol"], outcome["signal"]
+    if outcome["error"]:
+        logger.error(f"❌ {symbol}: MTF strategy error - {outcome['error']}")
+        return []
+    if sig and sig.get("direction") in ("BUY", "SELL"):
+        # Orders placed earlier in this scan may have used up the risk budget
+        rejection = evaluate_risk_gate(symbol)
+        if rejection:
+            sig = rejection
+    return process_signal(sig, symbol)
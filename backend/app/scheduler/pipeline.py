@@ -0,0 +1,190 @@
+"""
+Asyncio staged scan pipeline.
+
+    fetch -> indicators -> decide -> persist -> dispatch
+
+Stages are connected by bounded queues, so a slow stage applies backpressure
+upstream instead of buffering the whole universe. Each stage runs a fixed
+number of consumer tasks:
+
+- fetch (gates + fetch_mtf_data) and dispatch (Telegram + orders) are I/O and
+  run in threads via asyncio.to_thread
+- indicators is CPU-bound and runs in `cpu_executor` (the warm scan process
+  pool when SCAN_WORKERS > 1), keeping the event loop free
+- decide scores the indicator frames and sizes the position
+- persist and dispatch run one at a time, so DB writes and orders stay serial
+
+The risk gate is re-checked in the persist stage, since earlier symbols may
+have used up the risk budget while this one was being analyzed.
+
+Queue depths are exported as pipeline.queue.<stage> gauges and stage timings
+as pipeline.<stage> timers in app.core.metrics.
+"""
+import asyncio
+import time
+from typing import Dict, List, Tuple
+from app.core.logger import setup_logger
+from app.core.metrics import metrics
+
+logger = setup_logger("Pipeline")
+
+STAGES = ["fetch", "indicators", "decide", "persist", "dispatch"]
+
+# Consumer tasks per stage; persist/dispatch must stay at 1 to keep side effects serial
+DEFAULT_CONCURRENCY = {"fetch": 4, "indicators": 2, "decide": 2, "persist": 1, "dispatch": 1}
+
+_DONE = object()
+
+
+class ScanPipeline:
+    def __init__(self, concurrency: Dict[str, int] = None, queue_size: int = 8,
+                 cpu_executor=None, notify: bool = True, persist: bool = True,
+                 deadline: float = None):
+        """
+        Args:
+            concurrency: per-stage consumer counts, merged over DEFAULT_CONCURRENCY
+            queue_size: capacity of each inter-stage queue
+            cpu_executor: executor for the indicator stage (None = the loop's default thread pool)
+            deadline: time.monotonic() after which pairs not yet past the indicator stage are deferred
+        """
+        self.concurrency = {**DEFAULT_CONCURRENCY, **(concurrency or {})}
+        self.queue_size = queue_size
+        self.cpu_executor = cpu_executor
+        self.notify = notify
+        self.persist = persist
+        self.deadline = deadline
+        self.results: Dict[str, List[dict]] = {}
+        self.deferred: List[str] = []
+        self.failed: List[str] = []
+
+    def _gauge(self, stage: str, queue: asyncio.Queue):
+        metrics.gauge(f"pipeline.queue.{stage}", queue.qsize())
+
+    def _expired(self, job) -> bool:
+        """Past the deadline: defer the job to the next scan instead of starting costly work"""
+        if self.deadline is None or time.monotonic() < self.deadline:
+            return False
+        self.deferred.append(job["symbol"])
+        return True
+
+    # --- stage handlers: return the job to pass on, or None to stop here ----
+
+    async def _fetch(self, job):
+        from app.data.data_utils import fetch_mtf_data
+        from app.signals.gates import evaluate_gates
+
+        if self._expired(job):
+            return None
+        job["signal"] = await asyncio.to_thread(evaluate_gates, job["symbol"])
+        if job["signal"] is None:
+            job["mtf_data"] = await asyncio.to_thread(fetch_mtf_data, job["symbol"])
+        return job
+
+    async def _indicators(self, job):
+        from app.strategies.mtf_confluence_with_d1 import compute_mtf_indicators
+
+        if self._expired(job):
+            return None
+        if job["signal"] is None:
+            loop = asyncio.get_running_loop()
+            job["frames"] = await loop.run_in_executor(self.cpu_executor, compute_mtf_indicators,
+                                                       job.pop("mtf_data"))
+        return job
+
+    async def _decide(self, job):
+        from app.signals.signal_engine import classify_signal
+        from app.strategies.mtf_confluence_with_d1 import score_mtf_confluence
+
+        if job["signal"] is None:
+            job["signal"] = await asyncio.to_thread(score_mtf_confluence, job.pop("frames"), job["symbol"])
+        job["action"] = await asyncio.to_thread(classify_signal, job["signal"], job["symbol"], None,
+                                                self.notify and self.persist)
+        return job if job["action"] else None
+
+    async def _persist(self, job):
+        from app.signals.gates import evaluate_risk_gate
+        from app.signals.signal_engine import persist_signal
+
+        if job["action"] == "execute":
+            rejection = await asyncio.to_thread(evaluate_risk_gate, job["symbol"])
+            if rejection:
+                logger.info(f"🚫 {job['symbol']}: Signal filtered - {rejection['reason']}")
+                return None
+        if self.persist:
+            await asyncio.to_thread(persist_signal, job["signal"], job["action"])
+        self.results[job["symbol"]] = [job["signal"]]
+        return job if job["action"] == "execute" else None
+
+    async def _dispatch(self, job):
+        from app.notifications.telegram_bot import send_signal_to_telegram
+        from app.signals.signal_engine import execute_signal
+
+        if self.notify:
+            await asyncio.to_thread(send_signal_to_telegram, job["signal"])
+        await asyncio.to_thread(execute_signal, job["signal"], None, self.persist, self.notify and self.persist)
+        return None
+
+    # --- plumbing ---------------------------------------------------------
+
+    async def _run_stage(self, stage: str, handler, inbox: asyncio.Queue, outbox: asyncio.Queue,
+                         next_consumers: int):
+        async def consumer():
+            while True:
+                job = await inbox.get()
+                self._gauge(stage, inbox)
+                if job is _DONE:
+                    return
+                try:
+                    with metrics.timer(f"pipeline.{stage}"):
+                        job = await handler(job)
+                except Exception as e:
+                    metrics.incr(f"pipeline.{stage}.errors")
+                    self.failed.append(job["symbol"])
+                    logger.error(f"❌ {job['symbol']}: {stage} stage error - {e}")
+                    continue
+                if job is not None and outbox is not None:
+                    await outbox.put(job)
+                    self._gauge(STAGES[STAGES.index(stage) + 1], outbox)
+
+        await asyncio.gather(*(consumer() for _ in range(self.concurrency[stage])))
+        if outbox is not None:
+            for _ in range(next_consumers):
+                await outbox.put(_DONE)
+
+    async def run(self, pairs: List[str]) -> Dict[str, List[dict]]:
+        """Push pairs through every stage; returns {symbol: processed signals} like run_all_strategies"""
+        handlers = [self._fetch, self._indicators, self._decide, self._persist, self._dispatch]
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in STAGES]
+        self.results = {}
+        self.deferred = []
+        self.failed = []
+
+        async def feed():
+            for i, pair in enumerate(pairs):
+                if self.deadline is not None and time.monotonic() >= self.deadline:
+                    # Pairs are in priority order; leave the rest for the next scan
+                    self.deferred.extend(pairs[i:])
+                    break
+                await queues[0].put({"symbol": pair})
+                self._gauge("fetch", queues[0])
+            for _ in range(self.concurrency["fetch"]):
+                await queues[0].put(_DONE)
+
+        tasks = [feed()]
+        for i, (stage, handler) in enumerate(zip(STAGES, handlers)):
+            last = i == len(STAGES) - 1
+            tasks.append(self._run_stage(
+                stage, handler, queues[i], None if last else queues[i + 1],
+                0 if last else self.concurrency[STAGES[i + 1]]
+            ))
+        await asyncio.gather(*tasks)
+        return self.results
+
+
+def run_pipeline(pairs: List[str], **kwargs) -> Tuple[Dict[str, List[dict]], List[str], List[str]]:
+    """Synchronous entry point for the scheduler thread; returns (results, deferred pairs, failed pairs)"""
+    pipeline = ScanPipeline(**kwargs)
+    results = asyncio.run(pipeline.run(pairs))
+    deferred, failed = set(pipeline.deferred), set(pipeline.failed)
+    return (results, [p for p in dict.fromkeys(pairs) if p in deferred],
+            [p for p in dict.fromkeys(pairs) if p in failed])
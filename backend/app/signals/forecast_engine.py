@@ -1,90 +1,268 @@
-import sqlite3
-from datetime import datetime
+"""
+Forecast (pending entry) triggering.
+
+Pending forecasts live in forecast_index, loaded from the forecast_signals
+table at startup and added to as the scan saves new ones. poll_forecast_triggers
+runs every few seconds: one tick per symbol that has pending entries, a binary
+search for crossed entries, and one transaction marking every placed order as
+triggered. check_forecast_entries reloads the index from the database first, to
+pick up rows written by other processes.
+
+Before its order is sent, a crossed forecast is claimed in the database
+(status 'pending' -> 'triggering'). Only pending rows are loaded into the
+index, so a reload racing an order - or a trigger whose final update failed -
+can't send the same order twice; a row left 'triggering' had an order of
+unknown outcome and is never retried automatically. A failed order puts the
+row back to pending and is retried after FORECAST_RETRY_SECONDS, doubling per
+attempt, until FORECAST_MAX_ORDER_ATTEMPTS, when it is marked failed.
+
+revalidate_forecasts retires setups that no longer hold: pending rows older
+than FORECAST_TTL_HOURS expire, and rows whose structure broke (price through
+the stop or already at the target, H4/D1 trend flipped against them) are
+invalidated. Rows are grouped by symbol, so each symbol is fetched and its
+indicators computed once - and not at all while its M15 bar is unchanged.
+"""
+import time
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+from app.core.clock import utcnow
+from app.core.config import settings
 from app.core.logger import setup_logger
-from app.data.mt5_client import fetch_ohlcv
-from app.data.mt5_client import place_order
+from app.core.metrics import metrics
+from app.core.events import events
+from app.data.broker import get_broker
+from app.database.storage import get_storage
+from app.signals.forecast_index import forecast_index
 
-DB_PATH = "signals.db"
 logger = setup_logger("Forecast")
 
-def save_forecast_signal(signal: dict):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS forecast_signals (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        timestamp TEXT,
-        symbol TEXT,
-        timeframe TEXT,
-        direction TEXT,
-        entry REAL,
-        stop_loss REAL,
-        take_profit REAL,
-        confidence INTEGER,
-        reason TEXT,
-        triggered INTEGER DEFAULT 0
+# {forecast id: (failed order attempts, monotonic time of the next allowed attempt)}
+_order_failures: Dict[int, Tuple[int, float]] = {}
+
+
+def load_pending_forecasts() -> int:
+    """(Re)build the index from every untriggered forecast; returns the count"""
+    rows = get_storage().query("""
+    SELECT id, symbol, timeframe, direction, entry, stop_loss, take_profit, confidence
+    FROM forecast_signals WHERE triggered = 0 AND status = 'pending'
+    """, name="load_pending_forecasts")
+    forecast_index.load([dict(r) for r in rows])
+    metrics.gauge("forecast.pending", len(forecast_index))
+    return len(forecast_index)
+
+
+def _claim(forecast_id: int) -> bool:
+    """Move a pending row to 'triggering'; False if it was triggered, retired or claimed meanwhile"""
+    cursor = get_storage().execute(
+        "UPDATE forecast_signals SET status = 'triggering', updated_at = ? "
+        "WHERE id = ? AND triggered = 0 AND status = 'pending'",
+        (utcnow().isoformat(), forecast_id), name="claim_forecast"
     )
-    """)
-    c.execute("""
-    INSERT INTO forecast_signals (
-        timestamp, symbol, timeframe, direction,
-        entry, stop_loss, take_profit, confidence, reason
-    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
-        datetime.utcnow().isoformat(),
-        signal["symbol"],
-        signal["timeframe"],
-        signal["direction"],
-        signal["entry"],
-        signal["stop_loss"],
-        signal["take_profit"],
-        signal["confidence"],
-        signal["reason"]
-    ))
-    conn.commit()
-    conn.close()
+    return cursor.rowcount == 1
 
-def check_forecast_entries():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    # Ensure table exists before querying
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS forecast_signals (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        timestamp TEXT,
-        symbol TEXT,
-        timeframe TEXT,
-        direction TEXT,
-        entry REAL,
-        stop_loss REAL,
-        take_profit REAL,
-        confidence INTEGER,
-        reason TEXT,
-        triggered INTEGER DEFAULT 0
+
+def _release(forecast_id: int, status: str, reason: Optional[str] = None):
+    """Hand a claimed row back after its order failed: 'pending' to retry, 'failed' to give up"""
+    get_storage().execute(
+        "UPDATE forecast_signals SET status = ?, status_reason = ?, updated_at = ? "
+        "WHERE id = ? AND status = 'triggering'",
+        (status, reason, utcnow().isoformat(), forecast_id), name="release_forecast"
     )
-    """)
-    c.execute("SELECT * FROM forecast_signals WHERE triggered = 0")
-    rows = c.fetchall()
 
-    for row in rows:
-        id, _, symbol, timeframe, direction, entry, sl, tp, *_ = row
 
+def _mark_triggered(ids: List[int]):
+    """Persist every trigger of one price update in a single transaction"""
+    storage = get_storage()
+    with storage.transaction():
+        storage.executemany(
+            "UPDATE forecast_signals SET triggered = 1, status = 'triggered', updated_at = ? WHERE id = ?",
+            [(utcnow().isoformat(), i) for i in ids], name="mark_forecasts_triggered"
+        )
+
+
+def _order_failed(forecast: dict, symbol: str):
+    attempts = _order_failures.get(forecast["id"], (0, 0.0))[0] + 1
+    metrics.incr("forecast.order_failures")
+    if attempts >= settings.FORECAST_MAX_ORDER_ATTEMPTS:
+        _order_failures.pop(forecast["id"], None)
+        _release(forecast["id"], "failed", f"order failed {attempts} times")
+        metrics.incr("forecast.failed")
+        logger.warning(f"⚠️ Giving up on forecast {forecast['id']} for {symbol} after {attempts} failed orders")
+        return
+    _order_failures[forecast["id"]] = (
+        attempts, time.monotonic() + settings.FORECAST_RETRY_SECONDS * 2 ** (attempts - 1))
+    _release(forecast["id"], "pending")
+    forecast_index.add(forecast)
+
+
+def on_price(symbol: str, bid: float, ask: float, broker=None) -> List[dict]:
+    """Trigger every pending forecast the price has crossed; returns the executed ones"""
+    crossed = forecast_index.pop_crossed(symbol, bid, ask)
+    if not crossed:
+        return []
+    broker = broker or get_broker()
+    now = time.monotonic()
+    executed = []
+    for forecast in crossed:
+        if _order_failures.get(forecast["id"], (0, 0.0))[1] > now:
+            # Backing off after a failed order
+            forecast_index.add(forecast)
+            continue
+        try:
+            claimed = _claim(forecast["id"])
+        except Exception as e:
+            logger.error(f"Error claiming forecast {forecast['id']} for {symbol}: {e}")
+            forecast_index.add(forecast)
+            continue
+        if not claimed:
+            continue
+        direction, entry = forecast["direction"], forecast["entry"]
+        logger.info(f"Executing forecast {direction} for {symbol} at {entry}")
+        try:
+            success = broker.place_order(symbol, direction, entry, forecast["stop_loss"], forecast["take_profit"])
+        except Exception as e:
+            logger.error(f"Error executing forecast for {symbol}: {e}")
+            success = False
+        if success:
+            _order_failures.pop(forecast["id"], None)
+            executed.append(forecast)
+            events.publish("forecast_triggered", forecast)
+            continue
+        try:
+            _order_failed(forecast, symbol)
+        except Exception as e:
+            # Stays 'triggering': not retried, but never sent twice either
+            logger.error(f"Error releasing forecast {forecast['id']} for {symbol}: {e}")
+
+    if executed:
         try:
-            data = fetch_ohlcv(symbol, timeframe, bars=1)
-            current_price = data[-1]['close']
-
-            if direction == "BUY" and current_price <= entry:
-                logger.info(f"Executing forecast BUY for {symbol} at {entry}")
-                success = place_order(symbol, direction, entry, sl, tp)
-                if success:
-                    c.execute("UPDATE forecast_signals SET triggered = 1 WHERE id = ?", (id,))
-            elif direction == "SELL" and current_price >= entry:
-                logger.info(f"Executing forecast SELL for {symbol} at {entry}")
-                success = place_order(symbol, direction, entry, sl, tp)
-                if success:
-                    c.execute("UPDATE forecast_signals SET triggered = 1 WHERE id = ?", (id,))
+            _mark_triggered([f["id"] for f in executed])
         except Exception as e:
-            logger.error(f"Error checking forecast for {symbol}: {e}")
+            # The rows stay 'triggering', so no reload can trigger them again
+            logger.error(f"Error saving forecast triggers for {symbol}: {e}")
+        metrics.incr("forecast.triggered", len(executed))
+    metrics.gauge("forecast.pending", len(forecast_index))
+    return executed
+
+
+def poll_forecast_triggers() -> List[dict]:
+    """Check the latest tick of every symbol with pending forecasts"""
+    broker = get_broker()
+    executed = []
+    with metrics.timer("forecast.poll"):
+        for symbol in forecast_index.symbols():
+            try:
+                tick = broker.symbol_info_tick(symbol)
+                if tick is None:
+                    continue
+                executed += on_price(symbol, tick.bid, tick.ask, broker)
+            except Exception as e:
+                logger.error(f"Error checking forecast for {symbol}: {e}")
+    return executed
+
+
+def check_forecast_entries():
+    load_pending_forecasts()
+    return poll_forecast_triggers()
+
+
+# {symbol: (latest M15 bar time, indicator frames)} from the last revalidation
+_frames_cache: Dict[str, tuple] = {}
+
+
+def _symbol_frames(symbol: str, broker) -> Dict[str, pd.DataFrame]:
+    """Indicator frames for a symbol, recomputed only when a new M15 bar has closed"""
+    from app.data.data_utils import fetch_mtf_data
+    from app.strategies.mtf_confluence_with_d1 import compute_mtf_indicators
+
+    bar_time = broker.latest_bar_time(symbol, "M15")
+    cached = _frames_cache.get(symbol)
+    if cached and bar_time is not None and cached[0] == bar_time:
+        metrics.incr("forecast.revalidate.cache_hits")
+        return cached[1]
+    frames = compute_mtf_indicators(fetch_mtf_data(symbol))
+    _frames_cache[symbol] = (bar_time, frames)
+    return frames
+
+
+def structure_break(forecast: dict, frames: Dict[str, pd.DataFrame]) -> Optional[str]:
+    """Reason the setup no longer holds, or None while it is still valid"""
+    price = float(frames["M15"]["close"].iloc[-1])
+    h4, d1 = frames["H4"].iloc[-1], frames["D1"].iloc[-1]
+    if forecast["direction"] == "BUY":
+        if price <= forecast["stop_loss"]:
+            return f"price {price:.5f} broke below the stop {forecast['stop_loss']:.5f}"
+        if price >= forecast["take_profit"]:
+            return f"price {price:.5f} reached the target before entry"
+        if h4["ema_20"] < h4["ema_50"]:
+            return "H4 structure turned bearish"
+        if d1["ema_20"] < d1["ema_50"]:
+            return "D1 trend turned bearish"
+    else:
+        if price >= forecast["stop_loss"]:
+            return f"price {price:.5f} broke above the stop {forecast['stop_loss']:.5f}"
+        if price <= forecast["take_profit"]:
+            return f"price {price:.5f} reached the target before entry"
+        if h4["ema_20"] > h4["ema_50"]:
+            return "H4 structure turned bullish"
+        if d1["ema_20"] > d1["ema_50"]:
+            return "D1 trend turned bullish"
+    return None
+
+
+def revalidate_forecasts(ttl_hours: float = None) -> Dict[str, int]:
+    """Expire and invalidate stale pending forecasts; returns counts per outcome"""
+    ttl_hours = settings.FORECAST_TTL_HOURS if ttl_hours is None else ttl_hours
+    now = utcnow()
+    cutoff = (now - timedelta(hours=ttl_hours)).isoformat()
+
+    storage = get_storage()
+    rows = storage.query("""
+    SELECT id, timestamp, symbol, direction, entry, stop_loss, take_profit
+    FROM forecast_signals WHERE triggered = 0 AND status = 'pending'
+    """, name="pending_forecasts")
+
+    updates = []  # (status, reason, id)
+    by_symbol = defaultdict(list)
+    for row in rows:
+        if row["timestamp"] < cutoff:
+            updates.append(("expired", f"older than {ttl_hours:g}h", row["id"]))
+        elif row["direction"] in ("BUY", "SELL"):
+            by_symbol[row["symbol"]].append(dict(row))
+
+    broker = get_broker()
+    with metrics.timer("forecast.revalidate"):
+        for symbol, forecasts in by_symbol.items():
+            try:
+                frames = _symbol_frames(symbol, broker)
+            except Exception as e:
+                logger.error(f"Error revalidating forecasts for {symbol}: {e}")
+                continue
+            for forecast in forecasts:
+                reason = structure_break(forecast, frames)
+                if reason:
+                    updates.append(("invalidated", reason, forecast["id"]))
+
+    if updates:
+        # Out of the index first, so the trigger poller can't fire them meanwhile
+        for _, _, forecast_id in updates:
+            forecast_index.remove(forecast_id)
+        # One transaction; rows triggered meanwhile keep their trigger
+        with storage.transaction():
+            storage.executemany("""
+            UPDATE forecast_signals SET status = ?, status_reason = ?, updated_at = ?
+            WHERE id = ? AND triggered = 0 AND status = 'pending'
+            """, [(status, reason, now.isoformat(), forecast_id) for status, reason, forecast_id in updates],
+                name="retire_forecasts")
 
-    conn.commit()
-    conn.close()
+    counts = {"checked": len(rows), "symbols": len(by_symbol),
+              "expired": sum(1 for u in updates if u[0] == "expired"),
+              "invalidated": sum(1 for u in updates if u[0] == "invalidated")}
+    metrics.incr("forecast.expired", counts["expired"])
+    metrics.incr("forecast.invalidated", counts["invalidated"])
+    metrics.gauge("forecast.pending", len(forecast_index))
+    logger.info(f"🧹 Revalidated {counts['checked']} forecast(s) across {counts['symbols']} symbol(s): "
+                f"{counts['expired']} expired, {counts['invalidated']} invalidated")
+    return counts
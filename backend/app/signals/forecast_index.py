@@ -0,0 +1,90 @@
+"""
+In-memory index of pending forecast entries.
+
+Per symbol, pending forecasts are kept in two lists sorted by entry price:
+buys trigger once the ask falls to or below the entry, sells once the bid
+rises to or above it. So every price update finds all crossed entries with one
+binary search - O(log n) plus the entries it returns - instead of scanning
+every pending row.
+"""
+import threading
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+_INF = float("inf")
+
+
+class ForecastIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # {symbol: {"BUY": [(entry, id), ...], "SELL": [...]}} sorted by entry
+        self._sides: Dict[str, Dict[str, List[Tuple[float, int]]]] = defaultdict(lambda: {"BUY": [], "SELL": []})
+        self._forecasts: Dict[int, dict] = {}
+
+    def add(self, forecast: dict):
+        """Index one pending forecast; needs id, symbol, direction and entry"""
+        if forecast["direction"] not in ("BUY", "SELL"):
+            return
+        with self._lock:
+            if forecast["id"] in self._forecasts:
+                return
+            self._forecasts[forecast["id"]] = forecast
+            insort(self._sides[forecast["symbol"]][forecast["direction"]], (forecast["entry"], forecast["id"]))
+
+    def load(self, forecasts: List[dict]):
+        """Replace the index contents with the given pending forecasts"""
+        with self._lock:
+            self._sides.clear()
+            self._forecasts = {}
+        for forecast in forecasts:
+            self.add(forecast)
+
+    def remove(self, forecast_id: int) -> bool:
+        with self._lock:
+            forecast = self._forecasts.pop(forecast_id, None)
+            if forecast is None:
+                return False
+            side = self._sides[forecast["symbol"]][forecast["direction"]]
+            key = (forecast["entry"], forecast_id)
+            i = bisect_left(side, key)
+            if i < len(side) and side[i] == key:
+                del side[i]
+            return True
+
+    def pop_crossed(self, symbol: str, bid: float, ask: float) -> List[dict]:
+        """
+        Remove and return every forecast for the symbol whose entry the price has
+        reached. Popping under the lock means concurrent price updates can't
+        trigger the same forecast twice.
+        """
+        with self._lock:
+            sides = self._sides.get(symbol)
+            if not sides:
+                return []
+            buys, sells = sides["BUY"], sides["SELL"]
+            # Buys at or above the ask are crossed: the tail of the ascending list
+            i = bisect_left(buys, (ask, -_INF))
+            crossed = buys[i:]
+            del buys[i:]
+            # Sells at or below the bid: the head of the list
+            j = bisect_right(sells, (bid, _INF))
+            crossed += sells[:j]
+            del sells[:j]
+            return [self._forecasts.pop(forecast_id) for _, forecast_id in crossed]
+
+    def symbols(self) -> List[str]:
+        """Symbols with at least one pending forecast"""
+        with self._lock:
+            return [s for s, sides in self._sides.items() if sides["BUY"] or sides["SELL"]]
+
+    def get(self, forecast_id: int) -> dict:
+        with self._lock:
+            return self._forecasts.get(forecast_id)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._forecasts)
+
+
+forecast_index = ForecastIndex()
@@ -0,0 +1,71 @@
+"""
+Pre-trade gates evaluated before any market data is fetched.
+
+Gates run in cost order - clock-only checks first, then the single-call spread
+check, then the risk checks that query open positions and deal history - and
+stop at the first rejection. Every outcome is counted in app.core.metrics as
+gate.<name>.passed / gate.<name>.rejected.
+"""
+from typing import Dict, Any, Optional
+from app.core.metrics import metrics
+from app.strategies.market_filters import MarketConditionFilter
+from app.utils.risk_utils import ProfessionalRiskManager
+
+def _session_gate(symbol, market_filter, risk_manager):
+    if not market_filter.is_trading_session():
+        return False, "Outside major trading session - avoiding low liquidity"
+    return True, "OK"
+
+def _news_gate(symbol, market_filter, risk_manager):
+    if market_filter.is_news_time():
+        return False, "High-impact news window - avoiding volatility spike"
+    return True, "OK"
+
+def _spread_gate(symbol, market_filter, risk_manager):
+    spread_ok, spread_msg = market_filter.check_spread_conditions(symbol)
+    if not spread_ok:
+        return False, f"Execution conditions: {spread_msg}"
+    return True, "OK"
+
+def _risk_gate(symbol, market_filter, risk_manager):
+    can_trade, risk_msg = risk_manager.can_trade(symbol)
+    if not can_trade:
+        return False, f"Risk management: {risk_msg}"
+    return True, "OK"
+
+# (name, check) in ascending cost order; clock gates need no broker call
+CLOCK_GATES = [
+    ("session", _session_gate),
+    ("news", _news_gate),
+]
+GATES = CLOCK_GATES + [
+    ("spread", _spread_gate),
+    ("risk", _risk_gate),
+]
+
+def _run_gates(gates, symbol, market_filter, risk_manager) -> Optional[Dict[str, Any]]:
+    for name, check in gates:
+        with metrics.timer(f"gate.{name}"):
+            ok, reason = check(symbol, market_filter, risk_manager)
+        if not ok:
+            metrics.incr(f"gate.{name}.rejected")
+            return {
+                "symbol": symbol, "timeframe": "M15", "direction": "REJECTED",
+                "reason": reason, "gate": name
+            }
+        metrics.incr(f"gate.{name}.passed")
+    return None
+
+def evaluate_clock_gates(symbol: str = "*", market_filter: MarketConditionFilter = None) -> Optional[Dict[str, Any]]:
+    """Symbol-independent gates; a rejection here applies to the whole universe"""
+    return _run_gates(CLOCK_GATES, symbol, market_filter or MarketConditionFilter(), None)
+
+def evaluate_risk_gate(symbol: str, risk_manager: ProfessionalRiskManager = None) -> Optional[Dict[str, Any]]:
+    """Risk gate alone - re-checked by the scan coordinator right before execution"""
+    return _run_gates([("risk", _risk_gate)], symbol, None, risk_manager or ProfessionalRiskManager())
+
+def evaluate_gates(symbol: str, market_filter: MarketConditionFilter = None,
+                   risk_manager: ProfessionalRiskManager = None) -> Optional[Dict[str, Any]]:
+    """Run all gates for a symbol; returns a REJECTED signal dict, or None if it can trade"""
+    return _run_gates(GATES, symbol, market_filter or MarketConditionFilter(),
+                      risk_manager or ProfessionalRiskManager())
@@ -0,0 +1,109 @@
+"""
+Time-windowed set of recent signals.
+
+Keyed by (symbol, timeframe, direction) with the epoch of the latest signal,
+so "was this signal already sent in the last hour?" is one dict lookup however
+large the signals table grows. Entries also sit in a deque in arrival order,
+which is pruned from the head as they age out of the window and doubles as the
+newest-first feed for the /signals/recent API.
+
+recent_signals mirrors the signals table (warmed from it at startup, written
+through by save_signal); recent_alerts tracks Telegram alerts on its own, so
+the pipeline's persist-before-dispatch order can't suppress an alert. It is
+warmed from the same rows, since every saved signal was also alerted. An alert
+is claimed before it is sent and released if sending fails, so a failed send
+doesn't block the retry.
+"""
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+
+Key = Tuple[str, str, str]
+
+
+def _key(symbol: str, timeframe: str, direction: str) -> Key:
+    return symbol, timeframe, direction
+
+
+class RecentSignals:
+    def __init__(self, window_seconds: float = 3600):
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self._latest: Dict[Key, float] = {}
+        self._entries = deque()  # (epoch, key, signal), oldest first
+
+    def _prune(self, now: float):
+        cutoff = now - self.window_seconds
+        while self._entries and self._entries[0][0] < cutoff:
+            epoch, key, _ = self._entries.popleft()
+            # A newer signal for the key may still be inside the window
+            if self._latest.get(key) == epoch:
+                del self._latest[key]
+
+    def seen(self, symbol: str, timeframe: str, direction: str, now: float = None) -> bool:
+        now = time.time() if now is None else now
+        with self._lock:
+            epoch = self._latest.get(_key(symbol, timeframe, direction))
+            return epoch is not None and epoch >= now - self.window_seconds
+
+    def add(self, signal: dict, epoch: float = None):
+        epoch = time.time() if epoch is None else epoch
+        key = _key(signal["symbol"], signal["timeframe"], signal["direction"])
+        with self._lock:
+            self._prune(epoch)
+            self._latest[key] = max(epoch, self._latest.get(key, epoch))
+            self._entries.append((epoch, key, signal))
+
+    def claim(self, signal: dict, epoch: float = None) -> bool:
+        """Atomically: False if already seen in the window, else record it and return True"""
+        epoch = time.time() if epoch is None else epoch
+        key = _key(signal["symbol"], signal["timeframe"], signal["direction"])
+        with self._lock:
+            self._prune(epoch)
+            latest = self._latest.get(key)
+            if latest is not None and latest >= epoch - self.window_seconds:
+                return False
+            self._latest[key] = epoch
+            self._entries.append((epoch, key, signal))
+            return True
+
+    def release(self, signal: dict, epoch: float):
+        """Undo claim(signal, epoch), e.g. when the alert it guarded failed to send"""
+        key = _key(signal["symbol"], signal["timeframe"], signal["direction"])
+        with self._lock:
+            if self._latest.get(key) != epoch:
+                return
+            # claim() only succeeds when no earlier entry for the key is still in the window
+            del self._latest[key]
+            self._entries = deque(e for e in self._entries if not (e[0] == epoch and e[1] == key))
+
+    def warm(self, rows: List[dict], epoch_field: str = "ts_epoch"):
+        """Load rows (oldest first) from the database"""
+        with self._lock:
+            self._latest.clear()
+            self._entries.clear()
+        for row in rows:
+            self.add(row, row[epoch_field])
+
+    def recent(self, symbol: Optional[str] = None, limit: int = 100, now: float = None) -> List[dict]:
+        """Signals still inside the window, newest first"""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._prune(now)
+            out = []
+            for _, key, signal in reversed(self._entries):
+                if symbol is None or key[0] == symbol:
+                    out.append(signal)
+                    if len(out) >= limit:
+                        break
+            return out
+
+    def __len__(self):
+        with self._lock:
+            return len(self._latest)
+
+
+recent_signals = RecentSignals(settings.SIGNAL_DEDUP_MINUTES * 60)
+recent_alerts = RecentSignals(settings.SIGNAL_DEDUP_MINUTES * 60)
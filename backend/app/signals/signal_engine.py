@@ -1,86 +1,150 @@
 from app.strategies.mtf_confluence_with_d1 import detect_mtf_confluence_signal
 from app.data.data_utils import fetch_mtf_data
-from app.data.mt5_client import place_order, get_account_balance
+from app.data.broker import get_broker
 from app.utils.risk_utils import calculate_lot_size
 from app.notifications.telegram_bot import send_signal_to_telegram
-from app.database.db_utils import save_signal, save_forecast_signal
+from app.database.db_utils import save_signal, save_forecast_signal, save_trade_performance
+from app.signals.gates import evaluate_gates
+from app.signals.forecast_index import forecast_index
+from app.cluster.leader import confirm_leadership
+from app.core.metrics import metrics
+from app.core.events import events
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
-def run_all_strategies(df, symbol, timeframe):
-    """Generate signals using MTF confluence strategy"""
-    signals = []
-    
-    try:
+# One side-effect stage at a time (scheduler, /scan, batch scans): a risk check and
+# the orders it allows can't interleave with another caller's
+order_lock = threading.RLock()
+
+def analyze_symbol(symbol):
+    """
+    Gate, fetch and strategy stage for one symbol. Reads market data and account
+    state but has no side effects, so it can run in a scan worker process.
+    Returns the strategy signal, a REJECTED gate signal, or None.
+    """
+    # Gate stage: clock, session, spread and risk checks before any data is fetched
+    sig = evaluate_gates(symbol)
+
+    if sig is None:
         # For MTF analysis, we ignore the passed df and timeframe
         # and fetch all required timeframes internally
-        mtf_data = fetch_mtf_data(symbol)
+        with metrics.timer("pipeline.fetch"):
+            mtf_data = fetch_mtf_data(symbol)
 
         # Use your standard MTF confluence logic
-        sig = detect_mtf_confluence_signal(mtf_data, symbol)
-
-        if sig:
-            logger.info(f"🔍 {symbol}: {sig['direction']} signal - {sig['reason']}")
-            
-            # ✅ FIX: Only process signals with trading data (BUY/SELL)
-            if sig['direction'] in ['BUY', 'SELL']:
-                # Signal has entry/SL/TP data - proceed with trading logic
-                logger.info(f"🎯 {symbol}: Processing {sig['direction']} signal with {sig['confidence']}% confidence")
-                
-                balance = get_account_balance()
-                sl_pips = abs(sig['entry'] - sig['stop_loss']) * 10000  # adjust for 5-digit pairs
-                lot = calculate_lot_size(balance, risk_percent=1.0, sl_pips=sl_pips)
-
-                sig["lot_size"] = lot
-
-                if sig['confidence'] >= 90:
-                    logger.info(f"🚀 {symbol}: High confidence (90%+) - Executing trade")
-                    send_signal_to_telegram(sig)
-                    save_signal(sig)
-                    executed = place_order(
-                        symbol=sig['symbol'],
-                        direction=sig['direction'],
-                        entry=sig['entry'],
-                        sl=sig['stop_loss'],
-                        tp=sig['take_profit'],
-                        lot=lot
-                    )
-                    sig["executed"] = executed
-                elif sig['confidence'] >= 75:
-                    logger.info(f"✅ {symbol}: Good confidence (75%+) - Executing trade")
-                    send_signal_to_telegram(sig)
-                    save_signal(sig)
-                    executed = place_order(
-                        symbol=sig['symbol'],
-                        direction=sig['direction'],
-                        entry=sig['entry'],
-                        sl=sig['stop_loss'],
-                        tp=sig['take_profit'],
-                        lot=lot
-                    )
-                    sig["executed"] = executed
-                else:
-                    logger.info(f"📈 {symbol}: Lower confidence ({sig['confidence']}%) - Saving as forecast")
-                    save_forecast_signal(sig)
-                    sig["forecasted"] = True
-
-                signals.append(sig)
-                
-            elif sig['direction'] in ['REJECTED', 'NEUTRAL']:
-                # ✅ Handle filtered signals (no trading data)
-                logger.info(f"🚫 {symbol}: Signal filtered - {sig['reason']}")
-                # Don't save filtered signals to avoid database clutter
-                
-            else:
-                # Unknown signal type
-                logger.warning(f"❓ {symbol}: Unknown signal direction: {sig['direction']}")
-        else:
-            logger.warning(f"⚠️  {symbol}: No signal returned from strategy")
-            
+        with metrics.timer("pipeline.strategy"):
+            sig = detect_mtf_confluence_signal(mtf_data, symbol, gates_checked=True)
+    return sig
+
+def classify_signal(sig, symbol, broker=None, publish=True):
+    """
+    Size an analyzed signal and decide what to do with it: "execute" (75%+ confidence),
+    "forecast" (lower confidence) or None (filtered, neutral or missing).
+    publish=False keeps rejections off the event hub (simulated runs).
+    """
+    if not sig:
+        logger.warning(f"⚠️  {symbol}: No signal returned from strategy")
+        return None
+
+    logger.info(f"🔍 {symbol}: {sig['direction']} signal - {sig['reason']}")
+
+    # ✅ FIX: Only process signals with trading data (BUY/SELL)
+    if sig['direction'] in ['BUY', 'SELL']:
+        # Signal has entry/SL/TP data - proceed with trading logic
+        logger.info(f"🎯 {symbol}: Processing {sig['direction']} signal with {sig['confidence']}% confidence")
+
+        balance = (broker or get_broker()).account_balance()
+        sl_pips = abs(sig['entry'] - sig['stop_loss']) * 10000  # adjust for 5-digit pairs
+        lot = calculate_lot_size(balance, risk_percent=1.0, sl_pips=sl_pips)
+
+        sig["lot_size"] = lot
+
+        if sig['confidence'] >= 90:
+            logger.info(f"🚀 {symbol}: High confidence (90%+) - Executing trade")
+            return "execute"
+        if sig['confidence'] >= 75:
+            logger.info(f"✅ {symbol}: Good confidence (75%+) - Executing trade")
+            return "execute"
+        logger.info(f"📈 {symbol}: Lower confidence ({sig['confidence']}%) - Saving as forecast")
+        sig["forecasted"] = True
+        return "forecast"
+
+    if sig['direction'] in ['REJECTED', 'NEUTRAL']:
+        # ✅ Handle filtered signals (no trading data)
+        logger.info(f"🚫 {symbol}: Signal filtered - {sig['reason']}")
+        if sig['direction'] == 'REJECTED' and publish:
+            events.publish("rejection", sig)
+        # Don't save filtered signals to avoid database clutter
+    else:
+        # Unknown signal type
+        logger.warning(f"❓ {symbol}: Unknown signal direction: {sig['direction']}")
+    return None
+
+def persist_signal(sig, action):
+    if action == "execute":
+        save_signal(sig)
+        events.publish("signal", sig)
+    elif action == "forecast":
+        # Watched by the forecast trigger poller once the row is committed
+        save_forecast_signal(sig, on_saved=lambda forecast_id: forecast_index.add({**sig, "id": forecast_id}))
+        events.publish("forecast", sig)
+
+def execute_signal(sig, broker=None, persist=True, publish=True):
+    if not confirm_leadership():
+        # Cluster mode: the lease moved since this scan started - the new leader trades
+        logger.warning(f"⚠️ {sig['symbol']}: not the cluster leader - order not placed")
+        metrics.incr("cluster.orders_refused")
+        sig["executed"] = False
+        return False
+    sig["executed"] = (broker or get_broker()).place_order(
+        symbol=sig['symbol'],
+        direction=sig['direction'],
+        entry=sig['entry'],
+        sl=sig['stop_loss'],
+        tp=sig['take_profit'],
+        lot=sig['lot_size']
+    )
+    if publish:
+        events.publish("order", sig)
+    if sig["executed"] and persist:
+        # Settled to tp/sl/expired later by the scheduled resolve_open_trades job
+        save_trade_performance(sig, {"status": "unknown"})
+    return sig["executed"]
+
+def process_signal(sig, symbol, notify=True, persist=True):
+    """
+    Side-effect stage: position sizing, Telegram alert, DB writes and order placement
+    for an analyzed signal. Always runs in the coordinating process, under order_lock.
+    Events are published only for live runs (notify and persist), never for backtests.
+    """
+    with order_lock:
+        broker = get_broker()
+        publish = notify and persist
+        action = classify_signal(sig, symbol, broker, publish)
+        if action is None:
+            return []
+
+        if action == "execute" and notify:
+            send_signal_to_telegram(sig)
+        if persist:
+            persist_signal(sig, action)
+        if action == "execute":
+            execute_signal(sig, broker, persist, publish)
+        return [sig]
+
+def run_all_strategies(df, symbol, timeframe, notify=True, persist=True):
+    """
+    Generate signals using MTF confluence strategy.
+    notify/persist=False skip Telegram alerts and DB writes (used by the backtester);
+    orders always go to the active broker from app.data.broker.
+    """
+    try:
+        sig = analyze_symbol(symbol)
+        return process_signal(sig, symbol, notify=notify, persist=persist)
     except Exception as e:
         logger.error(f"❌ {symbol}: MTF strategy error - {e}")
         import traceback
         traceback.print_exc()
-
-    return signals
+        return []
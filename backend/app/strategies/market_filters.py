@@ -1,8 +1,9 @@
-import datetime
-import MetaTrader5 as mt5
+from app.core.clock import utcnow
+from app.data.broker import get_broker
 
 class MarketConditionFilter:
-    def __init__(self):
+    def __init__(self, broker=None):
+        self.broker = broker or get_broker()
         # Default spread limits for all PAIRS from constants.py
         self.spread_limits = {
             'EURUSD': 2.0, 'GBPUSD': 3.0, 'USDJPY': 2.5,
@@ -15,9 +16,9 @@ class MarketConditionFilter:
             'AUDCAD': 4.0, 'AUDCHF': 4.0, 'CADCHF': 4.0,
         }
     
-    def is_trading_session(self):
-        """Check if in major trading session"""
-        utc_now = datetime.datetime.utcnow()
+    def is_trading_session(self, now=None):
+        """Check if in major trading session (now: UTC datetime, defaults to the current time)"""
+        utc_now = now or utcnow()
         hour = utc_now.hour
         
         # Major sessions (UTC)
@@ -36,7 +37,7 @@ class MarketConditionFilter:
     
     def check_spread_conditions(self, symbol):
         """Validate execution conditions"""
-        tick = mt5.symbol_info_tick(symbol)
+        tick = self.broker.symbol_info_tick(symbol)
         if not tick:
             return False, "No market data"
         
@@ -47,15 +48,14 @@ class MarketConditionFilter:
             return False, f"Spread too wide: {spread:.1f} > {max_spread}"
         
         # Check market hours for symbol
-        symbol_info = mt5.symbol_info(symbol)
-        if not symbol_info.trade_mode == mt5.SYMBOL_TRADE_MODE_FULL:
+        if not self.broker.is_market_open(symbol):
             return False, "Market closed or restricted"
         
         return True, "OK"
     
-    def is_news_time(self):
-        """Avoid high-impact news times"""
-        utc_now = datetime.datetime.utcnow()
+    def is_news_time(self, now=None):
+        """Avoid high-impact news times (now: UTC datetime, defaults to the current time)"""
+        utc_now = now or utcnow()
         
         # Major news times (UTC) - expand this with economic calendar
         risky_times = [
@@ -1,50 +1,32 @@
 from app.indicators.enhanced_ta_engine import add_indicators
-from app.strategies.market_filters import MarketConditionFilter
-from app.utils.risk_utils import ProfessionalRiskManager
+from app.signals.gates import evaluate_gates
 from typing import Dict, Any
 import pandas as pd
 
-def detect_mtf_confluence_signal(mtf_data: Dict[str, pd.DataFrame], symbol: str) -> Dict[str, Any]:
+def detect_mtf_confluence_signal(mtf_data: Dict[str, pd.DataFrame], symbol: str, gates_checked: bool = False) -> Dict[str, Any]:
     """
     Enhanced MTF confluence with 2 accuracy improvements:
     1. Support/Resistance Levels - Avoid key level failures  
     2. Volatility Filters - Avoid choppy/news spike markets
     """
-    # Initialize professional filters
-    market_filter = MarketConditionFilter()
-    risk_manager = ProfessionalRiskManager()
-    
-    # Pre-trade professional checks
-    if not market_filter.is_trading_session():
-        return {
-            "symbol": symbol, "timeframe": "M15", "direction": "REJECTED",
-            "reason": "Outside major trading session - avoiding low liquidity"
-        }
-    
-    if market_filter.is_news_time():
-        return {
-            "symbol": symbol, "timeframe": "M15", "direction": "REJECTED", 
-            "reason": "High-impact news window - avoiding volatility spike"
-        }
-    
-    spread_ok, spread_msg = market_filter.check_spread_conditions(symbol)
-    if not spread_ok:
-        return {
-            "symbol": symbol, "timeframe": "M15", "direction": "REJECTED",
-            "reason": f"Execution conditions: {spread_msg}"
-        }
-    
-    can_trade, risk_msg = risk_manager.can_trade(symbol)
-    if not can_trade:
-        return {
-            "symbol": symbol, "timeframe": "M15", "direction": "REJECTED", 
-            "reason": f"Risk management: {risk_msg}"
-        }
-    
-    d1 = add_indicators(mtf_data['D1'])
-    h4 = add_indicators(mtf_data['H4'])
-    h1 = add_indicators(mtf_data['H1'])
-    m15 = add_indicators(mtf_data['M15'])
+    # Pre-trade professional checks (skipped when the caller already ran the gate stage)
+    if not gates_checked:
+        rejection = evaluate_gates(symbol)
+        if rejection:
+            return rejection
+
+    return score_mtf_confluence(compute_mtf_indicators(mtf_data), symbol)
+
+def compute_mtf_indicators(mtf_data: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """Indicator stage: enhanced indicators on every timeframe (the CPU-heavy part of a scan)"""
+    return {tf: add_indicators(mtf_data[tf]) for tf in ("D1", "H4", "H1", "M15")}
+
+def score_mtf_confluence(frames: Dict[str, pd.DataFrame], symbol: str) -> Dict[str, Any]:
+    """Decision stage: S/R and volatility filters plus confluence scoring on indicator frames"""
+    d1 = frames['D1']
+    h4 = frames['H4']
+    h1 = frames['H1']
+    m15 = frames['M15']
 
     d1_last = d1.iloc[-1]
     h4_last = h4.iloc[-1]
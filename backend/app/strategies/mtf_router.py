@@ -1,6 +1,7 @@
 from app.strategies.trend import trend_mtf_logic
 from app.strategies.swing import swing_mtf_logic
 from app.strategies.breakout import breakout_mtf_logic
+from app.strategies.rule_specs import RULE_SETS, get_compiled_strategy, prepare_frames
 
 def run_mtf_strategy(strategy_name, mtf_data, symbol):
     if strategy_name == "trend":
@@ -9,4 +10,8 @@ def run_mtf_strategy(strategy_name, mtf_data, symbol):
         return swing_mtf_logic(mtf_data, symbol)
     elif strategy_name == "breakout":
         return breakout_mtf_logic(mtf_data, symbol)
+    elif strategy_name in RULE_SETS:
+        # Strategies defined only as declarative rule specs
+        frames = prepare_frames(strategy_name, mtf_data)
+        return get_compiled_strategy(strategy_name).evaluate_latest(frames, symbol)
     return {}
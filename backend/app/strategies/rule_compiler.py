@@ -0,0 +1,338 @@
+"""
+Declarative scoring rules compiled into vectorized array expressions.
+
+A rule spec describes a strategy the same way trend.py, swing.py and
+breakout.py hand-code it: weighted conditions per side, a score threshold,
+a confidence ladder and ATR multiples for SL/TP. compile_rules() turns the
+spec into a CompiledStrategy whose conditions are numpy expressions, so one
+set of rules can score the last bar for live use or every bar of a history.
+
+Conditions are small Python expressions over timeframe-qualified columns:
+
+    "H4.ema_20 > H4.ema_50 > H4.ema_200"
+    "H1.macd_hist > prev(H1.macd_hist)"
+    "rolling_max(M15.high, 20) - rolling_min(M15.low, 20) < 2 * M15.atr"
+
+prev(), rolling_max() and rolling_min() are evaluated on the timeframe's own
+bars before higher timeframes are aligned onto the entry timeframe. Both the
+history and the latest-bar evaluation use closed higher-timeframe bars only.
+"""
+import ast
+from typing import Dict, Any, List, Tuple, Callable
+import numpy as np
+import pandas as pd
+from app.core.constants import TIMEFRAME_MINUTES
+
+# Functions that operate on a timeframe's native bars: name -> default arg
+SERIES_FUNCS = {"prev": 1, "rolling_max": 20, "rolling_min": 20}
+
+DIRECTION_NAMES = {1: "BUY", -1: "SELL"}
+
+
+def _shift(values: np.ndarray, n: int) -> np.ndarray:
+    out = np.full_like(values, np.nan)
+    if n < len(values):
+        out[n:] = values[:len(values) - n]
+    return out
+
+
+def _rolling(values: np.ndarray, n: int, reducer) -> np.ndarray:
+    out = np.full_like(values, np.nan)
+    if len(values) >= n:
+        windows = np.lib.stride_tricks.sliding_window_view(values, n)
+        out[n - 1:] = reducer(windows, axis=1)
+    return out
+
+
+SERIES_IMPL = {
+    "prev": _shift,
+    "rolling_max": lambda v, n: _rolling(v, n, np.max),
+    "rolling_min": lambda v, n: _rolling(v, n, np.min),
+}
+
+COMPARE_OPS = {
+    ast.Gt: np.greater, ast.GtE: np.greater_equal,
+    ast.Lt: np.less, ast.LtE: np.less_equal,
+    ast.Eq: np.equal, ast.NotEq: np.not_equal,
+}
+
+BIN_OPS = {
+    ast.Add: np.add, ast.Sub: np.subtract,
+    ast.Mult: np.multiply, ast.Div: np.divide,
+}
+
+# A column reference: (timeframe, column, function, window)
+Ref = Tuple[str, str, str, int]
+
+
+class RuleExpression:
+    """One condition compiled from its source text into a numpy closure"""
+
+    def __init__(self, source: str, timeframes: List[str], default_tf: str):
+        self.source = source
+        self.timeframes = timeframes
+        self.default_tf = default_tf
+        self.refs: set = set()
+        tree = ast.parse(source, mode="eval")
+        self._fn = self._compile(tree.body)
+
+    def __call__(self, inputs: Dict[Ref, np.ndarray]) -> np.ndarray:
+        return self._fn(inputs)
+
+    def _column_ref(self, node) -> Tuple[str, str]:
+        if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name):
+            tf = node.value.id
+            if tf not in self.timeframes:
+                raise ValueError(f"Unknown timeframe '{tf}' in rule: {self.source}")
+            return tf, node.attr
+        if isinstance(node, ast.Name):
+            return self.default_tf, node.id
+        raise ValueError(f"Expected a column reference in rule: {self.source}")
+
+    def _ref(self, ref: Ref) -> Callable:
+        self.refs.add(ref)
+        return lambda inputs: inputs[ref]
+
+    def _compile(self, node) -> Callable:
+        if isinstance(node, ast.BoolOp):
+            parts = [self._compile(v) for v in node.values]
+            reducer = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            return lambda inputs: reducer.reduce([_truth(p(inputs)) for p in parts])
+
+        if isinstance(node, ast.UnaryOp):
+            operand = self._compile(node.operand)
+            if isinstance(node.op, ast.Not):
+                return lambda inputs: np.logical_not(_truth(operand(inputs)))
+            if isinstance(node.op, ast.USub):
+                return lambda inputs: np.negative(operand(inputs))
+            raise ValueError(f"Unsupported unary operator in rule: {self.source}")
+
+        if isinstance(node, ast.Compare):
+            left = self._compile(node.left)
+            pairs = []
+            for op, comparator in zip(node.ops, node.comparators):
+                if type(op) not in COMPARE_OPS:
+                    raise ValueError(f"Unsupported comparison in rule: {self.source}")
+                pairs.append((COMPARE_OPS[type(op)], self._compile(comparator)))
+
+            def compare(inputs):
+                lhs = left(inputs)
+                result = None
+                for fn, rhs_fn in pairs:
+                    rhs = rhs_fn(inputs)
+                    step = fn(lhs, rhs)
+                    result = step if result is None else np.logical_and(result, step)
+                    lhs = rhs
+                return result
+            return compare
+
+        if isinstance(node, ast.BinOp):
+            if type(node.op) not in BIN_OPS:
+                raise ValueError(f"Unsupported operator in rule: {self.source}")
+            fn = BIN_OPS[type(node.op)]
+            left, right = self._compile(node.left), self._compile(node.right)
+            return lambda inputs: fn(left(inputs), right(inputs))
+
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+            name = node.func.id
+            if name == "abs":
+                arg = self._compile(node.args[0])
+                return lambda inputs: np.abs(arg(inputs))
+            if name in SERIES_FUNCS:
+                tf, column = self._column_ref(node.args[0])
+                window = SERIES_FUNCS[name]
+                if len(node.args) > 1:
+                    window = int(ast.literal_eval(node.args[1]))
+                return self._ref((tf, column, name, window))
+            raise ValueError(f"Unknown function '{name}' in rule: {self.source}")
+
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float, bool)):
+            value = float(node.value)
+            return lambda inputs: value
+
+        if isinstance(node, (ast.Attribute, ast.Name)):
+            tf, column = self._column_ref(node)
+            return self._ref((tf, column, "", 0))
+
+        raise ValueError(f"Unsupported syntax in rule: {self.source}")
+
+
+def _truth(values) -> np.ndarray:
+    """Truthiness that treats NaN (indicator warm-up) as False"""
+    values = np.asarray(values)
+    if values.dtype == bool:
+        return values
+    return np.nan_to_num(values, nan=0.0) != 0
+
+
+def _time_ns(frame: pd.DataFrame) -> np.ndarray:
+    times = frame['time']
+    if pd.api.types.is_numeric_dtype(times):
+        return times.to_numpy(dtype=np.int64) * 1_000_000_000
+    return times.to_numpy(dtype="datetime64[ns]").astype(np.int64)
+
+
+def _close_ns(frame: pd.DataFrame, timeframe: str) -> np.ndarray:
+    """Close time of every bar, from its open time and the timeframe length"""
+    return _time_ns(frame) + TIMEFRAME_MINUTES[timeframe] * 60_000_000_000
+
+
+class CompiledStrategy:
+    """Vectorized evaluator produced by compile_rules()"""
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.name = spec["name"]
+        self.timeframes = list(spec["timeframes"])
+        self.entry_tf = spec.get("entry_tf", self.timeframes[-1])
+        self.threshold = spec["threshold"]
+        self.exclusive = spec.get("exclusive", False)
+        self.sl_atr = spec["sl_atr"]
+        self.tp_atr = spec["tp_atr"]
+        self.price_column = spec.get("price", "close")
+        self.atr_column = spec.get("atr", "atr")
+
+        confidence = spec["confidence"]
+        self.confidence_basis = confidence.get("basis", "score")
+        self.confidence_bands = sorted(confidence["bands"], reverse=True)
+
+        compile_expr = lambda source: RuleExpression(source, self.timeframes, self.entry_tf)
+        self.require = [compile_expr(src) for src in spec.get("require", [])]
+        self.buy = [(compile_expr(src), weight) for src, weight in spec["buy"]]
+        self.sell = [(compile_expr(src), weight) for src, weight in spec["sell"]]
+        self.bonus = [(compile_expr(src), weight) for src, weight in spec.get("bonus", [])]
+        self.max_score = spec.get("max_score", sum(w for _, w in self.buy) + sum(w for _, w in self.bonus))
+
+        self.refs = {(self.entry_tf, self.price_column, "", 0), (self.entry_tf, self.atr_column, "", 0)}
+        for expr in self.require + [e for e, _ in self.buy + self.sell + self.bonus]:
+            self.refs |= expr.refs
+        # Bars of history each timeframe needs to evaluate its latest row
+        self.lookback = {tf: 1 for tf in self.timeframes}
+        for tf, _, func, window in self.refs:
+            needed = window + 1 if func == "prev" else max(window, 1)
+            self.lookback[tf] = max(self.lookback[tf], needed)
+
+    def build_inputs(self, frames: Dict[str, pd.DataFrame], latest: bool = False) -> Dict[Ref, np.ndarray]:
+        """
+        Materialize every referenced column as a float array on entry-timeframe rows.
+        Each entry row only sees higher-timeframe bars that had closed by the time
+        that row closed, so a forming H4 bar never leaks into the score. With
+        latest=True only the last entry row is built (arrays of length 1), from
+        the trailing bars each timeframe needs, under the same alignment rule.
+        """
+        entry_frame = frames[self.entry_tf]
+        alignment = {self.entry_tf: None}
+        if len(self.timeframes) > 1:
+            entry_close = _close_ns(entry_frame, self.entry_tf)
+            if latest:
+                entry_close = entry_close[-1:]
+            for tf in self.timeframes:
+                if tf != self.entry_tf:
+                    alignment[tf] = np.searchsorted(_close_ns(frames[tf], tf), entry_close, side="right") - 1
+
+        inputs = {}
+        for tf, column, func, window in self.refs:
+            frame = frames[tf]
+            index = alignment.get(tf)
+            if latest:
+                # Last bar this timeframe may contribute, counted from the front
+                end = len(frame) if index is None else int(index[0]) + 1
+                frame = frame.iloc[max(0, end - self.lookback[tf]):end]
+                index = None
+            values = frame[column].to_numpy(dtype=float)
+            if func:
+                values = SERIES_IMPL[func](values, window)
+            if latest:
+                values = values[-1:] if len(values) else np.full(1, np.nan)
+            elif index is not None:
+                aligned = np.full(len(index), np.nan)
+                valid = index >= 0
+                aligned[valid] = values[index[valid]]
+                values = aligned
+            inputs[(tf, column, func, window)] = values
+        return inputs
+
+    def _confidence(self, score: np.ndarray) -> np.ndarray:
+        basis = score / self.max_score if self.confidence_basis == "pct" else score
+        conditions = [basis >= level for level, _ in self.confidence_bands]
+        choices = [confidence for _, confidence in self.confidence_bands]
+        return np.select(conditions, choices, default=0)
+
+    def score(self, inputs: Dict[Ref, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Score every row of pre-built inputs; returns a dict of equal-length arrays"""
+        price = inputs[(self.entry_tf, self.price_column, "", 0)]
+        atr = inputs[(self.entry_tf, self.atr_column, "", 0)]
+        n = len(price)
+
+        # Index of the first failed requirement per row, -1 when all pass
+        failed_gate = np.full(n, -1, dtype=np.int16)
+        for i, expr in enumerate(self.require):
+            failed = ~_truth(np.broadcast_to(expr(inputs), (n,))) & (failed_gate < 0)
+            failed_gate[failed] = i
+
+        bonus = np.zeros(n)
+        for expr, weight in self.bonus:
+            bonus += weight * np.nan_to_num(np.broadcast_to(expr(inputs), (n,)).astype(float))
+        score_buy = bonus.copy()
+        for expr, weight in self.buy:
+            score_buy += weight * _truth(np.broadcast_to(expr(inputs), (n,)))
+        score_sell = bonus.copy()
+        for expr, weight in self.sell:
+            score_sell += weight * _truth(np.broadcast_to(expr(inputs), (n,)))
+
+        buy_confidence = self._confidence(score_buy)
+        sell_confidence = self._confidence(score_sell)
+        buy_ok = score_buy >= self.threshold
+        sell_ok = score_sell >= self.threshold
+        if self.exclusive:
+            is_buy = buy_ok & ~sell_ok & (buy_confidence > 0)
+            is_sell = sell_ok & ~buy_ok & (sell_confidence > 0)
+        else:
+            is_buy = buy_ok
+            is_sell = sell_ok & ~buy_ok
+
+        allowed = failed_gate < 0
+        direction = np.where(is_buy & allowed, 1, np.where(is_sell & allowed, -1, 0)).astype(np.int8)
+        confidence = np.where(direction == 1, buy_confidence, np.where(direction == -1, sell_confidence, 0))
+
+        return {
+            "direction": direction,
+            "score_buy": score_buy,
+            "score_sell": score_sell,
+            "confidence": confidence,
+            "failed_gate": failed_gate,
+            "entry": price,
+            "stop_loss": price - direction * self.sl_atr * atr,
+            "take_profit": price + direction * self.tp_atr * atr,
+        }
+
+    def evaluate(self, frames: Dict[str, pd.DataFrame]) -> Dict[str, np.ndarray]:
+        """Score every bar of the entry timeframe (research / backtesting)"""
+        return self.score(self.build_inputs(frames))
+
+    def evaluate_latest(self, frames: Dict[str, pd.DataFrame], symbol: str) -> Dict[str, Any]:
+        """Score only the last bar and return a signal dict like the hand-coded strategies"""
+        result = self.score(self.build_inputs(frames, latest=True))
+        direction = int(result["direction"][0])
+        if direction == 0:
+            return {}
+        side = DIRECTION_NAMES[direction]
+        score = result["score_buy"][0] if direction == 1 else result["score_sell"][0]
+        return {
+            "symbol": symbol,
+            "strategy": self.name,
+            "timeframe": self.entry_tf,
+            "direction": side,
+            "entry": float(result["entry"][0]),
+            "stop_loss": float(result["stop_loss"][0]),
+            "take_profit": float(result["take_profit"][0]),
+            "confidence": int(result["confidence"][0]),
+            "reason": f"{self.name.capitalize()} rules {side} score = {score:g}"
+        }
+
+
+def compile_rules(spec: Dict[str, Any]) -> CompiledStrategy:
+    """Validate a rule spec and compile its conditions into array expressions"""
+    for key in ("name", "timeframes", "buy", "sell", "threshold", "confidence", "sl_atr", "tp_atr"):
+        if key not in spec:
+            raise ValueError(f"Rule spec missing '{key}'")
+    return CompiledStrategy(spec)
@@ -0,0 +1,148 @@
+"""
+Rule specs for the built-in strategies, in the format read by rule_compiler.
+
+Each spec mirrors its hand-coded counterpart (trend.py, swing.py, breakout.py,
+mtf_confluence_with_d1.py) so the compiled version can score full histories.
+New strategies only need a spec added to RULE_SETS.
+"""
+from typing import Dict, Any
+from app.strategies.rule_compiler import compile_rules, CompiledStrategy
+
+# Confidence ladder shared by trend / swing / breakout: (min score, confidence)
+SCORE_LADDER = {"basis": "score", "bands": [(4, 95), (3, 80), (2, 70)]}
+
+TREND_RULES = {
+    "name": "trend",
+    "indicators": "basic",
+    "timeframes": ["D1", "H4", "H1", "M15"],
+    "entry_tf": "M15",
+    "require": ["abs(D1.ema_20 - D1.ema_50) / D1.close > 0.002"],
+    "buy": [
+        ("D1.ema_20 > D1.ema_50", 1),
+        ("H4.ema_20 > H4.ema_50 > H4.ema_200", 1),
+        ("H1.macd_hist > prev(H1.macd_hist)", 1),
+        ("M15.bullish_engulfing or M15.hammer", 1),
+    ],
+    "sell": [
+        ("D1.ema_20 < D1.ema_50", 1),
+        ("H4.ema_20 < H4.ema_50 < H4.ema_200", 1),
+        ("H1.macd_hist < prev(H1.macd_hist)", 1),
+        ("M15.bearish_engulfing", 1),
+    ],
+    "threshold": 3,
+    "confidence": SCORE_LADDER,
+    "sl_atr": 1.5,
+    "tp_atr": 3.0,
+}
+
+SWING_RULES = {
+    "name": "swing",
+    "indicators": "basic",
+    "timeframes": ["H1", "M15"],
+    "entry_tf": "M15",
+    "buy": [
+        ("M15.rsi < 30", 1),
+        ("prev(M15.stoch_k) < prev(M15.stoch_d) and M15.stoch_k > M15.stoch_d", 1),
+        ("M15.bullish_engulfing or M15.hammer", 1),
+        ("H1.sma_50 > H1.sma_200", 1),
+    ],
+    "sell": [
+        ("M15.rsi > 70", 1),
+        ("prev(M15.stoch_k) > prev(M15.stoch_d) and M15.stoch_k < M15.stoch_d", 1),
+        ("M15.bearish_engulfing", 1),
+        ("H1.sma_50 < H1.sma_200", 1),
+    ],
+    "threshold": 3,
+    "confidence": SCORE_LADDER,
+    "sl_atr": 1.2,
+    "tp_atr": 2.4,
+}
+
+BREAKOUT_RANGE_TIGHT = "rolling_max(M15.high, 20) - rolling_min(M15.low, 20) < 2 * M15.atr"
+
+BREAKOUT_RULES = {
+    "name": "breakout",
+    "indicators": "basic",
+    "timeframes": ["H4", "H1", "M15"],
+    "entry_tf": "M15",
+    "buy": [
+        (f"M15.close > M15.bb_upper and {BREAKOUT_RANGE_TIGHT}", 1),
+        ("H1.atr > prev(H1.atr, 4)", 1),
+        ("H4.atr > prev(H4.atr, 4)", 1),
+        ("H1.ema_20 > H1.ema_50", 1),
+        ("H4.ema_20 > H4.ema_50", 1),
+    ],
+    "sell": [
+        (f"M15.close < M15.bb_lower and {BREAKOUT_RANGE_TIGHT}", 1),
+        ("H1.atr > prev(H1.atr, 4)", 1),
+        ("H4.atr > prev(H4.atr, 4)", 1),
+        ("H1.ema_20 < H1.ema_50", 1),
+        ("H4.ema_20 < H4.ema_50", 1),
+    ],
+    "threshold": 3,
+    "confidence": SCORE_LADDER,
+    "sl_atr": 1.5,
+    "tp_atr": 3.0,
+}
+
+# Scoring part of detect_mtf_confluence_signal; session/news/spread/risk checks
+# depend on the live clock and broker and stay outside the rules
+MTF_CONFLUENCE_RULES = {
+    "name": "mtf_confluence",
+    "indicators": "enhanced",
+    "timeframes": ["D1", "H4", "H1", "M15"],
+    "entry_tf": "M15",
+    "require": [
+        "M15.safe_entry_zone",
+        "M15.volatility_ok",
+        "abs(D1.ema_20 - D1.ema_50) / D1.close > 0.001",
+    ],
+    "buy": [
+        ("D1.ema_20 > D1.ema_50", 2),
+        ("H4.ema_20 > H4.ema_50 > H4.ema_200", 3),
+        ("H1.macd_hist > prev(H1.macd_hist)", 2),
+        ("M15.bullish_engulfing or M15.hammer", 1),
+    ],
+    "sell": [
+        ("D1.ema_20 < D1.ema_50", 2),
+        ("H4.ema_20 < H4.ema_50 < H4.ema_200", 3),
+        ("H1.macd_hist < prev(H1.macd_hist)", 2),
+        ("M15.bearish_engulfing", 1),
+    ],
+    # 0-2 accuracy points added to both sides
+    "bonus": [("M15.accuracy_score", 1)],
+    "max_score": 10,
+    "threshold": 5,
+    "exclusive": True,
+    "confidence": {"basis": "pct", "bands": [(0.8, 80), (0.7, 70), (0.6, 60), (0.5, 50)]},
+    "sl_atr": 1.5,
+    "tp_atr": 3.0,
+}
+
+RULE_SETS: Dict[str, Dict[str, Any]] = {
+    "trend": TREND_RULES,
+    "swing": SWING_RULES,
+    "breakout": BREAKOUT_RULES,
+    "mtf_confluence": MTF_CONFLUENCE_RULES,
+}
+
+_compiled: Dict[str, CompiledStrategy] = {}
+
+
+def get_compiled_strategy(name: str) -> CompiledStrategy:
+    """Compile a registered rule set once and reuse it"""
+    if name not in _compiled:
+        if name not in RULE_SETS:
+            raise ValueError(f"Unknown rule set: {name}")
+        _compiled[name] = compile_rules(RULE_SETS[name])
+    return _compiled[name]
+
+
+def prepare_frames(name: str, mtf_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Add the indicator columns a rule set expects to each of its timeframes"""
+    spec = RULE_SETS[name]
+    if spec.get("indicators") == "enhanced":
+        from app.indicators.enhanced_ta_engine import add_indicators
+    else:
+        from app.indicators.ta_engine import add_indicators
+    return {tf: add_indicators(mtf_data[tf]) for tf in spec["timeframes"]}
@@ -1,4 +1,6 @@
-import MetaTrader5 as mt5
+from datetime import datetime, time
+from app.core.clock import utcnow
+from app.data.broker import get_broker
 
 def calculate_lot_size(balance, risk_percent, sl_pips, pip_value=10):
     """
@@ -16,7 +18,8 @@ def calculate_lot_size(balance, risk_percent, sl_pips, pip_value=10):
     return round(min(max(lot_size, 0.01), 5.0), 2)
 
 class ProfessionalRiskManager:
-    def __init__(self):
+    def __init__(self, broker=None):
+        self.broker = broker or get_broker()
         self.max_risk_per_trade = 0.02  # 2% max
         self.max_daily_loss = 0.06      # 6% daily max
         self.max_open_trades = 7        # Position limit
@@ -29,21 +32,32 @@ class ProfessionalRiskManager:
             return False, "Daily loss limit reached"
         
         # Check open positions
-        open_positions = len(mt5.positions_get())
+        open_positions = len(self.broker.positions_get())
         if open_positions >= self.max_open_trades:
             return False, "Maximum positions reached"
         
         # Check symbol-specific risk
-        symbol_positions = len(mt5.positions_get(symbol=symbol))
+        symbol_positions = len(self.broker.positions_get(symbol=symbol))
         if symbol_positions >= 2:  # Max 2 per symbol
             return False, f"Maximum positions for {symbol} reached"
         
         return True, "OK"
+
+    def get_daily_pnl(self):
+        """Today's realized P&L as a fraction of account balance (negative = loss)"""
+        account = self.broker.account_info()
+        if not account or not account.balance:
+            return 0.0
+        now = utcnow()
+        day_start = datetime.combine(now.date(), time.min)
+        deals = self.broker.history_deals_get(day_start, now)
+        profit = sum(deal.profit + deal.commission + deal.swap for deal in deals)
+        return profit / account.balance
     
     def calculate_position_size(self, account_balance, sl_pips, symbol):
         """Professional position sizing"""
         # Account for broker margins and leverage
-        symbol_info = mt5.symbol_info(symbol)
+        symbol_info = self.broker.symbol_info(symbol)
         if not symbol_info:
             return 0.01  # Minimum fallback
             
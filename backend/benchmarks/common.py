@@ -0,0 +1,111 @@
+"""
+Shared helpers for the benchmark suite: synthetic bars, timing and baseline comparison.
+"""
+import json
+import platform
+import statistics
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Any
+import numpy as np
+import pandas as pd
+from app.core.constants import TIMEFRAME_MINUTES
+
+# Replay end time for synthetic histories: a Tuesday inside the London session,
+# clear of the news windows, so clock gates pass
+DEFAULT_END = datetime(2024, 3, 5, 10, 0)
+
+
+def synthetic_bars(n: int, minutes: int, seed: int = 0, end: datetime = DEFAULT_END) -> pd.DataFrame:
+    """Random-walk OHLC bars ending at `end` (bar open times) in the fetch_mtf_data frame layout"""
+    rng = np.random.default_rng(seed)
+    time_index = pd.date_range(end=end - pd.Timedelta(minutes=minutes), periods=n, freq=f"{minutes}min")
+    close = 1.1 + np.cumsum(rng.normal(0, 0.0008 * np.sqrt(minutes / 15), n))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) + np.abs(rng.normal(0, 0.0004, n))
+    low = np.minimum(open_, close) - np.abs(rng.normal(0, 0.0004, n))
+    return pd.DataFrame({
+        "time": time_index, "open": open_, "high": high, "low": low, "close": close,
+        "tick_volume": rng.integers(100, 1000, n), "spread": 2, "real_volume": 0,
+    })
+
+
+def synthetic_mtf(bars: int = 250, seed: int = 0, end: datetime = DEFAULT_END) -> Dict[str, pd.DataFrame]:
+    return {tf: synthetic_bars(bars, TIMEFRAME_MINUTES[tf], seed + i, end)
+            for i, tf in enumerate(["D1", "H4", "H1", "M15"])}
+
+
+def synthetic_rates(n: int, seed: int = 0) -> np.ndarray:
+    """Structured array shaped like MetaTrader5.copy_rates_from_pos output"""
+    df = synthetic_bars(n, 15, seed)
+    rates = np.zeros(n, dtype=[("time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"),
+                               ("close", "<f8"), ("tick_volume", "<u8"), ("spread", "<i4"),
+                               ("real_volume", "<u8")])
+    rates["time"] = df["time"].to_numpy(dtype="datetime64[s]").astype(np.int64)
+    for column in ("open", "high", "low", "close", "tick_volume"):
+        rates[column] = df[column].to_numpy()
+    return rates
+
+
+def measure(name: str, fn: Callable[[Any], Any], setup: Callable[[], Any] = lambda: None,
+            repeat: int = 5, **meta) -> Dict[str, Any]:
+    """Time fn(setup()) `repeat` times; setup runs outside the timed region"""
+    timings = []
+    for _ in range(repeat):
+        arg = setup()
+        start = time.perf_counter()
+        fn(arg)
+        timings.append(time.perf_counter() - start)
+    return {
+        "name": name,
+        "repeat": repeat,
+        "min_ms": min(timings) * 1000,
+        "median_ms": statistics.median(timings) * 1000,
+        "mean_ms": statistics.fmean(timings) * 1000,
+        **meta,
+    }
+
+
+def repeats_for(bars: int) -> int:
+    if bars >= 1_000_000:
+        return 3
+    if bars >= 10_000:
+        return 5
+    return 30
+
+
+def write_results(results: List[Dict[str, Any]], path: str):
+    payload = {
+        "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2)
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str, threshold: float = 0.15) -> List[Dict[str, Any]]:
+    """
+    Compare best-of-N timings (least sensitive to machine noise) with a stored results file.
+    Returns one row per benchmark present in both, flagged when slower than
+    baseline by more than `threshold` (fractional).
+    """
+    with open(baseline_path) as f:
+        baseline = {r["name"]: r for r in json.load(f)["results"]}
+    rows = []
+    for result in results:
+        base = baseline.get(result["name"])
+        if base is None:
+            continue
+        ratio = result["min_ms"] / base["min_ms"] if base["min_ms"] else float("inf")
+        rows.append({
+            "name": result["name"],
+            "baseline_ms": base["min_ms"],
+            "current_ms": result["min_ms"],
+            "ratio": ratio,
+            "regression": ratio > 1 + threshold,
+        })
+    return rows
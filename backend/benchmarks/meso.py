@@ -0,0 +1,25 @@
+"""
+Meso benchmark: one symbol's MTF evaluation (indicators on four timeframes plus
+confluence scoring), on the same 250-bar frames a live scan works with.
+"""
+from typing import List, Dict, Any
+from app.strategies.mtf_confluence_with_d1 import detect_mtf_confluence_signal
+from app.strategies.rule_specs import get_compiled_strategy, prepare_frames
+from benchmarks.common import measure, synthetic_mtf
+
+
+def _copy_frames(mtf_data):
+    return {tf: df.copy() for tf, df in mtf_data.items()}
+
+
+def run(mtf_data=None, symbol: str = "EURUSD", repeat: int = 20) -> List[Dict[str, Any]]:
+    mtf_data = mtf_data or synthetic_mtf(250)
+    compiled = get_compiled_strategy("mtf_confluence")
+    return [
+        measure("meso.detect_mtf_confluence_signal",
+                lambda frames: detect_mtf_confluence_signal(frames, symbol, gates_checked=True),
+                lambda: _copy_frames(mtf_data), repeat=repeat, level="meso", symbol=symbol),
+        measure("meso.rule_spec.evaluate_latest",
+                lambda frames: compiled.evaluate_latest(prepare_frames("mtf_confluence", frames), symbol),
+                lambda: _copy_frames(mtf_data), repeat=repeat, level="meso", symbol=symbol),
+    ]
@@ -0,0 +1,47 @@
+"""
+Micro benchmarks: every indicator and candlestick pattern function, plus the
+MT5 rates conversion and DataFrame build done on each fetch.
+"""
+from typing import List, Dict, Any
+import pandas as pd
+from app.data.data_utils import rates_to_ohlcv
+from app.indicators import ta_engine, enhanced_ta_engine
+from benchmarks.common import measure, repeats_for, synthetic_bars, synthetic_rates
+
+SIZES = [250, 10_000, 1_000_000]
+
+# name -> function taking an OHLC frame (called on a fresh copy each run)
+FRAME_CASES = {
+    "ta_engine.add_indicators": ta_engine.add_indicators,
+    "ta_engine.add_candlestick_patterns": ta_engine.add_candlestick_patterns,
+    "enhanced_ta_engine.add_indicators": enhanced_ta_engine.add_indicators,
+    "enhanced_ta_engine.add_supertrend": enhanced_ta_engine.add_supertrend,
+    "enhanced_ta_engine.calculate_atr": enhanced_ta_engine.calculate_atr,
+    "enhanced_ta_engine.add_candlestick_patterns": enhanced_ta_engine.add_candlestick_patterns,
+}
+
+
+def _to_frame(raw):
+    df = pd.DataFrame(raw)
+    df['time'] = pd.to_datetime(df['time'], unit='s')
+    return df
+
+
+def run(sizes: List[int] = None, only: str = None) -> List[Dict[str, Any]]:
+    """Run every case at each size; `only` keeps cases whose name contains it"""
+    results = []
+    for n in sizes or SIZES:
+        bars = synthetic_bars(n, 15)
+        rates = synthetic_rates(n)
+        raw = rates_to_ohlcv(rates)
+        cases = [(name, fn, bars.copy) for name, fn in FRAME_CASES.items()]
+        cases += [
+            ("fetch.rates_to_ohlcv", rates_to_ohlcv, lambda: rates),
+            ("fetch.to_frame", _to_frame, lambda: raw),
+        ]
+        for name, fn, setup in cases:
+            if only and only not in name:
+                continue
+            results.append(measure(f"micro.{name}[{n}]", fn, setup, repeat=repeats_for(n),
+                                   level="micro", bars=n))
+    return results
@@ -0,0 +1,83 @@
+"""
+Benchmark suite for the scan hot paths.
+
+    micro  - each indicator / pattern function at 250, 10k and 1M bars, MT5 rates conversion
+    meso   - one symbol's MTF confluence evaluation
+    macro  - a full scan_all over PAIRS against a simulated broker
+
+Runs offline on synthetic bars, or on recorded <SYMBOL>_<TF>.csv files with --data-dir.
+
+Usage (from backend/):
+    python -m benchmarks.run --out baseline.json
+    python -m benchmarks.run --out current.json --compare baseline.json --threshold 0.15
+
+With --compare the exit status is 1 when any benchmark's best time is slower than
+the baseline by more than the threshold.
+"""
+import argparse
+import sys
+import pandas as pd
+from app.core.logger import setup_logger
+from benchmarks import micro, meso, macro
+from benchmarks.common import compare, write_results
+
+logger = setup_logger("Benchmarks")
+
+LEVELS = ["micro", "meso", "macro"]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Indicator, strategy and scan benchmarks")
+    parser.add_argument("--level", nargs="+", choices=LEVELS, default=LEVELS)
+    parser.add_argument("--sizes", nargs="+", type=int, default=micro.SIZES, help="Micro benchmark bar counts")
+    parser.add_argument("--only", help="Micro benchmarks whose name contains this string")
+    parser.add_argument("--data-dir", help="Recorded bars (<SYMBOL>_<TF>.csv) instead of synthetic data")
+    parser.add_argument("--symbols", nargs="+", default=["EURUSD"], help="Recorded symbols to load")
+    parser.add_argument("--out", default="benchmark_results.json")
+    parser.add_argument("--compare", metavar="BASELINE", help="Results file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed slowdown, as a fraction")
+    args = parser.parse_args()
+
+    history = None
+    if args.data_dir:
+        from app.backtest.optimizer import load_csv_history
+        # Keep the 300 most recent bars: enough for 250-bar fetches
+        history = {symbol: {tf: df.tail(300).reset_index(drop=True)
+                            for tf, df in load_csv_history(args.data_dir, symbol).items()}
+                   for symbol in args.symbols}
+
+    results = []
+    first = next(iter(history.values())) if history else None
+    if "micro" in args.level:
+        results += micro.run(args.sizes, args.only)
+    if "meso" in args.level:
+        results += meso.run({tf: df.tail(250).reset_index(drop=True) for tf, df in first.items()} if first else None)
+    if "macro" in args.level:
+        if history:
+            # Scan right after the last recorded M15 bar closes
+            end = (first["M15"]['time'].iloc[-1] + pd.Timedelta(minutes=15)).to_pydatetime()
+            results += macro.run(history, end=end)
+        else:
+            results += macro.run()
+
+    for r in results:
+        logger.info(f"{r['name']:<60} median {r['median_ms']:10.2f} ms  min {r['min_ms']:10.2f} ms")
+    write_results(results, args.out)
+    logger.info(f"Wrote {len(results)} results to {args.out}")
+
+    if args.compare:
+        rows = compare(results, args.compare, args.threshold)
+        regressions = [row for row in rows if row["regression"]]
+        for row in rows:
+            flag = "REGRESSION" if row["regression"] else "ok"
+            logger.info(f"{row['name']:<60} {row['baseline_ms']:10.2f} -> {row['current_ms']:10.2f} ms "
+                        f"({row['ratio']:.2f}x) {flag}")
+        if regressions:
+            logger.error(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+            return 1
+        logger.info("No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
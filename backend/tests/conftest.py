@@ -0,0 +1,35 @@
+import os
+import sys
+import pytest
+
+# Tests run from backend/ (python -m pytest); make `app` and `benchmarks` importable from anywhere
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def storage(tmp_path):
+    """A fresh, migrated signals database for the test"""
+    from app.database.db_utils import init_db
+    from app.database.storage import set_storage
+    db = set_storage(str(tmp_path / "signals.db"))
+    init_db()
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def sim_broker():
+    """SimulatedBroker over two synthetic symbols, installed as the process broker"""
+    from app.backtest.broker import SimulatedBroker
+    from app.core.clock import SimulatedClock, SystemClock, set_clock
+    from app.data.broker import MT5Broker, set_broker
+    from benchmarks.common import DEFAULT_END, synthetic_mtf
+
+    history = {"EURUSD": synthetic_mtf(300, seed=1), "GBPUSD": synthetic_mtf(300, seed=2)}
+    clock = SimulatedClock(DEFAULT_END)
+    set_clock(clock)
+    broker = SimulatedBroker(history, clock=clock)
+    set_broker(broker)
+    yield broker
+    set_broker(MT5Broker())
+    set_clock(SystemClock())
@@ -0,0 +1,69 @@
+import pytest
+from app.database import analytics
+from app.database.analytics import aggregates, load_aggregates, rebuild
+from app.database.db_utils import save_signal, save_trade_performance
+from app.database.write_behind import write_queue
+from app.signals.recent_signals import recent_signals
+
+
+@pytest.fixture
+def empty(storage):
+    recent_signals.warm([])
+    load_aggregates()
+    yield storage
+    write_queue.stop()
+    recent_signals.warm([])
+
+
+def signal(symbol="EURUSD", direction="BUY", confidence=85, strategy="trend"):
+    return {"symbol": symbol, "timeframe": "M15", "direction": direction, "entry": 1.1000, "stop_loss": 1.0950,
+            "take_profit": 1.1100, "confidence": confidence, "reason": "test", "strategy": strategy}
+
+
+def table(storage):
+    return sorted(tuple(r) for r in storage.query("SELECT * FROM analytics_daily"))
+
+
+def test_counts_follow_saved_rows(empty):
+    save_signal(signal())
+    save_signal(signal("GBPUSD", confidence=65))
+    save_trade_performance(signal(), {"status": "unknown"})
+    by_symbol = {row["symbol"]: row for row in aggregates.summary(["symbol"])}
+    assert by_symbol["EURUSD"]["signals"] == 1 and by_symbol["EURUSD"]["trades"] == 1
+    assert by_symbol["EURUSD"]["avg_rr"] == pytest.approx(2.0)
+    assert by_symbol["GBPUSD"]["signals"] == 1
+    assert {row["tier"] for row in aggregates.summary(["tier"])} == {"high", "medium"}
+
+
+def test_mirror_matches_the_table_and_a_rebuild(empty):
+    for i, symbol in enumerate(("EURUSD", "GBPUSD", "USDJPY")):
+        save_signal(signal(symbol, confidence=50 + 15 * i))
+        save_trade_performance(signal(symbol), {"status": "unknown"})
+    live = aggregates.summary(["symbol", "strategy", "tier"])
+    stored = table(empty)
+    load_aggregates()
+    assert aggregates.summary(["symbol", "strategy", "tier"]) == live
+    rebuild()
+    assert aggregates.summary(["symbol", "strategy", "tier"]) == live
+    assert table(empty) == stored
+
+
+def test_mirror_waits_for_the_commit(empty, monkeypatch):
+    monkeypatch.setattr(write_queue, "flush_interval", 60)
+    write_queue.start()
+    save_signal(signal())
+    assert aggregates.summary(["symbol"]) == []
+    assert write_queue.flush()
+    assert aggregates.summary(["symbol"])[0]["signals"] == 1
+
+
+def test_failed_upsert_is_not_mirrored(empty, monkeypatch):
+    monkeypatch.setattr(analytics, "UPSERT_SQL", "INSERT INTO no_such_table VALUES (?)")
+    save_signal(signal())
+    assert aggregates.summary(["symbol"]) == []
+    assert empty.query_one("SELECT COUNT(*) FROM signals")[0] == 1
+
+
+def test_unknown_dimension_is_rejected():
+    with pytest.raises(ValueError):
+        aggregates.summary(["weekday"])
@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+import pytest
+from app.backtest.broker import SimulatedBroker
+from app.backtest.engine import BacktestEngine
+from app.core.clock import SimulatedClock, SystemClock, get_clock
+from app.data.broker import MT5Broker, get_broker
+from app.signals import signal_engine
+from benchmarks.common import DEFAULT_END, synthetic_mtf
+
+
+@pytest.fixture
+def broker():
+    clock = SimulatedClock(DEFAULT_END - timedelta(hours=2))
+    return SimulatedBroker({"EURUSD": synthetic_mtf(100, seed=4)}, clock=clock,
+                           spread_pips=1.0, slippage_pips=0.5, commission_per_lot=7.0)
+
+
+def test_only_closed_bars_are_visible(broker):
+    rates = broker.fetch_rates("EURUSD", "M15", 500)
+    last_open = datetime.utcfromtimestamp(rates[-1]["time"])
+    assert last_open + timedelta(minutes=15) <= broker.clock.now() < last_open + timedelta(minutes=30)
+    h4 = broker.fetch_rates("EURUSD", "H4", 500)
+    assert datetime.utcfromtimestamp(h4[-1]["time"]) + timedelta(hours=4) <= broker.clock.now()
+    broker.clock.advance(timedelta(minutes=14))
+    assert broker.fetch_rates("EURUSD", "M15", 500)[-1] == rates[-1]
+    broker.clock.advance(timedelta(minutes=1))
+    assert broker.fetch_rates("EURUSD", "M15", 500)[-1]["time"] == rates[-1]["time"] + 900
+
+
+def test_fills_pay_spread_and_slippage(broker):
+    tick = broker.symbol_info_tick("EURUSD")
+    assert tick.ask == pytest.approx(tick.bid + 0.0001)
+    broker.place_order("EURUSD", "BUY", tick.ask, tick.bid - 0.01, tick.bid + 0.01, lot=1.0)
+    broker.place_order("EURUSD", "SELL", tick.bid, tick.bid + 0.01, tick.bid - 0.01, lot=1.0)
+    buy, sell = broker.positions_get("EURUSD")
+    assert buy.price_open == pytest.approx(tick.ask + 0.00005)
+    assert sell.price_open == pytest.approx(tick.bid - 0.00005)
+
+
+def test_positions_close_on_later_bars_with_stop_winning_ties(broker):
+    series = broker.bars[("EURUSD", "M15")]
+    index = broker._visible("EURUSD", "M15")
+    high, low = series["high"][index], series["low"][index]
+    broker.place_order("EURUSD", "BUY", 0, sl=low, tp=high, lot=1.0)     # both touched by the next bar
+    broker.place_order("EURUSD", "BUY", 0, sl=low - 1, tp=high, lot=1.0)
+    broker.on_bar("EURUSD", index - 1)  # bars that closed before the fill don't count
+    assert len(broker.positions) == 2
+    balance = broker.balance
+    broker.on_bar("EURUSD", index)
+    assert [d.reason for d in broker.deals] == ["sl", "tp"] and not broker.positions
+    stop, target = broker.deals
+    assert stop.r_multiple < -1 and target.price_close == pytest.approx(high)
+    assert broker.balance == pytest.approx(balance + sum(d.profit + d.commission for d in broker.deals))
+    assert stop.commission == -7.0
+
+
+def test_replay_evaluates_at_the_cadence_on_closed_bars_and_restores_globals(monkeypatch):
+    evaluations = []
+
+    def fake_strategy(df, symbol, timeframe, notify=True, persist=True):
+        broker = get_broker()
+        now = broker.clock.now()
+        last = broker.fetch_rates(symbol, "M15", 1)[-1]
+        assert datetime.utcfromtimestamp(last["time"]) + timedelta(minutes=15) == now
+        assert not notify and not persist
+        evaluations.append(now)
+        if len(evaluations) == 1:
+            tick = broker.symbol_info_tick(symbol)
+            broker.place_order(symbol, "BUY", tick.ask, tick.bid - 0.05, tick.bid + 0.05, lot=0.1)
+            return [{"symbol": symbol, "direction": "BUY"}]
+        return []
+
+    monkeypatch.setattr(signal_engine, "run_all_strategies", fake_strategy)
+    previous_clock, previous_broker = get_clock(), get_broker()
+    engine = BacktestEngine({"EURUSD": synthetic_mtf(100, seed=4)}, start=DEFAULT_END - timedelta(hours=10),
+                            prefilter=False, cadence_minutes=60)
+    result = engine.run()
+
+    # start and end are inclusive: closes 00:00 .. 10:00
+    assert len(evaluations) == 11 and all(t.minute == 0 for t in evaluations)
+    assert result["stats"]["evaluations"] == 11 and result["stats"]["bars"] == 41
+    assert result["stats"]["signals"] == 1 and result["stats"]["trades"] == 1
+    # The open position is closed at the end of the replay
+    assert result["trades"]["reason"].tolist() == ["end"]
+    assert get_clock() is previous_clock and get_broker() is previous_broker
+    assert isinstance(previous_clock, SystemClock) and isinstance(previous_broker, MT5Broker)
+
+
+def test_replay_runs_the_live_strategy_path():
+    history = {"EURUSD": synthetic_mtf(400, seed=7)}
+    result = BacktestEngine(history, start=DEFAULT_END - timedelta(days=2)).run()
+    stats = result["stats"]
+    assert stats["evaluations"] <= stats["bars"] // 2
+    assert stats["trades"] == len(result["trades"])
+    if stats["trades"]:
+        net = result["trades"]["profit"] + result["trades"]["commission"]
+        assert stats["final_balance"] == pytest.approx(10000 + net.sum())
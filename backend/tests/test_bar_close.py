@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+import pytest
+from app.scheduler import jobs
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(jobs, "_seen_bar_time", {})
+    monkeypatch.setattr(jobs, "_last_bar_time", {})
+    monkeypatch.setattr(jobs, "_deferred", [])
+
+
+def test_closed_timeframes_at_boundaries():
+    assert jobs.closed_timeframes(datetime(2024, 3, 5, 10, 15)) == ["M15"]
+    assert jobs.closed_timeframes(datetime(2024, 3, 5, 11, 0)) == ["M15", "H1"]
+    assert jobs.closed_timeframes(datetime(2024, 3, 5, 12, 0)) == ["M15", "H1", "H4"]
+    assert jobs.closed_timeframes(datetime(2024, 3, 5, 0, 0)) == ["M15", "H1", "H4", "D1"]
+    assert jobs.closed_timeframes(datetime(2024, 3, 5, 10, 7)) == []
+
+
+def test_only_symbols_with_a_new_bar_are_returned(sim_broker):
+    pairs = ["EURUSD", "GBPUSD"]
+    sim_broker.clock.advance(timedelta(minutes=-15))
+    assert jobs.symbols_with_new_bars(pairs) == pairs
+    # Still new until a scan has covered the bar
+    assert jobs.symbols_with_new_bars(pairs) == pairs
+    jobs.record_scanned(pairs)
+    assert jobs.symbols_with_new_bars(pairs) == []
+    sim_broker.clock.advance(timedelta(minutes=10))
+    assert jobs.symbols_with_new_bars(pairs) == []
+    sim_broker.clock.advance(timedelta(minutes=5))
+    assert jobs.symbols_with_new_bars(pairs) == pairs
+
+
+def test_closed_market_is_skipped(sim_broker):
+    # The synthetic history ends at the clock; half an hour later no new bar has closed
+    sim_broker.clock.advance(timedelta(minutes=31))
+    assert jobs.symbols_with_new_bars(["EURUSD"]) == []
+
+
+def test_bar_close_job_scans_new_and_deferred_symbols(sim_broker, monkeypatch):
+    scanned = []
+    monkeypatch.setattr(jobs, "PAIRS", ["EURUSD", "GBPUSD"])
+    monkeypatch.setattr(jobs, "scan_all", lambda pairs, deadline_seconds=None: scanned.append(pairs) or pairs)
+    jobs.scan_new_bars()
+    jobs.scan_new_bars()
+    monkeypatch.setattr(jobs, "_deferred", ["USDJPY"])
+    jobs.scan_new_bars(deadline_seconds=60)
+    assert scanned == [["EURUSD", "GBPUSD"], ["USDJPY"]]
+
+
+def test_failed_and_deferred_pairs_are_checked_again(sim_broker, monkeypatch):
+    scanned = []
+    monkeypatch.setattr(jobs, "PAIRS", ["EURUSD", "GBPUSD"])
+
+    def scan(pairs, deadline_seconds=None):
+        scanned.append(pairs)
+        return pairs[:1] if len(scanned) == 1 else pairs
+
+    monkeypatch.setattr(jobs, "scan_all", scan)
+    jobs.scan_new_bars()
+    jobs.scan_new_bars()
+    jobs.scan_new_bars()
+    assert scanned == [["EURUSD", "GBPUSD"], ["GBPUSD"]]
+
+
+def test_scan_reports_only_completed_pairs(monkeypatch):
+    monkeypatch.setattr(jobs, "evaluate_clock_gates", lambda: None)
+
+    def analysis(pair):
+        if pair == "GBPUSD":
+            raise RuntimeError("broker down")
+        return None
+
+    monkeypatch.setattr(jobs, "analyze_symbol", analysis)
+    assert jobs.scan_all(["EURUSD", "GBPUSD", "USDJPY"]) == ["EURUSD", "USDJPY"]
+
+
+def test_deferred_pairs_go_first():
+    jobs._deferred.extend(["GBPUSD", "XAUUSD"])
+    assert jobs.prioritize(["EURUSD", "GBPUSD", "USDJPY"]) == ["GBPUSD", "EURUSD", "USDJPY"]
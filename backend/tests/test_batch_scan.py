@@ -0,0 +1,105 @@
+import asyncio
+import json
+import threading
+import pytest
+from fastapi import HTTPException
+from app.api.batch_scan import apply_signal, batch_limiter, parse_symbols, stream_scan
+from app.api.routes import scan_batch
+from app.backtest.broker import SimulatedBroker
+from app.core.config import settings
+from app.data.broker import set_broker
+from app.signals.signal_engine import order_lock
+from benchmarks.common import synthetic_mtf
+
+
+@pytest.fixture
+def offline(storage, sim_broker, monkeypatch):
+    monkeypatch.setattr(settings, "TELEGRAM_BOT_TOKEN", "")
+    # Seed 6 ends on an 80% SELL (executed by a live scan), seed 3 on nothing
+    history = {"EURUSD": synthetic_mtf(300, seed=6), "GBPUSD": synthetic_mtf(300, seed=3)}
+    broker = SimulatedBroker(history, clock=sim_broker.clock)
+    set_broker(broker)
+    return broker
+
+
+def collect(symbols, strategies, analysis_only=True):
+    async def run():
+        return [json.loads(line) async for line in stream_scan(symbols, strategies, analysis_only)]
+    return asyncio.run(run())
+
+
+def test_symbols_are_deduplicated_and_all_expands():
+    assert parse_symbols(" eurusd,GBPUSD,,EURUSD ") == ["EURUSD", "GBPUSD"]
+    assert len(parse_symbols("ALL")) == len(set(parse_symbols("all"))) > 2
+
+
+def test_one_line_per_symbol_then_a_summary(offline, storage):
+    lines = collect(["EURUSD", "GBPUSD", "NOPE"], ["mtf_confluence", "trend"])
+    *results, summary = lines
+    assert summary["done"] and summary["symbols"] == 3 and summary["errors"] == 1
+    by_symbol = {r["symbol"]: r for r in results}
+    assert set(by_symbol) == {"EURUSD", "GBPUSD", "NOPE"}
+    assert "error" in by_symbol["NOPE"]
+    assert set(by_symbol["EURUSD"]["signals"]) == {"mtf_confluence", "trend"}
+    assert by_symbol["EURUSD"]["signals"]["mtf_confluence"]["direction"] == "SELL"
+    # Analysis only: nothing alerted, saved or ordered
+    assert "execution" not in by_symbol["EURUSD"]
+    assert offline.positions_get() == ()
+    assert storage.query_one("SELECT COUNT(*) FROM signals")[0] == 0
+
+
+def test_execution_handles_the_primary_signal_like_scan(offline, storage):
+    lines = collect(["EURUSD", "GBPUSD"], ["mtf_confluence"], analysis_only=False)
+    by_symbol = {r["symbol"]: r for r in lines[:-1]}
+    assert by_symbol["EURUSD"]["execution"] == {"processed": True, "executed": True}
+    assert "execution" not in by_symbol["GBPUSD"]
+    assert [p.symbol for p in offline.positions_get()] == ["EURUSD"]
+    assert storage.query_one("SELECT symbol, direction FROM signals")[:] == ("EURUSD", "SELL")
+
+
+@pytest.mark.parametrize("kwargs, status", [
+    ({"strategies": "mtf_confluence,astrology"}, 400),
+    ({"strategies": ""}, 400),
+    ({"symbols": " , "}, 400),
+])
+def test_bad_requests_are_rejected(kwargs, status):
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(scan_batch(**kwargs))
+    assert error.value.status_code == status
+
+
+def test_the_slot_is_taken_before_streaming_and_freed_when_the_stream_ends(offline, monkeypatch):
+    monkeypatch.setattr(batch_limiter, "_semaphore", None)
+    monkeypatch.setattr(batch_limiter, "concurrency", 1)
+    monkeypatch.setattr(batch_limiter, "timeout", 0.05)
+
+    async def run():
+        response = await scan_batch(symbols="GBPUSD")
+        assert batch_limiter.full()
+        with pytest.raises(HTTPException) as error:
+            await scan_batch(symbols="GBPUSD")
+        assert error.value.status_code == 503
+        lines = [json.loads(line) async for line in response.body_iterator]
+        assert lines[-1]["done"] and not batch_limiter.full()
+        # A response never streamed gives its slot back through the background task
+        unstarted = await scan_batch(symbols="GBPUSD")
+        await unstarted.background()
+        assert not batch_limiter.full()
+
+    asyncio.run(run())
+
+
+def test_execution_waits_for_the_shared_order_lock(offline):
+    executed = threading.Event()
+    sig = {"symbol": "EURUSD", "direction": "NEUTRAL", "reason": "test"}
+
+    def execute():
+        apply_signal(sig, "EURUSD")
+        executed.set()
+
+    with order_lock:
+        worker = threading.Thread(target=execute)
+        worker.start()
+        assert not executed.wait(0.1)
+    worker.join(1)
+    assert executed.is_set()
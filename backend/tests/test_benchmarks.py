@@ -0,0 +1,64 @@
+import json
+import sys
+import numpy as np
+import pytest
+from app.core.clock import SystemClock, get_clock
+from app.data.broker import MT5Broker, get_broker
+from app.database.storage import get_storage
+from benchmarks import macro, meso, micro, run
+from benchmarks.common import compare, measure, synthetic_bars, synthetic_rates, write_results
+
+
+def test_synthetic_bars_are_valid_ohlc():
+    bars = synthetic_bars(500, 60, seed=3)
+    assert len(bars) == 500 and bars["time"].diff().dropna().eq("60min").all()
+    assert (bars["high"] >= bars[["open", "close"]].max(axis=1)).all()
+    assert (bars["low"] <= bars[["open", "close"]].min(axis=1)).all()
+    rates = synthetic_rates(50)
+    assert rates.dtype.names[:5] == ("time", "open", "high", "low", "close")
+    assert np.all(np.diff(rates["time"]) == 900)
+
+
+def test_compare_flags_only_slowdowns_past_the_threshold(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    write_results([{"name": "a", "min_ms": 10.0}, {"name": "b", "min_ms": 10.0}, {"name": "gone", "min_ms": 1.0}],
+                  str(baseline))
+    assert json.loads(baseline.read_text())["python"]
+    rows = compare([{"name": "a", "min_ms": 11.0}, {"name": "b", "min_ms": 12.0}, {"name": "new", "min_ms": 1.0}],
+                   str(baseline), threshold=0.15)
+    assert [(r["name"], r["regression"]) for r in rows] == [("a", False), ("b", True)]
+    assert rows[1]["ratio"] == pytest.approx(1.2)
+
+
+def test_measure_times_only_the_function():
+    calls = []
+    result = measure("case", lambda arg: calls.append(arg), lambda: "fresh", repeat=4, level="micro")
+    assert calls == ["fresh"] * 4
+    assert result["repeat"] == 4 and result["level"] == "micro"
+    assert 0 <= result["min_ms"] <= result["median_ms"]
+
+
+def test_micro_and_meso_levels_report_every_case():
+    results = micro.run([250], only="fetch.")
+    assert [r["name"] for r in results] == ["micro.fetch.rates_to_ohlcv[250]", "micro.fetch.to_frame[250]"]
+    assert [r["name"] for r in meso.run(repeat=1)] == ["meso.detect_mtf_confluence_signal",
+                                                      "meso.rule_spec.evaluate_latest"]
+
+
+def test_macro_scan_restores_the_process_state(storage):
+    result, = macro.run(repeat=1)
+    assert result["name"] == "macro.scan_all" and result["symbols"] > 1
+    assert {"pipeline.fetch", "pipeline.strategy"} <= set(result["stages_ms"])
+    assert get_storage().path == storage.path
+    assert isinstance(get_clock(), SystemClock) and isinstance(get_broker(), MT5Broker)
+
+
+def test_compare_mode_exits_non_zero_on_regression(tmp_path, monkeypatch):
+    baseline = tmp_path / "baseline.json"
+    write_results([{"name": "micro.fetch.rates_to_ohlcv[250]", "min_ms": 1e-6}], str(baseline))
+    monkeypatch.setattr(sys, "argv", ["run", "--level", "micro", "--sizes", "250", "--only", "rates_to_ohlcv",
+                                      "--out", str(tmp_path / "current.json"), "--compare", str(baseline)])
+    assert run.main() == 1
+    write_results([{"name": "micro.fetch.rates_to_ohlcv[250]", "min_ms": 1e6}], str(baseline))
+    assert run.main() == 0
+    assert len(json.loads((tmp_path / "current.json").read_text())["results"]) == 1
@@ -0,0 +1,114 @@
+import threading
+import pytest
+from app.cluster.backend import QueueBackend, SQLiteQueueBackend
+from app.cluster import leader
+from app.cluster.leader import ClusterCoordinator, LeaderElector, LEADER_LEASE, confirm_leadership, is_leader
+
+
+@pytest.fixture
+def backend(tmp_path):
+    return SQLiteQueueBackend(str(tmp_path / "cluster.db"))
+
+
+@pytest.fixture
+def elector(backend):
+    elector = LeaderElector(backend, ttl=30, on_elected=lambda: None, on_lost=lambda: None)
+    leader.set_elector(elector)
+    yield elector
+    leader.set_elector(None)
+
+
+def test_queue_backend_is_abstract():
+    with pytest.raises(TypeError):
+        QueueBackend()
+
+
+def test_scan_gives_up_when_workers_die(backend):
+    backend.register_worker("w1", "host", 1)
+    coordinator = ClusterCoordinator(backend, worker_ttl=0.3, poll_interval=0.05)
+    results = coordinator.analyze_pairs(["EURUSD", "GBPUSD"], timeout=60)
+    assert [r["error"] for r in results] == ["no workers", "no workers"]
+
+
+def test_scan_times_out_when_tasks_are_never_claimed(backend):
+    backend.register_worker("w1", "host", 1)
+    coordinator = ClusterCoordinator(backend, worker_ttl=60, poll_interval=0.05)
+    results = coordinator.analyze_pairs(["EURUSD"], timeout=0.2)
+    assert results[0]["error"] == "timeout"
+
+
+def test_scan_collects_worker_results_in_order(backend):
+    backend.register_worker("w1", "host", 1)
+    coordinator = ClusterCoordinator(backend, worker_ttl=60, poll_interval=0.01)
+    def work():
+        done = 0
+        while done < 2:
+            for task in backend.claim("w1"):
+                backend.complete("w1", task["id"], {"symbol": task["symbol"]})
+                done += 1
+
+    worker = threading.Thread(target=work)
+    worker.start()
+    results = coordinator.analyze_pairs(["GBPUSD", "EURUSD"], timeout=5)
+    worker.join()
+    assert [r["signal"]["symbol"] for r in results] == ["GBPUSD", "EURUSD"]
+    assert all(r["error"] is None for r in results)
+
+
+def test_only_the_claiming_worker_completes_a_task(backend):
+    backend.enqueue("scan", [("EURUSD", "w1")])
+    task, = backend.claim("w1")
+    # The leader moved the task to w2 while w1 was still working on it
+    backend.reassign([task["id"]], "w2")
+    backend.claim("w2")
+    backend.complete("w1", task["id"], {"symbol": "EURUSD", "from": "w1"})
+    assert backend.tasks("scan")[0]["status"] == "claimed"
+    backend.complete("w2", task["id"], {"symbol": "EURUSD", "from": "w2"})
+    assert backend.tasks("scan")[0]["result"]["from"] == "w2"
+
+
+def test_finished_scans_are_purged_by_the_coordinator(backend):
+    backend.register_worker("w1", "host", 1)
+    backend.enqueue("old-scan", [("EURUSD", "w1")])
+    coordinator = ClusterCoordinator(backend, worker_ttl=60, poll_interval=0.01, task_retention=0)
+    coordinator.analyze_pairs(["GBPUSD"], timeout=0.05)
+    assert backend.tasks("old-scan") == []
+    assert backend.storage.query_one("SELECT COUNT(*) FROM cluster_tasks")[0] == 0
+
+
+def test_leadership_without_cluster_mode():
+    assert is_leader() and confirm_leadership()
+
+
+def test_standby_is_not_leader(backend, elector):
+    assert backend.acquire_lease(LEADER_LEASE, "other-node", 30)
+    assert not is_leader()
+    assert not confirm_leadership()
+
+
+def test_lost_lease_is_noticed_before_the_next_renewal(backend, elector):
+    assert backend.acquire_lease(LEADER_LEASE, elector.holder, 30)
+    elector.is_leader = True
+    assert confirm_leadership()
+    # Another node took over (e.g. after this one stalled past the TTL)
+    backend.release_lease(LEADER_LEASE, elector.holder)
+    assert backend.acquire_lease(LEADER_LEASE, "other-node", 30)
+    assert is_leader()
+    assert not confirm_leadership()
+
+
+def test_execute_signal_refuses_orders_on_a_standby(backend, elector):
+    from app.signals.signal_engine import execute_signal
+
+    class Broker:
+        orders = 0
+
+        def place_order(self, **kwargs):
+            Broker.orders += 1
+            return True
+
+    assert backend.acquire_lease(LEADER_LEASE, "other-node", 30)
+    sig = {"symbol": "EURUSD", "direction": "BUY", "entry": 1.1, "stop_loss": 1.09, "take_profit": 1.12,
+           "lot_size": 0.1}
+    assert execute_signal(sig, Broker(), persist=False) is False
+    assert sig["executed"] is False and Broker.orders == 0
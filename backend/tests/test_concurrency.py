@@ -0,0 +1,117 @@
+import asyncio
+import threading
+import pytest
+from fastapi import HTTPException
+from app.api.concurrency import RouteLimiter, broker_call, cpu_call, limited
+from app.core.metrics import metrics
+
+
+def counter(name):
+    return metrics.snapshot()["counters"].get(name, 0)
+
+
+def test_requests_over_capacity_are_rejected_with_503():
+    limiter = RouteLimiter("t503", concurrency=1, timeout=0.05)
+
+    async def run():
+        first = asyncio.ensure_future(limiter.run(asyncio.sleep, 0.2))
+        await asyncio.sleep(0.01)
+        assert limiter.full()
+        results = await asyncio.gather(first, limiter.run(asyncio.sleep, 0), return_exceptions=True)
+        return [r.status_code for r in results]
+
+    rejected = counter("api.t503.rejected")
+    # The first request runs past its timeout (504), the second never gets a slot (503)
+    assert asyncio.run(run()) == [504, 503]
+    assert counter("api.t503.rejected") == rejected + 1
+
+
+def test_timed_out_work_finishes_and_keeps_its_slot():
+    limiter = RouteLimiter("t504", concurrency=1, timeout=0.05)
+    finished = []
+
+    async def slow():
+        await asyncio.sleep(0.15)
+        finished.append(True)
+        return "done"
+
+    async def run():
+        with pytest.raises(HTTPException) as error:
+            await limiter.run(slow)
+        assert error.value.status_code == 504
+        # The orphaned work still holds the only slot
+        assert limiter.full() and not finished
+        await asyncio.sleep(0.15)
+        assert finished and not limiter.full()
+        return await limiter.run(asyncio.sleep, 0, "next")
+
+    assert asyncio.run(run()) == "next"
+
+
+def test_errors_reach_the_caller_and_free_the_slot():
+    @limited("terr", concurrency=1, timeout=1)
+    async def handler(value):
+        raise ValueError(value)
+
+    async def run():
+        with pytest.raises(ValueError):
+            await handler("bad input")
+        await asyncio.sleep(0)
+        return handler.limiter.full()
+
+    errors = counter("api.terr.errors")
+    assert asyncio.run(run()) is False
+    assert counter("api.terr.errors") == errors + 1
+
+
+def test_streams_hold_a_slot_until_released_once():
+    limiter = RouteLimiter("tstream", concurrency=1, timeout=0.05)
+
+    async def run():
+        release = await limiter.acquire()
+        assert limiter.full()
+        with pytest.raises(HTTPException) as error:
+            await limiter.acquire()
+        assert error.value.status_code == 503
+        release()
+        release()
+        assert not limiter.full()
+        (await limiter.acquire())()
+        assert not limiter.full()
+
+    asyncio.run(run())
+
+
+def test_blocking_work_runs_on_the_bounded_pools():
+    async def run():
+        return await broker_call(lambda: threading.current_thread().name), \
+            await cpu_call(lambda x, y=0: (threading.current_thread().name, x + y), 1, y=2)
+
+    broker_thread, (cpu_thread, total) = asyncio.run(run())
+    assert broker_thread.startswith("api-broker") and cpu_thread.startswith("api-cpu") and total == 3
+
+
+def test_mt5_calls_take_turns():
+    import inspect
+    import time
+    from app.data import broker
+    from app.data.broker import MT5Broker
+
+    public = [name for name, fn in inspect.getmembers(MT5Broker, inspect.isfunction) if not name.startswith("_")]
+    assert public and all(hasattr(getattr(MT5Broker, name), "__wrapped__") for name in public)
+
+    active, peak = [], []
+
+    @broker._serialized
+    def call():
+        active.append(1)
+        peak.append(len(active))
+        time.sleep(0.01)
+        active.pop()
+
+    threads = [threading.Thread(target=call) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(peak) == 1
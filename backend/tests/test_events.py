@@ -0,0 +1,111 @@
+import asyncio
+import pytest
+from app.core.events import EventHub
+from app.signals import signal_engine
+
+
+def test_subscribers_get_matching_events_only():
+    hub = EventHub(buffer_size=8)
+
+    async def run():
+        eurusd = hub.subscribe(symbols=["eurusd"])
+        orders = hub.subscribe(types=["order"])
+        trend = hub.subscribe(strategies=["trend"])
+        hub.publish("signal", {"symbol": "EURUSD", "direction": "BUY"})
+        hub.publish("order", {"symbol": "GBPUSD", "strategy": "trend"})
+        await asyncio.sleep(0)
+        return [[e["type"] for e, _ in await s.next_batch(0.1)] for s in (eurusd, orders, trend)]
+
+    assert asyncio.run(run()) == [["signal"], ["order"], ["order"]]
+
+
+def test_live_scan_signals_count_as_mtf_confluence():
+    hub = EventHub()
+
+    async def run():
+        subscriber = hub.subscribe(strategies=["mtf_confluence"])
+        hub.publish("signal", {"symbol": "EURUSD"})
+        await asyncio.sleep(0)
+        return await subscriber.next_batch(0.1)
+
+    (event, encoded), = asyncio.run(run())
+    assert event["strategy"] == "mtf_confluence" and '"EURUSD"' in encoded
+
+
+def test_slow_subscriber_drops_oldest():
+    hub = EventHub(buffer_size=3)
+
+    async def run():
+        subscriber = hub.subscribe()
+        for i in range(5):
+            hub.publish("signal", {"symbol": "EURUSD", "i": i})
+        await asyncio.sleep(0)
+        batch = await subscriber.next_batch(0.1)
+        return [e["data"]["i"] for e, _ in batch], subscriber.take_dropped(), subscriber.take_dropped()
+
+    assert asyncio.run(run()) == ([2, 3, 4], 2, 0)
+
+
+def test_filters_can_change_while_subscribed():
+    hub = EventHub()
+
+    async def run():
+        subscriber = hub.subscribe(symbols=["EURUSD"])
+        subscriber.set_filters(symbols=["GBPUSD"])
+        hub.publish("signal", {"symbol": "EURUSD"})
+        hub.publish("signal", {"symbol": "GBPUSD"})
+        await asyncio.sleep(0)
+        return [e["symbol"] for e, _ in await subscriber.next_batch(0.1)]
+
+    assert asyncio.run(run()) == ["GBPUSD"]
+
+
+def test_unsubscribed_hub_publishes_nothing():
+    hub = EventHub()
+    hub.publish("signal", {"symbol": "EURUSD"})
+    assert len(hub) == 0
+
+
+class FakeBroker:
+    def __init__(self):
+        self.orders = 0
+
+    def account_balance(self):
+        return 10000
+
+    def place_order(self, **kwargs):
+        self.orders += 1
+        return True
+
+
+@pytest.fixture
+def published(monkeypatch):
+    sent = []
+    monkeypatch.setattr(signal_engine.events, "publish", lambda event_type, payload: sent.append(event_type))
+    return sent
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    broker = FakeBroker()
+    monkeypatch.setattr(signal_engine, "get_broker", lambda: broker)
+    return broker
+
+
+def signal(direction="BUY", confidence=95):
+    return {"symbol": "EURUSD", "timeframe": "M15", "direction": direction, "confidence": confidence,
+            "reason": "test", "entry": 1.1000, "stop_loss": 1.0950, "take_profit": 1.1100}
+
+
+def test_simulated_runs_publish_no_events(published, broker):
+    signal_engine.process_signal(signal(), "EURUSD", notify=False, persist=False)
+    signal_engine.process_signal({**signal("REJECTED"), "reason": "spread"}, "EURUSD", notify=False, persist=False)
+    assert broker.orders == 1
+    assert published == []
+
+
+def test_live_runs_publish_rejections_and_orders(published, broker, storage, monkeypatch):
+    monkeypatch.setattr(signal_engine, "send_signal_to_telegram", lambda sig: None)
+    signal_engine.process_signal({**signal("REJECTED"), "reason": "spread"}, "EURUSD")
+    signal_engine.process_signal(signal(), "EURUSD")
+    assert published == ["rejection", "signal", "order"]
@@ -0,0 +1,97 @@
+import asyncio
+import json
+import pytest
+from fastapi import HTTPException
+from starlette.websockets import WebSocket
+from app.api.routes import stream_events, websocket_events
+from app.core.events import events
+
+
+class Client:
+    """ASGI side of a WebSocket: feeds messages in, records what the server sends"""
+
+    def __init__(self, path="/ws/events", query=b""):
+        self.incoming: asyncio.Queue = asyncio.Queue()
+        self.sent = []
+        self.scope = {"type": "websocket", "path": path, "query_string": query, "headers": []}
+        self.incoming.put_nowait({"type": "websocket.connect"})
+
+    async def receive(self):
+        return await self.incoming.get()
+
+    async def send(self, message):
+        self.sent.append(message)
+
+    def say(self, payload):
+        self.incoming.put_nowait({"type": "websocket.receive", "text": json.dumps(payload)})
+
+    def texts(self):
+        return [json.loads(m["text"]) for m in self.sent if m["type"] == "websocket.send"]
+
+    def close_code(self):
+        closes = [m for m in self.sent if m["type"] == "websocket.close"]
+        return closes[0]["code"] if closes else None
+
+
+async def serve(client, **params):
+    return await websocket_events(WebSocket(client.scope, client.receive, client.send), **params)
+
+
+def test_invalid_types_close_with_1008():
+    client = Client()
+    asyncio.run(asyncio.wait_for(serve(client, types="signal,bogus"), 1))
+    assert client.close_code() == 1008
+    assert len(events) == 0
+
+
+def test_invalid_filter_message_closes_promptly():
+    async def run():
+        client = Client()
+        server = asyncio.ensure_future(serve(client, symbols="EURUSD"))
+        await asyncio.sleep(0.05)
+        client.say(["not", "an", "object"])
+        # Long before the 15s heartbeat
+        await asyncio.wait_for(server, 1)
+        return client
+
+    client = asyncio.run(run())
+    assert client.close_code() == 1008
+    assert len(events) == 0
+
+
+def test_filter_values_must_be_string_lists():
+    async def run():
+        client = Client()
+        server = asyncio.ensure_future(serve(client))
+        await asyncio.sleep(0.05)
+        client.say({"symbols": "EURUSD"})
+        await asyncio.wait_for(server, 1)
+        return client
+
+    assert asyncio.run(run()).close_code() == 1008
+
+
+def test_filter_update_applies_and_disconnect_unsubscribes():
+    async def run():
+        client = Client()
+        server = asyncio.ensure_future(serve(client, symbols="EURUSD"))
+        await asyncio.sleep(0.05)
+        client.say({"symbols": ["GBPUSD"], "types": ["signal"]})
+        await asyncio.sleep(0.05)
+        events.publish("signal", {"symbol": "EURUSD"})
+        events.publish("order", {"symbol": "GBPUSD"})
+        events.publish("signal", {"symbol": "GBPUSD"})
+        await asyncio.sleep(0.05)
+        client.incoming.put_nowait({"type": "websocket.disconnect", "code": 1000})
+        await asyncio.wait_for(server, 1)
+        return client
+
+    client = asyncio.run(run())
+    assert [(e["type"], e["symbol"]) for e in client.texts()] == [("signal", "GBPUSD")]
+    assert len(events) == 0
+
+
+def test_sse_rejects_unknown_types():
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(stream_events(types="signal,bogus"))
+    assert error.value.status_code == 400
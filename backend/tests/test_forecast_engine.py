@@ -0,0 +1,162 @@
+from datetime import datetime, timedelta
+import pandas as pd
+import pytest
+from app.core.config import settings
+from app.database.db_utils import save_forecast_signal
+from app.signals import forecast_engine
+from app.signals.forecast_engine import load_pending_forecasts, on_price, revalidate_forecasts, structure_break
+from app.signals.forecast_index import forecast_index
+
+
+class FakeBroker:
+    def __init__(self, results=(True,), on_order=None):
+        self.results = list(results)
+        self.on_order = on_order
+        self.orders = []
+
+    def place_order(self, symbol, direction, entry, sl, tp):
+        self.orders.append((symbol, direction, entry))
+        if self.on_order:
+            self.on_order()
+        return self.results.pop(0) if len(self.results) > 1 else self.results[0]
+
+
+@pytest.fixture
+def pending(storage):
+    forecast_engine._order_failures.clear()
+    save_forecast_signal({"symbol": "EURUSD", "timeframe": "M15", "direction": "BUY", "entry": 1.1000,
+                          "stop_loss": 1.0950, "take_profit": 1.1100, "confidence": 70, "reason": "test"})
+    load_pending_forecasts()
+    yield storage
+    forecast_index.load([])
+
+
+def status(storage):
+    return tuple(storage.query_one("SELECT status, triggered FROM forecast_signals"))
+
+
+def test_crossed_forecast_is_executed_and_marked(pending):
+    broker = FakeBroker()
+    assert on_price("EURUSD", 1.1010, 1.1012, broker) == []
+    executed = on_price("EURUSD", 1.0995, 1.0997, broker)
+    assert [f["direction"] for f in executed] == ["BUY"]
+    assert status(pending) == ("triggered", 1)
+    assert len(forecast_index) == 0
+
+
+def test_reload_during_order_does_not_trigger_twice(pending):
+    # The index is rebuilt from the database while the order is in flight
+    broker = FakeBroker(on_order=load_pending_forecasts)
+    assert len(on_price("EURUSD", 1.0995, 1.0997, broker)) == 1
+    assert len(forecast_index) == 0
+    assert on_price("EURUSD", 1.0995, 1.0997, broker) == []
+    assert len(broker.orders) == 1
+
+
+def test_failed_trigger_update_is_not_reloaded(pending, monkeypatch):
+    def broken(ids):
+        raise RuntimeError("database is locked")
+    monkeypatch.setattr(forecast_engine, "_mark_triggered", broken)
+    broker = FakeBroker()
+    assert len(on_price("EURUSD", 1.0995, 1.0997, broker)) == 1
+    assert status(pending) == ("triggering", 0)
+    load_pending_forecasts()
+    assert on_price("EURUSD", 1.0995, 1.0997, broker) == []
+    assert len(broker.orders) == 1
+
+
+def test_failed_orders_back_off_then_give_up(pending, monkeypatch):
+    monkeypatch.setattr(settings, "FORECAST_RETRY_SECONDS", 0)
+    monkeypatch.setattr(settings, "FORECAST_MAX_ORDER_ATTEMPTS", 3)
+    broker = FakeBroker(results=(False,))
+    on_price("EURUSD", 1.0995, 1.0997, broker)
+    assert status(pending) == ("pending", 0)
+    on_price("EURUSD", 1.0995, 1.0997, broker)
+    on_price("EURUSD", 1.0995, 1.0997, broker)
+    assert status(pending) == ("failed", 0)
+    assert len(forecast_index) == 0
+    on_price("EURUSD", 1.0995, 1.0997, broker)
+    assert len(broker.orders) == 3
+
+
+def test_failed_order_waits_for_backoff(pending, monkeypatch):
+    monkeypatch.setattr(settings, "FORECAST_RETRY_SECONDS", 60)
+    broker = FakeBroker(results=(False,))
+    on_price("EURUSD", 1.0995, 1.0997, broker)
+    on_price("EURUSD", 1.0995, 1.0997, broker)
+    assert len(broker.orders) == 1
+    assert len(forecast_index) == 1
+
+
+def frames(price, h4_trend=1, d1_trend=1):
+    """Indicator frames with the latest M15 close and H4/D1 EMA 20 above (1) or below (-1) EMA 50"""
+    return {"M15": pd.DataFrame({"close": [price]}),
+            "H4": pd.DataFrame({"ema_20": [1.0 + 0.01 * h4_trend], "ema_50": [1.0]}),
+            "D1": pd.DataFrame({"ema_20": [1.0 + 0.01 * d1_trend], "ema_50": [1.0]})}
+
+
+@pytest.mark.parametrize("forecast_frames, reason", [
+    (frames(1.1010), None),
+    (frames(1.0940), "broke below the stop"),
+    (frames(1.1105), "reached the target"),
+    (frames(1.1010, h4_trend=-1), "H4 structure turned bearish"),
+    (frames(1.1010, d1_trend=-1), "D1 trend turned bearish"),
+])
+def test_structure_break_for_a_buy(forecast_frames, reason):
+    forecast = {"direction": "BUY", "stop_loss": 1.0950, "take_profit": 1.1100}
+    result = structure_break(forecast, forecast_frames)
+    assert result is None if reason is None else reason in result
+
+
+def test_structure_break_for_a_sell():
+    forecast = {"direction": "SELL", "stop_loss": 1.1050, "take_profit": 1.0900}
+    assert structure_break(forecast, frames(1.1000, h4_trend=-1, d1_trend=-1)) is None
+    assert "bullish" in structure_break(forecast, frames(1.1000, h4_trend=-1, d1_trend=1))
+    assert "above the stop" in structure_break(forecast, frames(1.1060, h4_trend=-1, d1_trend=-1))
+
+
+def test_revalidation_expires_and_invalidates_per_symbol(storage, monkeypatch):
+    now = datetime.utcnow()
+    rows = [(now - timedelta(hours=30), "EURUSD", "BUY"),   # past the TTL
+            (now, "EURUSD", "BUY"),                         # still valid
+            (now, "EURUSD", "SELL"),                        # H4 trend is up
+            (now, "GBPUSD", "BUY")]                         # symbol fetch fails: left alone
+    storage.executemany(
+        "INSERT INTO forecast_signals (timestamp, symbol, timeframe, direction, entry, stop_loss, take_profit, "
+        "confidence, reason) VALUES (?, ?, 'M15', ?, 1.1, ?, ?, 70, 'test')",
+        [(t.isoformat(), symbol, direction, 1.09 if direction == "BUY" else 1.11,
+          1.12 if direction == "BUY" else 1.08) for t, symbol, direction in rows])
+    load_pending_forecasts()
+    fetched = []
+
+    def symbol_frames(symbol, broker):
+        fetched.append(symbol)
+        if symbol == "GBPUSD":
+            raise RuntimeError("no data")
+        return frames(1.1000)
+
+    monkeypatch.setattr(forecast_engine, "_symbol_frames", symbol_frames)
+    counts = revalidate_forecasts(ttl_hours=24)
+
+    assert counts == {"checked": 4, "symbols": 2, "expired": 1, "invalidated": 1}
+    assert sorted(fetched) == ["EURUSD", "GBPUSD"]
+    statuses = [tuple(r) for r in storage.query("SELECT status, status_reason FROM forecast_signals ORDER BY id")]
+    assert [s for s, _ in statuses] == ["expired", "pending", "invalidated", "pending"]
+    assert statuses[2][1] == "H4 structure turned bullish"
+    assert sorted(f["id"] for f in forecast_index.pop_crossed("EURUSD", bid=10, ask=0)) == [2]
+    forecast_index.load([])
+
+
+def test_indicator_frames_are_reused_until_a_new_bar_closes(sim_broker, monkeypatch):
+    from app.data import data_utils
+    from app.strategies import mtf_confluence_with_d1
+    computed = []
+    monkeypatch.setattr(forecast_engine, "_frames_cache", {})
+    monkeypatch.setattr(data_utils, "fetch_mtf_data", lambda symbol: symbol)
+    monkeypatch.setattr(mtf_confluence_with_d1, "compute_mtf_indicators", lambda data: computed.append(data) or {})
+    forecast_engine._symbol_frames("EURUSD", sim_broker)
+    forecast_engine._symbol_frames("EURUSD", sim_broker)
+    assert computed == ["EURUSD"]
+    sim_broker.clock.advance(timedelta(minutes=-15))
+    forecast_engine._symbol_frames("EURUSD", sim_broker)
+    assert computed == ["EURUSD", "EURUSD"]
@@ -0,0 +1,85 @@
+import pytest
+from app.core.metrics import metrics
+from app.signals import gates, signal_engine
+
+
+class FakeFilter:
+    def __init__(self, session=True, news=False, spread=True):
+        self.session, self.news, self.spread = session, news, spread
+        self.calls = []
+
+    def is_trading_session(self):
+        self.calls.append("session")
+        return self.session
+
+    def is_news_time(self):
+        self.calls.append("news")
+        return self.news
+
+    def check_spread_conditions(self, symbol):
+        self.calls.append("spread")
+        return self.spread, "spread too wide"
+
+
+class FakeRisk:
+    def __init__(self, ok=True):
+        self.ok, self.calls = ok, 0
+
+    def can_trade(self, symbol):
+        self.calls += 1
+        return self.ok, "max open positions"
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def test_all_gates_pass_in_cost_order():
+    market_filter, risk = FakeFilter(), FakeRisk()
+    assert gates.evaluate_gates("EURUSD", market_filter, risk) is None
+    assert market_filter.calls == ["session", "news", "spread"] and risk.calls == 1
+    counters = metrics.snapshot()["counters"]
+    assert all(counters[f"gate.{name}.passed"] == 1 for name, _ in gates.GATES)
+
+
+def test_first_rejection_stops_the_remaining_gates():
+    market_filter, risk = FakeFilter(news=True), FakeRisk()
+    rejection = gates.evaluate_gates("EURUSD", market_filter, risk)
+    assert rejection["direction"] == "REJECTED" and rejection["gate"] == "news"
+    assert rejection["symbol"] == "EURUSD"
+    assert market_filter.calls == ["session", "news"] and risk.calls == 0
+    counters = metrics.snapshot()["counters"]
+    assert counters["gate.news.rejected"] == 1 and "gate.spread.passed" not in counters
+
+
+def test_risk_gate_alone():
+    assert gates.evaluate_risk_gate("EURUSD", FakeRisk(ok=False))["reason"] == "Risk management: max open positions"
+    assert gates.evaluate_risk_gate("EURUSD", FakeRisk()) is None
+
+
+def test_clock_gates_need_no_broker():
+    market_filter = FakeFilter(session=False)
+    assert gates.evaluate_clock_gates(market_filter=market_filter)["gate"] == "session"
+    assert market_filter.calls == ["session"]
+
+
+def test_gated_symbol_is_never_fetched(monkeypatch):
+    fetched = []
+    monkeypatch.setattr(signal_engine, "evaluate_gates",
+                        lambda symbol: {"symbol": symbol, "direction": "REJECTED", "reason": "closed", "gate": "session"})
+    monkeypatch.setattr(signal_engine, "fetch_mtf_data", lambda symbol: fetched.append(symbol))
+    assert signal_engine.analyze_symbol("EURUSD")["gate"] == "session"
+    assert fetched == []
+
+
+def test_open_symbol_is_fetched_and_scored_without_rerunning_gates(monkeypatch):
+    calls = []
+    monkeypatch.setattr(signal_engine, "evaluate_gates", lambda symbol: None)
+    monkeypatch.setattr(signal_engine, "fetch_mtf_data", lambda symbol: calls.append("fetch") or {})
+    monkeypatch.setattr(signal_engine, "detect_mtf_confluence_signal",
+                        lambda data, symbol, gates_checked: calls.append(gates_checked) or {"direction": "NEUTRAL"})
+    assert signal_engine.analyze_symbol("EURUSD") == {"direction": "NEUTRAL"}
+    assert calls == ["fetch", True]
@@ -0,0 +1,120 @@
+import gzip
+import json
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+from app.api.routes import get_signals, history_filters
+from app.database.history import decode_cursor, encode_cursor, parse_time, query_history
+
+BASE = 1709632800  # 2024-03-05 10:00 UTC
+
+
+@pytest.fixture
+def signals(storage):
+    rows = []
+    for i in range(25):
+        # Pairs of rows share a second, so pages have to break ties on id
+        rows.append((BASE + (i // 2) * 60, ["EURUSD", "GBPUSD"][i % 2], ["M15", "H1"][i % 3 == 0],
+                     ["BUY", "SELL"][i % 4 == 0], 50 + i * 2))
+    storage.executemany("INSERT INTO signals (ts_epoch, symbol, timeframe, direction, confidence) "
+                        "VALUES (?, ?, ?, ?, ?)", rows)
+    return storage
+
+
+def pages(**filters):
+    items, cursor, count = [], None, 0
+    while True:
+        page = query_history("signals", cursor=cursor, **filters)
+        items += page["items"]
+        count += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return items, count
+
+
+def test_cursor_pages_cover_every_row_once_in_order(signals):
+    items, count = pages(limit=4)
+    assert count == 7
+    keys = [(r["ts_epoch"], r["id"]) for r in items]
+    assert keys == sorted(keys, reverse=True) and len(set(keys)) == 25
+
+    ascending, _ = pages(limit=3, order="asc")
+    assert [r["id"] for r in ascending] == [r["id"] for r in reversed(items)]
+
+
+def test_rows_inserted_while_paging_do_not_shift_later_pages(signals):
+    first = query_history("signals", limit=5)
+    signals.execute("INSERT INTO signals (ts_epoch, symbol) VALUES (?, 'EURUSD')", (BASE + 3600,))
+    second = query_history("signals", limit=5, cursor=first["next_cursor"])
+    assert second["items"][0]["id"] == first["items"][-1]["id"] - 1
+
+
+def test_filters_apply_before_paging(signals):
+    items, _ = pages(limit=2, symbol="eurusd", direction="buy", min_confidence=60, max_confidence=90)
+    assert items and all(r["symbol"] == "EURUSD" and r["direction"] == "BUY" and 60 <= r["confidence"] <= 90
+                         for r in items)
+    expected = signals.query("SELECT id FROM signals WHERE symbol = 'EURUSD' AND direction = 'BUY' "
+                             "AND confidence BETWEEN 60 AND 90 ORDER BY ts_epoch DESC, id DESC")
+    assert [r["id"] for r in items] == [r["id"] for r in expected]
+
+    window = query_history("signals", since=BASE + 60, until="2024-03-05T10:03:00Z", limit=100, order="asc")
+    assert [r["ts_epoch"] for r in window["items"]] == [BASE + 60] * 2 + [BASE + 120] * 2
+
+
+def test_fields_keep_only_the_requested_columns(signals):
+    page = query_history("signals", fields=["symbol"], limit=2)
+    assert list(page["items"][0]) == ["symbol"]
+    assert decode_cursor(page["next_cursor"])[0] == BASE + 12 * 60 - 60
+    with pytest.raises(ValueError):
+        query_history("signals", fields=["password"])
+
+
+def test_invalid_requests_raise_value_errors(signals):
+    with pytest.raises(ValueError):
+        query_history("users")
+    with pytest.raises(ValueError):
+        query_history("trades", timeframe="M15")
+    with pytest.raises(ValueError):
+        query_history("signals", cursor="not-a-cursor")
+    assert decode_cursor(encode_cursor("2024-03-05T10:00:00", 7)) == ("2024-03-05T10:00:00", 7)
+
+
+@pytest.mark.parametrize("value", [1e20, "1e20", "inf", "-inf"])
+def test_out_of_range_times_raise_value_errors(signals, value):
+    with pytest.raises(ValueError, match="out of range"):
+        parse_time(value)
+    with pytest.raises(ValueError):
+        query_history("signals", since=value)
+
+
+def test_forecast_and_trade_time_columns(storage):
+    storage.executemany("INSERT INTO forecast_signals (timestamp, symbol) VALUES (?, 'EURUSD')",
+                        [("2024-03-05T09:00:00",), ("2024-03-05T10:30:00",)])
+    storage.executemany("INSERT INTO trade_performance (symbol, created_at) VALUES ('EURUSD', ?)",
+                        [("2024-03-05 09:00:00",), ("2024-03-05 10:30:00",)])
+    assert query_history("forecasts", since=BASE)["count"] == 1
+    assert query_history("trades", until=BASE)["items"][0]["created_at"] == "2024-03-05 09:00:00"
+
+
+def test_paged_reads_use_the_time_indexes(signals):
+    plan = " ".join(r["detail"] for r in signals.query(
+        "EXPLAIN QUERY PLAN SELECT id FROM signals WHERE symbol = ? AND ts_epoch IS NOT NULL "
+        "AND ts_epoch <= ? AND (ts_epoch, id) < (?, ?) ORDER BY ts_epoch DESC, id DESC LIMIT 10",
+        ("EURUSD", BASE, BASE, 5)))
+    assert "idx_signals_symbol_time" in plan and "TEMP B-TREE" not in plan
+
+
+def request(accept_encoding=""):
+    headers = [(b"accept-encoding", accept_encoding.encode())] if accept_encoding else []
+    return Request({"type": "http", "method": "GET", "path": "/signals", "headers": headers, "query_string": b""})
+
+
+def test_signals_endpoint_gzips_large_pages_and_maps_errors_to_400(signals):
+    filters = history_filters(limit=25, min_confidence=None, max_confidence=None, order="desc")
+    response = get_signals(request("gzip"), filters)
+    assert response.headers["content-encoding"] == "gzip"
+    assert json.loads(gzip.decompress(response.body))["count"] == 25
+    assert "content-encoding" not in get_signals(request(), filters).headers
+    with pytest.raises(HTTPException) as error:
+        get_signals(request(), {**filters, "cursor": "!!"})
+    assert error.value.status_code == 400
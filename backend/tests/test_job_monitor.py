@@ -0,0 +1,91 @@
+import threading
+import time
+import pytest
+from apscheduler.schedulers.background import BackgroundScheduler
+from app.core.metrics import metrics
+from app.scheduler import jobs
+from app.scheduler.job_monitor import JOB_DEFAULTS, attach_listener, monitored
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def test_runs_errors_and_slow_runs_are_counted():
+    ok = monitored("ok", 60)(lambda x: x * 2)
+    assert ok(2) == 4
+
+    @monitored("boom", 60)
+    def boom():
+        raise RuntimeError("no broker")
+
+    with pytest.raises(RuntimeError):
+        boom()
+    monitored("slow", 0.01)(time.sleep)(0.02)
+
+    snapshot = metrics.snapshot()
+    counters = snapshot["counters"]
+    assert counters["job.ok.runs"] == 1 and "job.ok.errors" not in counters
+    assert counters["job.boom.runs"] == 1 and counters["job.boom.errors"] == 1
+    assert counters["job.slow.slow"] == 1
+    assert snapshot["timings"]["job.slow"]["max"] >= 0.02
+    assert snapshot["gauges"]["job.ok.last_run"] <= time.time()
+
+
+def test_overlapping_runs_are_skipped_not_stacked():
+    running, overlaps = threading.Event(), []
+    concurrent = threading.Lock()
+
+    def job():
+        if not concurrent.acquire(blocking=False):
+            overlaps.append(True)
+            return
+        try:
+            running.set()
+            time.sleep(0.6)
+        finally:
+            concurrent.release()
+
+    scheduler = BackgroundScheduler(job_defaults=JOB_DEFAULTS)
+    attach_listener(scheduler)
+    scheduler.add_job(monitored("busy", 0.1)(job), "interval", seconds=0.1, id="busy")
+    scheduler.start()
+    try:
+        assert running.wait(2)
+        time.sleep(0.5)
+    finally:
+        scheduler.shutdown(wait=True)
+
+    counters = metrics.snapshot()["counters"]
+    assert not overlaps
+    assert counters["job.busy.overlap_skipped"] >= 1
+    assert counters["job.busy.slow"] == counters["job.busy.runs"] >= 1
+    assert metrics.snapshot()["timings"]["job.busy.lag"]["count"] >= 1
+
+
+def test_serial_scan_defers_pairs_past_the_deadline(monkeypatch):
+    monkeypatch.setattr(jobs, "_deferred", [])
+    monkeypatch.setattr(jobs, "evaluate_clock_gates", lambda: None)
+    scanned = []
+
+    def slow_analysis(pair):
+        scanned.append(pair)
+        time.sleep(0.05)
+        return None
+
+    monkeypatch.setattr(jobs, "analyze_symbol", slow_analysis)
+    pairs = ["EURUSD", "GBPUSD", "USDJPY", "AUDUSD", "XAUUSD"]
+    jobs.scan_all(pairs, deadline_seconds=0.12)
+    assert 1 < len(scanned) < len(pairs)
+    assert jobs._deferred == pairs[len(scanned):]
+    assert metrics.snapshot()["counters"]["scan.deadline_hits"] == 1
+
+    # The deferred pairs lead the next scan
+    deferred = jobs._deferred
+    scanned.clear()
+    jobs.scan_all(pairs)
+    assert scanned == deferred + [p for p in pairs if p not in deferred]
+    assert jobs._deferred == []
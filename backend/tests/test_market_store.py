@@ -0,0 +1,63 @@
+from datetime import timedelta
+import pytest
+from app.core.config import settings
+from app.data import market_store
+from app.data.market_store import MIN_BARS, fetch_bars, read_bars, store_bars, to_ohlcv
+
+
+@pytest.fixture
+def store(storage, sim_broker, monkeypatch):
+    monkeypatch.setattr(settings, "MARKET_DATA_STORE", True)
+    monkeypatch.setattr(sim_broker, "persist_bars", True, raising=False)
+    requests = []
+    fetch_rates = sim_broker.fetch_rates
+    monkeypatch.setattr(sim_broker, "fetch_rates",
+                        lambda symbol, timeframe, count: requests.append(count) or fetch_rates(symbol, timeframe, count))
+    sim_broker.clock.advance(timedelta(hours=-2))
+    return sim_broker, requests, fetch_rates
+
+
+def without_volume(bars):
+    return [{k: v for k, v in b.items() if k not in ("real_volume", "spread")} for b in bars]
+
+
+def test_cold_store_fetches_the_full_window_then_only_new_bars(store, storage):
+    broker, requests, fetch_rates = store
+    first = fetch_bars("EURUSD", "M15", bars=100)
+    assert requests == [MIN_BARS] and len(first) == MIN_BARS
+    assert len(read_bars("EURUSD", "M15")["timestamp"]) == MIN_BARS
+
+    broker.clock.advance(timedelta(hours=1))
+    second = fetch_bars("EURUSD", "M15", bars=100)
+    # Four new bars, the last stored one and one of slack for broker time running ahead
+    assert requests[1] == 7
+    assert without_volume(second) == without_volume(fetch_rates("EURUSD", "M15", MIN_BARS))
+    assert len(read_bars("EURUSD", "M15")["timestamp"]) == MIN_BARS + 4
+
+
+def test_large_gap_refetches_the_window(store):
+    broker, requests, _ = store
+    fetch_bars("EURUSD", "H1", bars=MIN_BARS)
+    fetch_bars("EURUSD", "H1", bars=MIN_BARS)
+    assert requests == [MIN_BARS, 3]
+    broker.clock.advance(timedelta(days=400))
+    fetch_bars("EURUSD", "H1", bars=MIN_BARS)
+    assert requests[-1] == MIN_BARS
+
+
+def test_brokers_without_persist_bars_are_not_stored(store, monkeypatch):
+    broker, requests, _ = store
+    monkeypatch.setattr(broker, "persist_bars", False)
+    assert len(fetch_bars("EURUSD", "M15", bars=100)) == MIN_BARS
+    assert len(read_bars("EURUSD", "M15")["timestamp"]) == 0
+
+
+def test_upserts_replace_the_forming_bar_and_reads_honour_limits(storage):
+    bar = {"time": 900, "open": 1.0, "high": 1.2, "low": 0.9, "close": 1.1, "tick_volume": 10, "spread": 2}
+    store_bars("EURUSD", "M15", [{**bar, "time": t} for t in (0, 900, 1800)])
+    store_bars("EURUSD", "M15", [{**bar, "close": 1.15}])
+    newest = read_bars("EURUSD", "M15", limit=2)
+    assert newest["timestamp"].tolist() == [900, 1800]
+    assert read_bars("EURUSD", "M15", start=900, end=900)["close"].tolist() == [1.15]
+    assert to_ohlcv(read_bars("EURUSD", "M15", end=0))[0]["tick_volume"] == 10
+    assert read_bars("GBPUSD", "M15")["timestamp"].dtype.kind == "i"
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app.backtest.monte_carlo import (
+    confidence_band_stats, lot_sizes, run_monte_carlo, simulate_paths,
+)
+from app.utils.risk_utils import calculate_lot_size
+
+
+def test_vectorized_lot_sizes_match_calculate_lot_size():
+    balance = np.array([500.0, 10000.0, 10000.0, 1e7])
+    sl_pips = np.array([20.0, 20.0, 7.0, 10.0])
+    expected = [calculate_lot_size(b, 1.0, s) for b, s in zip(balance, sl_pips)]
+    assert lot_sizes(balance, 1.0, sl_pips).tolist() == pytest.approx(expected)
+
+
+def test_paths_compound_and_halt_after_the_daily_loss_limit():
+    r = np.array([[-1.0, -1.0, -1.0, 2.0, 2.0]])
+    sl_pips = np.full_like(r, 10.0)
+    day = np.array([0, 0, 0, 0, 1])
+    paths = simulate_paths(r, sl_pips, day, 10000, risk_percent=2.0, max_daily_loss=0.05, ruin_balance=5000)
+    # -200 (2 lots), -196 (1.96), -192 (1.92): 5.88% down, so the 4th trade of day 0 is skipped
+    assert paths["final_balance"][0] == pytest.approx(9412 + 2 * 1.88 * 10 * 10)
+    assert paths["lowest_balance"][0] == pytest.approx(9412)
+    assert paths["max_drawdown_pct"][0] == pytest.approx(5.88)
+    assert not paths["ruined"][0]
+
+
+def test_ruined_paths_stop_trading():
+    r = np.array([[-1.0] * 10 + [5.0] * 10])
+    paths = simulate_paths(r, np.full_like(r, 10.0), None, 1000, 10.0, 1.0, ruin_balance=500)
+    assert paths["ruined"][0] and paths["final_balance"][0] <= 500
+
+
+def test_shuffles_keep_the_total_and_runs_are_reproducible():
+    trades = pd.DataFrame({"r_multiple": [2.0, -1.0, -1.0, 1.5, -1.0, 3.0] * 5, "sl_pips": 20.0})
+    shuffled = run_monte_carlo(trades, n_sims=400, mode="shuffle", risk_percent=0.5,
+                               workers=2, batch_size=100, seed=7)
+    assert shuffled["trades"] == 30 and shuffled["simulations"] == 400
+    assert shuffled["risk_of_ruin"] == 0.0
+    again = run_monte_carlo(trades, n_sims=400, mode="shuffle", risk_percent=0.5,
+                            workers=1, batch_size=100, seed=7)
+    assert again["final_balance"] == shuffled["final_balance"]
+    boot = run_monte_carlo(trades, n_sims=400, mode="bootstrap", workers=2, batch_size=100)
+    assert boot["final_balance"][5] < boot["final_balance"][95]
+
+
+def test_invalid_mode_and_empty_trades():
+    with pytest.raises(ValueError):
+        run_monte_carlo(pd.DataFrame({"r_multiple": [1.0]}), mode="jackknife")
+    assert run_monte_carlo(pd.DataFrame({"r_multiple": []}))["trades"] == 0
+
+
+def test_confidence_bands_bracket_the_observed_statistics():
+    rng = np.random.default_rng(0)
+    trades = pd.DataFrame({"confidence": rng.choice([55, 65, 85], 300),
+                           "r_multiple": rng.choice([2.0, -1.0], 300)})
+    bands = confidence_band_stats(trades, n_boot=500)
+    assert bands["confidence"].tolist() == [50, 60, 80]
+    assert bands["trades"].sum() == 300
+    assert (bands["win_rate_low"] <= bands["win_rate"]).all() and (bands["win_rate"] <= bands["win_rate_high"]).all()
+    assert (bands["expectancy_low"] <= bands["expectancy"]).all()
@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+from app.backtest.optimizer import (
+    FEATURES, ROW, build_features, evaluate_params, first_signals, grid_params, random_params,
+    resolve_r_multiples, run_sweep, signal_directions, stack_symbols, summarize,
+)
+from benchmarks.common import synthetic_mtf
+
+DEFAULTS = {"w_d1": 2, "w_h4": 3, "w_h1": 2, "w_m15": 1, "accuracy_offset": 1,
+            "d1_cutoff": 0.001, "sl_atr": 1.5, "tp_atr": 3.0}
+
+
+def flat_features(bars):
+    features = np.zeros((len(FEATURES), bars))
+    features[ROW["tradable"]] = 1
+    features[ROW["d1_strength"]] = 0.01
+    features[ROW["close"]] = features[ROW["high"]] = features[ROW["low"]] = 1.0
+    features[ROW["atr"]] = 0.01
+    return features
+
+
+def test_scoring_needs_the_threshold_and_one_side_only():
+    features = flat_features(4)
+    features[0:4, 0] = 1                      # every buy condition
+    features[[0, 2], 1] = 1                   # D1 + H1 = 4, under 8 * 0.5 + 1
+    features[0:4, 2] = features[4:8, 2] = 1   # both sides agree -> nothing
+    features[0:4, 3] = 1
+    features[ROW["d1_strength"], 3] = 0.0005  # trend too weak
+    assert signal_directions(features, DEFAULTS).tolist() == [1, 0, 0, 0]
+    features[ROW["accuracy"], 1] = 1          # 5 reaches the threshold and half of 10
+    assert signal_directions(features, DEFAULTS)[1] == 1
+    features[ROW["tradable"], 1] = 0
+    assert signal_directions(features, DEFAULTS)[1] == 0
+
+
+def test_cooldown_only_drops_repeats_of_the_same_side():
+    direction = np.zeros(20, dtype=np.int8)
+    direction[[0, 2, 3, 9, 10, 15]] = [1, 1, -1, -1, -1, -1]
+    assert first_signals(direction, cooldown=4).tolist() == [0, 3, 9, 15]
+    assert first_signals(np.zeros(5, dtype=np.int8)).size == 0
+
+
+def test_trades_resolve_at_target_or_stop():
+    features = flat_features(10)
+    features[ROW["high"], 2] = 1.04           # long from bar 0 hits 1.0 + 3 * 0.01
+    features[ROW["low"], 4] = 0.95            # short from bar 3 hits its target
+    r = resolve_r_multiples(features, np.array([0, 3]), np.array([1, -1]), sl_atr=1.0, tp_atr=3.0, max_bars=5)
+    assert r.tolist() == pytest.approx([3.0, 3.0])
+    # Too close to the end of history to resolve
+    assert resolve_r_multiples(features, np.array([8]), np.array([1]), 1.0, 3.0, max_bars=5).size == 0
+
+
+def test_summary_statistics():
+    stats = summarize(np.array([2.0, -1.0, -1.0, 3.0]))
+    assert stats["trades"] == 4 and stats["win_rate"] == 0.5
+    assert stats["expectancy"] == pytest.approx(0.75) and stats["max_drawdown"] == pytest.approx(2.0)
+    assert stats["profit_factor"] == pytest.approx(2.5)
+    assert summarize(np.empty(0))["trades"] == 0
+
+
+def test_stacked_symbols_are_separated_by_flat_padding():
+    a, b = flat_features(3), flat_features(2)
+    a[ROW["close"], -1] = 1.5
+    stacked = stack_symbols([a, b], pad=4)
+    assert stacked.shape == (len(FEATURES), 3 + 4 + 2 + 4)
+    assert (stacked[ROW["high"], 3:7] == 1.5).all() and (stacked[0:8, 3:7] == 0).all()
+
+
+def test_parameter_spaces():
+    assert len(grid_params()) == 3 ** 8
+    assert len(grid_params({"a": [1, 2], "b": [3]})) == 2
+    samples = random_params(50, {"a": (0.0, 1.0), "b": [1, 2]}, seed=1)
+    assert all(0 <= s["a"] <= 1 and s["b"] in (1, 2) for s in samples)
+    assert samples == random_params(50, {"a": (0.0, 1.0), "b": [1, 2]}, seed=1)
+
+
+def test_parallel_sweep_matches_serial_scores():
+    features = stack_symbols([build_features(synthetic_mtf(600, seed=s), use_session_filter=False)
+                              for s in range(2)])
+    param_sets = random_params(24, seed=3)
+    ranked = run_sweep(features, param_sets, workers=2, batch_size=5)
+    assert len(ranked) == len(param_sets)
+    for _, group in ranked.groupby("eligible", sort=False):
+        assert group["expectancy"].is_monotonic_decreasing
+    assert ranked["eligible"].is_monotonic_decreasing
+    for params in param_sets[:6]:
+        expected = evaluate_params(features, params)
+        row = ranked[(ranked[list(params)] == list(params.values())).all(axis=1)].iloc[0]
+        assert row["trades"] == expected["trades"]
+        assert row["expectancy"] == pytest.approx(expected["expectancy"])
@@ -0,0 +1,91 @@
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+import pytest
+from app.backtest.outcomes import (EXPIRED, OPEN, SL, TP, resolve_open_trades, resolve_outcomes,
+                                   resolve_signal_history)
+from app.database.analytics import aggregates, load_aggregates
+from benchmarks.common import DEFAULT_END, synthetic_bars
+
+# Bars 1..5 after an entry at the close of bar 0 (1.1000)
+HIGH = np.array([1.1005, 1.1010, 1.1060, 1.1010, 1.1010, 1.1010])
+LOW = np.array([1.0995, 1.0990, 1.0990, 1.0940, 1.0990, 1.0990])
+CLOSE = np.array([1.1000, 1.1000, 1.1050, 1.0950, 1.1000, 1.1020])
+OPEN_ = np.array([1.1000, 1.1000, 1.1000, 1.1050, 1.0950, 1.1000])
+
+
+def resolve(direction, stop_loss, take_profit, max_bars=5, **kwargs):
+    return resolve_outcomes(HIGH, LOW, CLOSE, np.array([0]), np.array([direction]), np.array([1.1000]),
+                            np.array([stop_loss]), np.array([take_profit]), max_bars=max_bars, open_=OPEN_,
+                            **kwargs)
+
+
+def test_first_touch_decides():
+    tp = resolve(1, 1.0950, 1.1050)
+    assert tp["outcome"][0] == TP and tp["exit_index"][0] == 2 and tp["r_multiple"][0] == pytest.approx(1.0)
+    sl = resolve(-1, 1.1050, 1.0950)
+    assert sl["outcome"][0] == SL and sl["r_multiple"][0] == pytest.approx(-1.0)
+
+
+def test_expired_and_open_trades():
+    expired = resolve(1, 1.0900, 1.1100, max_bars=2)
+    assert expired["outcome"][0] == EXPIRED and expired["exit_price"][0] == CLOSE[2]
+    still_open = resolve(1, 1.0900, 1.1100, max_bars=20)
+    assert still_open["outcome"][0] == OPEN and still_open["exit_price"][0] == CLOSE[-1]
+
+
+def test_same_bar_ambiguity_rules():
+    # Bar 2 touches neither, bar 3 ranges 1.0940-1.1010: both a 1.0945 stop and a 1.1008 target
+    args = (1, 1.0945, 1.1008)
+    high = HIGH.copy()
+    high[1] = high[2] = 1.1005
+    for rule, expected in (("sl_first", SL), ("tp_first", TP), ("nearest_open", TP)):
+        out = resolve_outcomes(high, LOW, CLOSE, np.array([0]), np.array([1]), np.array([1.1000]),
+                               np.array([args[1]]), np.array([args[2]]), max_bars=5, open_=OPEN_,
+                               ambiguity=rule)
+        assert out["outcome"][0] == expected, rule
+    with pytest.raises(ValueError):
+        resolve(*args, ambiguity="coin_flip")
+
+
+def test_epoch_and_datetime_bar_times_agree():
+    bars = synthetic_bars(400, 15, seed=3)
+    epoch = bars["time"].to_numpy(dtype="datetime64[s]").astype(np.int64)
+    epoch_bars = bars.assign(time=epoch)
+    assert epoch_bars["time"].iloc[0] > 10**9
+    signals = pd.DataFrame({
+        "symbol": ["EURUSD"] * 3, "direction": ["BUY", "SELL", "BUY"],
+        "entry": bars["close"].iloc[[50, 120, 300]].to_numpy(),
+        "timestamp": bars["time"].iloc[[50, 120, 300]].dt.strftime("%Y-%m-%dT%H:%M:%S").to_numpy(),
+    })
+    signals["stop_loss"] = signals["entry"] - np.where(signals["direction"] == "BUY", 0.002, -0.002)
+    signals["take_profit"] = signals["entry"] + np.where(signals["direction"] == "BUY", 0.003, -0.003)
+
+    by_datetime = resolve_signal_history(signals, {"EURUSD": bars}, max_bars=48)
+    by_epoch = resolve_signal_history(signals, {"EURUSD": epoch_bars}, max_bars=48)
+    assert len(by_epoch) == 3
+    pd.testing.assert_frame_equal(by_epoch, by_datetime)
+    # Epoch signal times resolve the same way too
+    epoch_signals = signals.assign(timestamp=epoch[[50, 120, 300]])
+    assert (resolve_signal_history(epoch_signals, {"EURUSD": epoch_bars}, max_bars=48)["outcome"]
+            == by_datetime["outcome"]).all()
+
+
+def test_resolve_open_trades_settles_live_trades(storage, sim_broker):
+    close = sim_broker.symbol_info_tick("EURUSD").bid
+    opened = (DEFAULT_END - timedelta(hours=30)).strftime("%Y-%m-%d %H:%M:%S")
+    recent = (DEFAULT_END - timedelta(minutes=20)).strftime("%Y-%m-%d %H:%M:%S")
+    for created_at in (opened, recent):
+        storage.execute(
+            "INSERT INTO trade_performance (symbol, direction, entry_price, stop_loss, take_profit, confidence, "
+            "status, strategy, created_at) VALUES ('EURUSD', 'BUY', ?, ?, ?, 85, 'unknown', 'mtf_confluence', ?)",
+            (close, close - 0.5, close + 0.5, created_at))
+    load_aggregates()
+
+    # The 30h old trade expires after 96 M15 bars; the recent one is still open
+    assert resolve_open_trades() == 1
+    statuses = [r["status"] for r in storage.query("SELECT status FROM trade_performance ORDER BY id")]
+    assert statuses == ["expired", "unknown"]
+    summary, = aggregates.summary(["symbol"])
+    assert summary["expired"] == 1
+    assert resolve_open_trades() == 0
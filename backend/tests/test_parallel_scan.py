@@ -0,0 +1,54 @@
+import multiprocessing
+import time
+import pytest
+from app.scheduler import parallel_scan
+from app.scheduler.parallel_scan import analyze_pairs, get_scan_pool, shutdown_scan_pool
+from app.signals import signal_engine
+
+# Workers see the patched analyze_symbol only when they are forked from this process
+pytestmark = pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="needs fork workers")
+
+
+def fake_analysis(symbol):
+    if symbol == "STUCK":
+        time.sleep(3)
+    if symbol == "SLOW":
+        time.sleep(0.3)
+    return {"symbol": symbol, "direction": "NEUTRAL"}
+
+
+@pytest.fixture(autouse=True)
+def fake_workers(monkeypatch):
+    shutdown_scan_pool()
+    monkeypatch.setattr(signal_engine, "analyze_symbol", fake_analysis)
+    yield
+    shutdown_scan_pool()
+
+
+def test_results_come_back_in_input_order():
+    results = analyze_pairs(["EURUSD", "SLOW", "GBPUSD"], workers=2, timeout=5)
+    assert [r["symbol"] for r in results] == ["EURUSD", "SLOW", "GBPUSD"]
+    assert all(r["error"] is None and r["signal"]["direction"] == "NEUTRAL" for r in results)
+
+
+def test_stuck_pair_times_out_and_the_rest_run_on_a_fresh_pool():
+    retired = get_scan_pool(2)
+    start = time.monotonic()
+    results = analyze_pairs(["STUCK"] + [f"PAIR{i}" for i in range(7)], workers=2, timeout=0.5)
+    elapsed = time.monotonic() - start
+
+    assert [r["error"] for r in results] == ["timeout"] + [None] * 7
+    # The stuck pair is dropped after its own 0.5s, not a limit stretched over the batch
+    assert elapsed < 1.5
+    assert parallel_scan._pool is not retired
+
+
+def test_each_pair_gets_its_own_time_limit():
+    # Three 0.3s pairs on one worker take 0.9s, but none runs longer than its 0.5s limit
+    results = analyze_pairs(["SLOW", "SLOW", "SLOW"], workers=1, timeout=0.5)
+    assert [r["error"] for r in results] == [None] * 3
+
+
+def test_deadline_defers_unfinished_pairs():
+    results = analyze_pairs(["SLOW", "SLOW", "SLOW"], workers=1, timeout=5, deadline=time.monotonic() + 0.1)
+    assert [r["error"] for r in results] == ["deferred"] * 3
@@ -0,0 +1,99 @@
+import asyncio
+import time
+from app.backtest.broker import SimulatedBroker
+from app.core.metrics import metrics
+from app.data.broker import set_broker
+from app.scheduler.pipeline import ScanPipeline, run_pipeline
+from app.signals import gates, signal_engine
+from benchmarks.common import synthetic_mtf
+
+PAIRS = ["EURUSD", "GBPUSD", "USDJPY", "AUDUSD"]
+
+
+class FakePipeline(ScanPipeline):
+    """Stages that only record what passes through them"""
+
+    def __init__(self, release: asyncio.Event = None, fail: str = None, **kwargs):
+        super().__init__(**kwargs)
+        self.release, self.fail = release, fail
+        self.fetched, self.dispatched = [], []
+
+    async def _fetch(self, job):
+        if self._expired(job):
+            return None
+        if job["symbol"] == self.fail:
+            raise RuntimeError("broker down")
+        self.fetched.append(job["symbol"])
+        return job
+
+    async def _indicators(self, job):
+        return job
+
+    async def _decide(self, job):
+        job["signal"], job["action"] = {"symbol": job["symbol"]}, "execute"
+        return job
+
+    async def _persist(self, job):
+        if self.release is not None:
+            await self.release.wait()
+        self.results[job["symbol"]] = [job["signal"]]
+        return job
+
+    async def _dispatch(self, job):
+        self.dispatched.append(job["symbol"])
+
+
+def test_full_queues_hold_back_the_fetch_stage():
+    pairs = [f"P{i}" for i in range(30)]
+
+    async def run():
+        release = asyncio.Event()
+        pipeline = FakePipeline(release, queue_size=1, concurrency={"fetch": 1, "indicators": 1, "decide": 1})
+        task = asyncio.ensure_future(pipeline.run(pairs))
+        await asyncio.sleep(0.05)
+        in_flight = len(pipeline.fetched)
+        release.set()
+        await task
+        return in_flight, pipeline
+
+    in_flight, pipeline = asyncio.run(run())
+    # One job in each of the three consumers and three queues ahead of persist, plus the one being persisted
+    assert in_flight <= 7
+    assert pipeline.dispatched == pairs and list(pipeline.results) == pairs
+
+
+def test_stage_errors_skip_only_that_symbol():
+    errors = metrics.snapshot()["counters"].get("pipeline.fetch.errors", 0)
+    pipeline = FakePipeline(fail="GBPUSD")
+    results = asyncio.run(pipeline.run(PAIRS))
+    assert list(results) == ["EURUSD", "USDJPY", "AUDUSD"] and pipeline.failed == ["GBPUSD"]
+    assert metrics.snapshot()["counters"]["pipeline.fetch.errors"] == errors + 1
+
+
+def test_past_deadline_defers_every_pair():
+    results, deferred, failed = run_pipeline(PAIRS, deadline=time.monotonic() - 1)
+    assert results == {} and deferred == PAIRS
+
+
+def test_risk_gate_is_rechecked_before_persisting(monkeypatch):
+    monkeypatch.setattr(gates, "evaluate_risk_gate", lambda symbol: {"reason": "daily loss limit"})
+    pipeline = ScanPipeline(notify=False, persist=False)
+    job = {"symbol": "EURUSD", "signal": {"symbol": "EURUSD"}, "action": "execute"}
+    assert asyncio.run(pipeline._persist(job)) is None and pipeline.results == {}
+    forecast = {"symbol": "EURUSD", "signal": {"symbol": "EURUSD"}, "action": "forecast"}
+    assert asyncio.run(pipeline._persist(forecast)) is None and pipeline.results == {"EURUSD": [forecast["signal"]]}
+
+
+def test_pipeline_matches_the_serial_scan(sim_broker):
+    # Seeds giving an 80% SELL (executed), a 70% BUY (forecast), nothing and a 60% BUY
+    history = {pair: synthetic_mtf(300, seed=seed) for pair, seed in zip(PAIRS, [6, 58, 3, 60])}
+
+    set_broker(SimulatedBroker(history, clock=sim_broker.clock))
+    serial = {}
+    for pair in PAIRS:
+        serial[pair] = signal_engine.run_all_strategies(None, pair, "MTF", notify=False, persist=False)
+
+    set_broker(SimulatedBroker(history, clock=sim_broker.clock))
+    results, deferred, failed = run_pipeline(PAIRS, notify=False, persist=False)
+    assert deferred == [] and failed == [] and len(results) == 3
+    assert {pair: signals for pair, signals in serial.items() if signals} == results
@@ -0,0 +1,89 @@
+from types import SimpleNamespace
+import pytest
+from app.core.config import settings
+from app.database.db_utils import save_signal, warm_recent_signals
+from app.notifications import telegram_bot
+from app.signals.recent_signals import RecentSignals, recent_alerts, recent_signals
+
+SIGNAL = {"symbol": "EURUSD", "timeframe": "M15", "direction": "BUY", "entry": 1.1, "stop_loss": 1.09,
+          "take_profit": 1.12, "confidence": 80, "reason": "test"}
+
+
+def test_seen_within_the_window_only():
+    recent = RecentSignals(window_seconds=60)
+    recent.add(SIGNAL, epoch=1000)
+    assert recent.seen("EURUSD", "M15", "BUY", now=1059)
+    assert not recent.seen("EURUSD", "M15", "SELL", now=1059)
+    assert not recent.seen("EURUSD", "M15", "BUY", now=1061)
+
+
+def test_claim_is_once_per_window():
+    recent = RecentSignals(window_seconds=60)
+    assert recent.claim(SIGNAL, epoch=1000)
+    assert not recent.claim(SIGNAL, epoch=1030)
+    assert recent.claim(SIGNAL, epoch=1061)
+
+
+def test_release_undoes_a_claim():
+    recent = RecentSignals(window_seconds=60)
+    assert recent.claim(SIGNAL, epoch=1000)
+    recent.release(SIGNAL, 1000)
+    assert recent.recent(now=1001) == []
+    assert recent.claim(SIGNAL, epoch=1001)
+    # A stale release (another claim since) changes nothing
+    recent.release(SIGNAL, 1000)
+    assert not recent.claim(SIGNAL, epoch=1002)
+
+
+def test_recent_is_newest_first_and_pruned():
+    recent = RecentSignals(window_seconds=60)
+    recent.warm([{**SIGNAL, "ts_epoch": 900}, {**SIGNAL, "symbol": "GBPUSD", "ts_epoch": 990},
+                 {**SIGNAL, "direction": "SELL", "ts_epoch": 1000}])
+    assert [(s["symbol"], s["direction"]) for s in recent.recent(now=1010)] == [("EURUSD", "SELL"),
+                                                                                ("GBPUSD", "BUY")]
+    assert [s["symbol"] for s in recent.recent(symbol="GBPUSD", now=1010)] == ["GBPUSD"]
+    assert len(recent) == 2
+
+
+@pytest.fixture
+def telegram(monkeypatch):
+    monkeypatch.setattr(settings, "TELEGRAM_BOT_TOKEN", "token")
+    monkeypatch.setattr(settings, "TELEGRAM_CHAT_ID", "chat")
+    recent_alerts.warm([])
+    posts = []
+
+    def post(status):
+        def send(url, data):
+            posts.append(data)
+            if status is None:
+                raise ConnectionError("network down")
+            return SimpleNamespace(status_code=status, text="error")
+        monkeypatch.setattr(telegram_bot.requests, "post", send)
+    yield post, posts
+    recent_alerts.warm([])
+
+
+@pytest.mark.parametrize("failure", [500, None])
+def test_failed_alert_can_be_retried(telegram, failure):
+    post, posts = telegram
+    post(failure)
+    telegram_bot.send_signal_to_telegram(SIGNAL)
+    post(200)
+    telegram_bot.send_signal_to_telegram(SIGNAL)
+    telegram_bot.send_signal_to_telegram(SIGNAL)
+    assert len(posts) == 2
+
+
+def test_alerts_sent_before_a_restart_are_not_resent(telegram, storage):
+    post, posts = telegram
+    post(200)
+    recent_signals.warm([])
+    telegram_bot.send_signal_to_telegram(SIGNAL)
+    save_signal(SIGNAL)
+    # Restart: both windows start empty and are warmed from the signals table
+    recent_signals.warm([])
+    recent_alerts.warm([])
+    assert warm_recent_signals() == 1
+    telegram_bot.send_signal_to_telegram(SIGNAL)
+    assert len(posts) == 1
+    recent_signals.warm([])
@@ -0,0 +1,128 @@
+import asyncio
+from starlette.requests import Request
+from app.api.response_cache import ResponseCache, closed_bar
+from app.core.config import settings
+
+
+def request(etag: str = None) -> Request:
+    headers = [(b"if-none-match", etag.encode())] if etag else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+class Compute:
+    def __init__(self, result=None, delay=0.05):
+        self.calls = 0
+        self.result = result if result is not None else {"direction": "BUY"}
+        self.delay = delay
+
+    async def __call__(self, symbol):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return {**self.result, "symbol": symbol}
+
+
+def test_closed_bar_waits_for_the_settle_delay():
+    settle = settings.BAR_SETTLE_SECONDS
+    bar, expires = closed_bar("M15", now=900 * 10 + settle + 1)
+    assert bar == 900 * 9
+    assert expires == 900 * 11 + settle
+    assert closed_bar("M15", now=900 * 10 + settle - 1)[0] == 900 * 8
+    assert closed_bar("X1") is None
+
+
+def test_concurrent_requests_share_one_computation():
+    cache, compute = ResponseCache(1 << 20), Compute()
+
+    async def run():
+        return await asyncio.gather(*(cache.serve(request(), "trend", "eurusd", "M15", compute, "EURUSD")
+                                      for _ in range(20)))
+
+    responses = asyncio.run(run())
+    assert compute.calls == 1
+    assert len({r.body for r in responses}) == 1
+    assert all(r.headers["etag"] for r in responses)
+
+
+def test_cancelled_leader_does_not_cancel_waiters():
+    cache, compute = ResponseCache(1 << 20), Compute(delay=0.1)
+
+    async def run():
+        leader = asyncio.ensure_future(cache.serve(request(), "trend", "EURUSD", "M15", compute, "EURUSD"))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.ensure_future(cache.serve(request(), "trend", "EURUSD", "M15", compute, "EURUSD"))
+        await asyncio.sleep(0.01)
+        leader.cancel()  # the first client disconnected
+        response = await waiter
+        return leader, response
+
+    leader, response = asyncio.run(run())
+    assert leader.cancelled()
+    assert response.status_code == 200 and b"BUY" in response.body
+    assert compute.calls == 1
+
+
+def test_computation_outlives_every_caller_and_is_cached():
+    cache, compute = ResponseCache(1 << 20), Compute(delay=0.05)
+
+    async def run():
+        caller = asyncio.ensure_future(cache.serve(request(), "trend", "EURUSD", "M15", compute, "EURUSD"))
+        await asyncio.sleep(0.01)
+        caller.cancel()
+        await asyncio.sleep(0.1)
+        return await cache.serve(request(), "trend", "EURUSD", "M15", compute, "EURUSD")
+
+    response = asyncio.run(run())
+    assert response.status_code == 200
+    assert compute.calls == 1
+
+
+def test_errors_are_shared_but_not_cached():
+    cache, compute = ResponseCache(1 << 20), Compute(result={"error": "no data"}, delay=0)
+
+    async def run():
+        first = await cache.serve(request(), "trend", "EURUSD", "M15", compute, "EURUSD")
+        second = await cache.serve(request(), "trend", "EURUSD", "M15", compute, "EURUSD")
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first.headers["cache-control"] == "no-store"
+    assert compute.calls == 2
+
+
+def test_exceptions_reach_every_waiter():
+    cache = ResponseCache(1 << 20)
+
+    async def broken(symbol):
+        await asyncio.sleep(0.02)
+        raise RuntimeError("broker down")
+
+    async def run():
+        return await asyncio.gather(*(cache.serve(request(), "trend", "EURUSD", "M15", broken, "EURUSD")
+                                      for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(run()))
+
+
+def test_matching_etag_gets_304():
+    cache, compute = ResponseCache(1 << 20), Compute(delay=0)
+
+    async def run():
+        first = await cache.serve(request(), "trend", "EURUSD", "M15", compute, "EURUSD")
+        return first, await cache.serve(request(first.headers["etag"]), "trend", "EURUSD", "M15", compute, "EURUSD")
+
+    first, second = asyncio.run(run())
+    assert second.status_code == 304 and second.headers["etag"] == first.headers["etag"]
+    assert compute.calls == 1
+
+
+def test_least_recently_used_entries_are_evicted():
+    # Room for two ~40 byte bodies
+    cache, compute = ResponseCache(80), Compute(delay=0)
+
+    async def run():
+        for symbol in ("EURUSD", "GBPUSD", "EURUSD", "USDJPY"):
+            await cache.serve(request(), "trend", symbol, "M15", compute, symbol)
+
+    asyncio.run(run())
+    assert list(cache._entries) == [("trend", "EURUSD", "M15"), ("trend", "USDJPY", "M15")]
+    assert compute.calls == 3
@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+import pytest
+from app.database import retention
+from app.database.retention import archive_table, get_archive, partitions, query_partitions, run_retention
+
+
+@pytest.fixture
+def history(storage):
+    now = datetime.utcnow()
+    old_march, old_april, recent = datetime(2024, 3, 10), datetime(2024, 4, 2), now - timedelta(days=1)
+    for moment in (old_march, old_april, old_april, recent):
+        storage.execute("INSERT INTO signals (timestamp, symbol) VALUES (?, 'EURUSD')", (moment.isoformat(),))
+    storage.executemany("INSERT INTO forecast_signals (timestamp, symbol, triggered, status) VALUES (?, ?, ?, ?)", [
+        (old_march.isoformat(), "EURUSD", 1, "triggered"),
+        (old_march.isoformat(), "GBPUSD", 0, "pending"),      # still live: stays hot
+        (old_march.isoformat(), "USDJPY", 0, "expired"),
+    ])
+    storage.executemany("INSERT INTO trade_performance (symbol, status, created_at) VALUES (?, ?, ?)", [
+        ("EURUSD", "tp", old_march.strftime("%Y-%m-%d %H:%M:%S")),
+        ("GBPUSD", "unknown", old_march.strftime("%Y-%m-%d %H:%M:%S")),  # unresolved: stays hot
+    ])
+    yield storage
+    get_archive().close()
+    retention._archives.clear()
+
+
+def ids(storage, table):
+    return [r["id"] for r in storage.query(f"SELECT id FROM {table} ORDER BY id")]
+
+
+def test_old_rows_move_to_monthly_partitions_in_batches(history):
+    assert archive_table("signals", days=30, batch_size=2) == 3
+    assert ids(history, "signals") == [4]
+    assert partitions("signals") == ["signals_2024_03", "signals_2024_04"]
+    assert [r["id"] for r in query_partitions("signals")] == [1, 2, 3, 4]
+    assert [r["id"] for r in query_partitions("signals", since_month="2024-04")] == [2, 3, 4]
+    assert [r["id"] for r in query_partitions("signals", "symbol = ?", ("GBPUSD",))] == []
+
+
+def test_live_forecasts_and_unresolved_trades_stay_hot(history):
+    moved = run_retention(days=30)
+    assert moved == {"signals": 3, "forecast_signals": 2, "trade_performance": 1}
+    assert [r["symbol"] for r in history.query("SELECT symbol FROM forecast_signals")] == ["GBPUSD"]
+    assert [r["status"] for r in history.query("SELECT status FROM trade_performance")] == ["unknown"]
+    assert run_retention(days=30) == {"signals": 0, "forecast_signals": 0, "trade_performance": 0}
+    assert run_retention(days=0) == {}
+
+
+def test_interrupted_batch_is_redone_without_duplicates(history, monkeypatch):
+    original = history.executemany
+
+    def fail_delete(sql, rows, name="query"):
+        if sql.startswith("DELETE"):
+            raise RuntimeError("killed between the two commits")
+        return original(sql, rows, name=name)
+
+    monkeypatch.setattr(history, "executemany", fail_delete)
+    with pytest.raises(RuntimeError):
+        archive_table("signals", days=30)
+    assert ids(history, "signals") == [1, 2, 3, 4]
+    monkeypatch.setattr(history, "executemany", original)
+    assert archive_table("signals", days=30) == 3
+    assert [r["id"] for r in query_partitions("signals")] == [1, 2, 3, 4]
+
+
+def test_partitions_gain_columns_added_after_they_were_created(history):
+    archive_table("signals", days=30)
+    history.execute("ALTER TABLE signals ADD COLUMN session TEXT")
+    history.execute("INSERT INTO signals (timestamp, symbol, session) VALUES ('2024-03-20T00:00:00', 'EURUSD', 'London')")
+    assert archive_table("signals", days=30) == 1
+    assert [r["session"] for r in query_partitions("signals", "id = 5")] == ["London"]
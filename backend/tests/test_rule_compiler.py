@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app.strategies.rule_compiler import RuleExpression, compile_rules
+from app.strategies.rule_specs import RULE_SETS, get_compiled_strategy, prepare_frames
+from benchmarks.common import synthetic_mtf
+
+TIMEFRAMES = ["H1", "M15"]
+
+
+def evaluate(source, values):
+    expr = RuleExpression(source, TIMEFRAMES, "M15")
+    inputs = {}
+    for tf, column, func, window in expr.refs:
+        series = np.asarray(values[f"{tf}.{column}"], dtype=float)
+        if func == "prev":
+            series = np.r_[np.full(window, np.nan), series[:-window]]
+        elif func:
+            reducer = np.max if func == "rolling_max" else np.min
+            series = np.array([reducer(series[max(0, i - window + 1):i + 1]) if i >= window - 1 else np.nan
+                               for i in range(len(series))])
+        inputs[(tf, column, func, window)] = series
+    return expr(inputs)
+
+
+def test_chained_comparison_and_default_timeframe():
+    values = {"M15.a": [3, 3, 1], "M15.b": [2, 3, 2], "M15.c": [1, 1, 3]}
+    assert evaluate("a > b > c", values).tolist() == [True, False, False]
+    assert evaluate("M15.a >= M15.b and not M15.c > 2", values).tolist() == [True, True, False]
+
+
+def test_arithmetic_and_functions():
+    values = {"M15.x": [1.0, -4.0, 2.0], "H1.y": [2.0, 2.0, 2.0]}
+    assert evaluate("abs(M15.x) / H1.y > 1", values).tolist() == [False, True, False]
+    assert evaluate("-M15.x * 2 + 1 > 0", values).tolist() == [False, True, False]
+
+
+def test_series_functions_treat_warm_up_as_false():
+    values = {"M15.x": [1.0, 2.0, 1.5, 3.0]}
+    assert evaluate("M15.x > prev(M15.x)", values).tolist() == [False, True, False, True]
+    assert evaluate("M15.x >= rolling_max(M15.x, 2)", values).tolist() == [False, True, False, True]
+
+
+@pytest.mark.parametrize("source", ["D1.close > 1", "foo(M15.close)", "M15.close ** 2 > 1", "M15.close > 'a'",
+                                    "1 > 0 if M15.close else 1"])
+def test_invalid_rules_are_rejected(source):
+    with pytest.raises(ValueError):
+        RuleExpression(source, TIMEFRAMES, "M15")
+
+
+def test_spec_needs_every_required_key():
+    spec = dict(RULE_SETS["swing"])
+    del spec["threshold"]
+    with pytest.raises(ValueError, match="threshold"):
+        compile_rules(spec)
+
+
+def test_lookback_covers_series_functions():
+    breakout = get_compiled_strategy("breakout")
+    assert breakout.lookback["M15"] == 20
+    assert breakout.lookback["H1"] == 5
+
+
+@pytest.mark.parametrize("name", sorted(RULE_SETS))
+def test_latest_bar_matches_the_history_evaluation(name):
+    strategy = get_compiled_strategy(name)
+    for seed in range(3):
+        frames = prepare_frames(name, synthetic_mtf(300, seed=seed))
+        history = strategy.evaluate(frames)
+        latest = strategy.score(strategy.build_inputs(frames, latest=True))
+        for key in ("direction", "score_buy", "score_sell", "confidence", "failed_gate"):
+            np.testing.assert_allclose(latest[key][0], history[key][-1], err_msg=f"{name} {key}")
+
+
+def test_latest_bar_ignores_a_forming_higher_timeframe_bar():
+    strategy = get_compiled_strategy("mtf_confluence")
+    frames = prepare_frames("mtf_confluence", synthetic_mtf(300, seed=1))
+    # End the entry timeframe mid-bar: the last H4, H1 and D1 bars are still forming
+    frames["M15"] = frames["M15"].iloc[:-2].reset_index(drop=True)
+    history = strategy.evaluate(frames)
+    inputs = strategy.build_inputs(frames, latest=True)
+    latest = strategy.score(inputs)
+    for key in ("direction", "score_buy", "score_sell", "confidence", "failed_gate"):
+        np.testing.assert_allclose(latest[key][0], history[key][-1], err_msg=key)
+    h1 = [ref for ref in inputs if ref[0] == "H1" and not ref[2]][0]
+    assert inputs[h1][0] == frames["H1"][h1[1]].iloc[-2]
+
+
+def test_signal_dict_from_the_latest_bar():
+    strategy = compile_rules({
+        "name": "always", "timeframes": ["M15"], "buy": [("close > 0", 1)], "sell": [("close < 0", 1)],
+        "threshold": 1, "confidence": {"bands": [(1, 90)]}, "sl_atr": 1.0, "tp_atr": 2.0,
+    })
+    frame = pd.DataFrame({"close": [1.10, 1.12], "atr": [0.01, 0.02]})
+    signal = strategy.evaluate_latest({"M15": frame}, "EURUSD")
+    assert signal["direction"] == "BUY" and signal["confidence"] == 90
+    assert signal["stop_loss"] == pytest.approx(1.10) and signal["take_profit"] == pytest.approx(1.16)
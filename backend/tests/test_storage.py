@@ -0,0 +1,95 @@
+import sqlite3
+import threading
+import pytest
+from app.database.db_utils import MIGRATIONS, init_db
+from app.database.storage import Storage, set_storage
+
+
+@pytest.fixture
+def db(tmp_path):
+    storage = Storage(str(tmp_path / "test.db"))
+    yield storage
+    storage.close()
+
+
+def test_one_connection_per_thread_in_wal_mode(db):
+    assert db.connection() is db.connection()
+    other = []
+    thread = threading.Thread(target=lambda: other.append(db.connection()))
+    thread.start()
+    thread.join()
+    assert other[0] is not db.connection()
+    assert db.query_one("PRAGMA journal_mode")[0] == "wal"
+
+
+def test_transactions_commit_roll_back_and_nest(db):
+    db.execute("CREATE TABLE t (x INTEGER)")
+    with db.transaction():
+        db.execute("INSERT INTO t VALUES (1)")
+        with db.transaction():
+            db.execute("INSERT INTO t VALUES (2)")
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            db.execute("INSERT INTO t VALUES (3)")
+            raise RuntimeError("abort")
+    assert [r["x"] for r in db.query("SELECT x FROM t ORDER BY x")] == [1, 2]
+
+
+def test_readers_see_committed_rows_while_a_write_is_open(db):
+    db.execute("CREATE TABLE t (x INTEGER)")
+    db.execute("INSERT INTO t VALUES (1)")
+    seen = []
+    with db.transaction():
+        db.execute("INSERT INTO t VALUES (2)")
+        reader = threading.Thread(target=lambda: seen.append(db.query_one("SELECT COUNT(*) FROM t")[0]))
+        reader.start()
+        reader.join(5)
+    assert seen == [1]
+
+
+def test_new_files_use_incremental_auto_vacuum(db):
+    db.execute("CREATE TABLE t (x INTEGER)")
+    assert db.query_one("PRAGMA auto_vacuum")[0] == 2
+
+
+def test_migrations_run_once_and_in_order(db):
+    calls = []
+    migrations = ["CREATE TABLE a (x); CREATE TABLE b (y)", lambda conn: calls.append(1)]
+    assert db.migrate(migrations) == 2
+    assert db.migrate(migrations) == 2
+    migrations.append("ALTER TABLE a ADD COLUMN z")
+    assert db.migrate(migrations) == 3
+    assert calls == [1]
+    assert db.query_one("PRAGMA user_version")[0] == 3
+
+
+def test_failed_migration_is_rolled_back(db):
+    with pytest.raises(sqlite3.OperationalError):
+        db.migrate(["CREATE TABLE a (x)", "CREATE TABLE b (y); ALTER TABLE missing ADD COLUMN z"])
+    assert db.query_one("PRAGMA user_version")[0] == 1
+    assert db.query_one("SELECT name FROM sqlite_master WHERE name = 'b'") is None
+
+
+def test_schema_from_before_migrations_is_upgraded(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+    CREATE TABLE signals (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, symbol TEXT, timeframe TEXT,
+        direction TEXT, entry REAL, stop_loss REAL, take_profit REAL, confidence INTEGER, reason TEXT);
+    CREATE TABLE forecast_signals (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, symbol TEXT,
+        timeframe TEXT, direction TEXT, entry REAL, stop_loss REAL, take_profit REAL, confidence INTEGER,
+        reason TEXT, triggered INTEGER DEFAULT 0);
+    INSERT INTO signals (timestamp, symbol) VALUES ('2024-03-05T10:00:00', 'EURUSD');
+    INSERT INTO forecast_signals (symbol, triggered) VALUES ('EURUSD', 1), ('GBPUSD', 0);
+    """)
+    conn.close()
+
+    storage = set_storage(path)
+    try:
+        init_db()
+        assert storage.query_one("PRAGMA user_version")[0] == len(MIGRATIONS)
+        assert storage.query_one("SELECT ts_epoch FROM signals")[0] == 1709632800
+        assert [r[0] for r in storage.query("SELECT status FROM forecast_signals ORDER BY id")] == ["triggered", "pending"]
+        init_db()  # no-op the second time
+    finally:
+        storage.close()
@@ -0,0 +1,98 @@
+import threading
+import time
+import pytest
+from app.core.metrics import metrics
+from app.database.write_behind import WriteBehindQueue
+
+INSERT = "INSERT INTO signals (symbol, confidence) VALUES (?, ?)"
+
+
+def flushes():
+    return metrics.snapshot()["timings"].get("db.write_behind.flush", {}).get("count", 0)
+
+
+@pytest.fixture
+def writer(storage):
+    writer = WriteBehindQueue(batch_size=3, flush_interval=60)
+    yield writer
+    writer.stop()
+
+
+def rows(storage):
+    return [r["symbol"] for r in storage.query("SELECT symbol FROM signals ORDER BY id")]
+
+
+def test_writes_are_inline_until_started(writer, storage):
+    ids = []
+    writer.submit(INSERT, ("EURUSD", 80), callback=ids.append)
+    assert rows(storage) == ["EURUSD"] and ids == [1]
+
+
+def test_batches_commit_at_batch_size_with_callbacks_after_commit(writer, storage):
+    committed = []
+    writer.start()
+    before = flushes()
+    for i, symbol in enumerate(["A", "B", "C", "D"]):
+        writer.submit(INSERT, (symbol, i), callback=lambda row_id, s=symbol: committed.append((s, row_id, rows(storage))))
+    assert writer.flush()
+    # A-C in one transaction at batch_size, D on flush
+    assert flushes() - before == 2
+    assert [(s, row_id) for s, row_id, _ in committed] == [("A", 1), ("B", 2), ("C", 3), ("D", 4)]
+    assert committed[0][2] == ["A", "B", "C"]
+
+
+def test_bulk_items_count_once_towards_the_batch(writer, storage):
+    writer.start()
+    before = flushes()
+    writer.submit(INSERT, ("A", 1))
+    writer.submit_many(INSERT, [("BULK1", 1), ("BULK2", 2), ("BULK3", 3)])
+    assert writer.flush()
+    assert flushes() - before == 1 and len(rows(storage)) == 4
+
+
+def test_writes_commit_on_the_interval_without_a_flush(storage):
+    writer = WriteBehindQueue(batch_size=100, flush_interval=0.05)
+    writer.start()
+    try:
+        writer.submit(INSERT, ("TRADE", 1))
+        # Nothing a scan does can hold this back past the flush interval
+        deadline = time.monotonic() + 2
+        while rows(storage) != ["TRADE"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert rows(storage) == ["TRADE"]
+    finally:
+        writer.stop()
+
+
+def test_a_bad_row_does_not_lose_the_batch(writer, storage):
+    writer.start()
+    errors = metrics.snapshot()["counters"].get("db.write_behind.errors", 0)
+    dropped = []
+    # Three items: one batch at batch_size
+    writer.submit(INSERT, ("A", 1))
+    writer.submit("INSERT INTO missing VALUES (?)", (1,), callback=dropped.append)
+    writer.submit(INSERT, ("B", 2))
+    assert writer.flush()
+    assert rows(storage) == ["A", "B"] and dropped == []
+    assert metrics.snapshot()["counters"]["db.write_behind.errors"] == errors + 1
+
+
+def test_stop_drains_the_queue(writer, storage):
+    writer.start()
+    writer.submit(INSERT, ("A", 1))
+    writer.stop()
+    assert rows(storage) == ["A"] and not writer.running
+    writer.submit(INSERT, ("B", 2))
+    assert rows(storage) == ["A", "B"]
+
+
+def test_concurrent_submitters(writer, storage):
+    writer.start()
+    threads = [threading.Thread(target=lambda t=t: [writer.submit(INSERT, (f"T{t}", i)) for i in range(50)])
+               for t in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert writer.flush()
+    assert len(rows(storage)) == 200